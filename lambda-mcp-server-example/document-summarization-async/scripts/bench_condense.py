@@ -0,0 +1,97 @@
+"""
+Benchmark the extractive pre-condensation stage of the processor
+
+Condenses every document of a corpus to each token budget and reports the time
+taken, the compression ratio (input tokens / output tokens) and how much of the
+document's vocabulary the condensed text keeps, a cheap proxy for coverage. The
+corpus is a directory of .txt files; without one, a synthetic corpus of long,
+repetitive documents is generated.
+
+Usage:
+    python scripts/bench_condense.py [--corpus docs/] [--budgets 1000,2000,4000] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'processor'))
+
+from condense import WORD, condense  # noqa: E402
+from summarizer import count_tokens  # noqa: E402
+
+TOPICS = {
+    'energy': 'solar wind grid storage battery turbine demand utility capacity emissions',
+    'health': 'patients clinical trial dosage hospital outcomes treatment diagnosis care',
+    'finance': 'revenue margin quarter guidance investors liquidity debt earnings growth',
+    'software': 'latency deployment service database cache release incident outage users',
+}
+FILLER = 'the a of to and in that for with as on by this is was are it be at from'.split()
+
+def synthetic_corpus(documents: int, sentences: int, seed: int = 11):
+    """Long documents mixing a few topics, with repeated boilerplate as real reports have"""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(documents):
+        topics = rng.sample(list(TOPICS), 2)
+        # Names and figures particular to the document, which condensing should keep
+        entities = [f"{rng.choice(['acme', 'nordia', 'veltra', 'quorra'])}{rng.randint(1, 999)}" for _ in range(150)]
+        boilerplate = [make_sentence(rng, TOPICS[topics[0]], entities) for _ in range(5)]
+        body = []
+        for _ in range(sentences):
+            if rng.random() < 0.15:
+                body.append(rng.choice(boilerplate))
+            else:
+                body.append(make_sentence(rng, TOPICS[rng.choice(topics)], entities))
+        corpus.append((f"synthetic-{index}", ' '.join(body)))
+    return corpus
+
+def make_sentence(rng, topic: str, entities) -> str:
+    words = [rng.choice(topic.split()) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(rng.randint(8, 25))]
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), rng.choice(entities))
+    return ' '.join(words).capitalize() + '.'
+
+def vocabulary(text: str) -> set:
+    return {word for word in WORD.findall(text.lower()) if word not in FILLER}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='Directory of .txt documents')
+    parser.add_argument('--budgets', default='1000,2000,4000', help='Comma separated token budgets')
+    parser.add_argument('--documents', type=int, default=20, help='Synthetic documents without --corpus')
+    parser.add_argument('--sentences', type=int, default=2000, help='Sentences per synthetic document')
+    parser.add_argument('--model', default='gpt-3.5-turbo', help='Model whose tokenizer counts tokens')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per document and budget')
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(args.corpus, '*.txt'))):
+            with open(path, encoding='utf-8') as f:
+                corpus.append((os.path.basename(path), f.read()))
+    else:
+        corpus = synthetic_corpus(args.documents, args.sentences)
+    if not corpus:
+        sys.exit('No documents')
+
+    input_tokens = [count_tokens(text, args.model) for _, text in corpus]
+    print(f"{len(corpus)} documents, {statistics.mean(input_tokens):.0f} tokens on average")
+    print(f"{'budget':>8}{'ms/doc p50':>12}{'ms/doc max':>12}{'ratio':>9}{'vocab kept':>12}")
+
+    for budget in (int(b) for b in args.budgets.split(',')):
+        timings = []
+        ratios = []
+        coverage = []
+        for (_, text), tokens in zip(corpus, input_tokens):
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                condensed = condense(text, budget, args.model)
+                timings.append((time.perf_counter() - started) * 1000)
+            ratios.append(tokens / max(count_tokens(condensed, args.model), 1))
+            coverage.append(len(vocabulary(condensed)) / max(len(vocabulary(text)), 1))
+        print(f"{budget:>8}{statistics.median(timings):>12.1f}{max(timings):>12.1f}"
+              f"{statistics.mean(ratios):>8.1f}x{statistics.mean(coverage):>11.0%}")
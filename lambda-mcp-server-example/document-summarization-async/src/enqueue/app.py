@@ -0,0 +1,43 @@
+import boto3
+import os
+import logging
+from datetime import datetime
+from urllib.parse import unquote_plus
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = boto3.resource('dynamodb')
+
+def lambda_handler(event, context):
+    """
+    Mark documents uploaded directly to S3 as queued once their upload completes
+
+    The JobsTable stream relay sends the processing message for the queued job.
+    """
+    jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
+
+    for record in event['Records']:
+        # Object keys are URL encoded in S3 event notifications
+        s3_key = unquote_plus(record['s3']['object']['key'])
+        job_id = os.path.splitext(os.path.basename(s3_key))[0]
+
+        try:
+            # Only the first event for an upload moves the job on; S3 may deliver it twice
+            jobs_table.update_item(
+                Key={'jobId': job_id},
+                UpdateExpression="SET #status = :queued, updatedAt = :updated_at, uploadedAt = :updated_at",
+                ConditionExpression="#status = :uploading AND s3Key = :s3_key",
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':queued': 'queued',
+                    ':uploading': 'uploading',
+                    ':s3_key': s3_key,
+                    ':updated_at': datetime.utcnow().isoformat()
+                }
+            )
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.info(f"Ignoring upload event for {s3_key}: no job waiting for it")
+            continue
+
+        logger.info(f"Uploaded document queued successfully: {job_id}")
@@ -15,7 +15,8 @@ def lambda_handler(event, context):
     """
     try:
         for record in event['Records']:
-            if record['eventName'] == 'MODIFY':
+            # Jobs answered from the summary cache are inserted already completed
+            if record['eventName'] in ('INSERT', 'MODIFY'):
                 # Extract job information
                 new_image = record['dynamodb']['NewImage']
                 old_image = record['dynamodb'].get('OldImage', {})
@@ -57,7 +58,9 @@ def log_completion(job_id: str, status: str, job_data: dict):
         message = f"Document summarization job {job_id} {status}"
         
         if status == 'completed':
-            summary_preview = job_data.get('summary', {}).get('S', '')[:100] + '...'
+            # Summaries stored in S3 only leave a preview on the job record
+            summary = job_data.get('summaryPreview', job_data.get('summary', {})).get('S', '')
+            summary_preview = summary[:100] + '...'
             message += f". Summary preview: {summary_preview}"
         elif status == 'failed':
             error_message = job_data.get('errorMessage', {}).get('S', 'Unknown error')
@@ -1,57 +1,162 @@
 import json
 import boto3
 import os
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import openai
+from botocore.exceptions import ClientError
+from openai import OpenAI, RateLimitError
 from typing import Dict, Any
 
+import condense
+from lease import JobLease, LeaseLost, is_condition_failure
+from ratelimit import DynamoDBRateLimitStore, InMemoryRateLimitStore, RateLimiter
+from summarizer import MapReduceSummarizer, S3CheckpointStore, count_tokens
+# From SharedLayer
+from summary_store import emit_cache_metric, get_cached_summary, put_cached_summary, store_summary
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 s3 = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
 eventbridge = boto3.client('events')
+_local = threading.local()
+_openai_client = None
+_openai_lock = threading.Lock()
+_rate_limiter = None
+
+OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+# Documents summarized at once per invocation; with the event source's maximum
+# concurrency this caps the requests in flight to the LLM provider
+PROCESSOR_CONCURRENCY = int(os.environ.get('PROCESSOR_CONCURRENCY', '10'))
+# Context window of OPENAI_MODEL; longer documents are summarized in chunks
+OPENAI_CONTEXT_TOKENS = int(os.environ.get('OPENAI_CONTEXT_TOKENS', '16000'))
+OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', '120'))
+CHUNK_TOKENS = int(os.environ.get('CHUNK_TOKENS', '6000'))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get('CHUNK_OVERLAP_TOKENS', '200'))
+# Chunks of one document summarized at once
+CHUNK_CONCURRENCY = int(os.environ.get('CHUNK_CONCURRENCY', '4'))
+# Longer documents are cut down to their most representative sentences first; 0 disables
+PRECONDENSE_TOKENS = int(os.environ.get('PRECONDENSE_TOKENS', '0'))
+# Starting limits of OPENAI_MODEL, until the provider's rate limit headers replace them
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', '500'))
+OPENAI_TOKENS_PER_MINUTE = int(os.environ.get('OPENAI_TOKENS_PER_MINUTE', '200000'))
+# Longest an LLM call waits for rate limit budget before the job is retried
+RATE_LIMIT_MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', '300'))
+RATE_LIMIT_RETRIES = 3
+# Lease on a job being processed, extended every third of it while the worker lives
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', '120'))
+# maxReceiveCount of the queue's redrive policy; both come from ProcessorMaxReceiveCount
+MAX_RECEIVE_COUNT = int(os.environ.get('MAX_RECEIVE_COUNT', '3'))
+
+if PRECONDENSE_TOKENS and not condense.available():
+    logger.warning("PRECONDENSE_TOKENS is set but NumPy is not installed, documents will not be condensed")
+
+def dynamodb():
+    """DynamoDB resource of the calling thread; boto3 resources are not thread safe"""
+    if not hasattr(_local, 'dynamodb'):
+        _local.dynamodb = boto3.resource('dynamodb')
+    return _local.dynamodb
+
+def jobs_table():
+    return dynamodb().Table(os.environ['JOBS_TABLE'])
 
 def lambda_handler(event, context):
     """
-    Process documents with external LLM (OpenAI)
+    Process a batch of documents with external LLM (OpenAI)
+
+    Records are processed concurrently, at most PROCESSOR_CONCURRENCY at a time. Only
+    the records that failed are reported back, so SQS retries just those messages.
     """
+    records = event['Records']
+    workers = max(1, min(PROCESSOR_CONCURRENCY, len(records)))
     
-    for record in event['Records']:
-        try:
-            # Parse SQS message
-            message_body = json.loads(record['body'])
-            job_id = message_body['jobId']
-            s3_key = message_body['s3Key']
-            document_type = message_body['documentType']
-            summary_length = message_body['summaryLength']
-            
-            logger.info(f"Processing job: {job_id}")
-            
-            # Update job status to processing
-            update_job_status(job_id, 'processing')
-            
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(process_record, records))
+    
+    failures = [record['messageId'] for record, succeeded in zip(records, outcomes) if not succeeded]
+    if failures:
+        logger.warning(f"{len(failures)} of {len(records)} jobs failed and will be retried")
+    
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
+
+def process_record(record) -> bool:
+    """Process one SQS message, returning whether it succeeded"""
+    job_id = None
+    lease = None
+    try:
+        # Parse SQS message
+        message_body = json.loads(record['body'])
+        job_id = message_body['jobId']
+        s3_key = message_body['s3Key']
+        document_type = message_body['documentType']
+        summary_length = message_body['summaryLength']
+        
+        logger.info(f"Processing job: {job_id}")
+        
+        # Claim the job, so that a duplicate delivery of its message finds it taken or
+        # done instead of paying for the LLM call again
+        claim = JobLease(jobs_table, job_id, JOB_LEASE_SECONDS)
+        if not claim.claim():
+            logger.info(f"Job {job_id} is already being processed or done, skipping duplicate message")
+            return True
+        lease = claim
+        
+        with lease:
             # Get document from S3
             document_content = get_document_from_s3(s3_key)
             
-            # Process with external LLM
-            summary = summarize_with_openai(document_content, summary_length)
+            # Reuse the summary of an identical document when there is one. Inline uploads
+            # were hashed, and their cache lookup counted, by the upload function.
+            content_hash = message_body.get('contentHash')
+            looked_up = content_hash is not None
+            if content_hash is None:
+                content_hash = hashlib.sha256(document_content.encode('utf-8')).hexdigest()
+            cached = get_cached_summary(content_hash, summary_length)
+            if not looked_up:
+                emit_cache_metric(cached is not None, 'processor')
+            
+            if cached is not None:
+                summary = cached['summary']
+            else:
+                # Process with external LLM
+                summary = summarize_with_openai(document_content, summary_length, job_id)
+                put_cached_summary(content_hash, summary_length, summary)
             
             # Update job with results
-            update_job_with_results(job_id, summary)
+            update_job_with_results(job_id, summary, cache_hit=cached is not None, lease=lease)
             
             # Send completion event
             send_completion_event(job_id, 'completed')
-            
-            logger.info(f"Successfully processed job: {job_id}")
-            
-        except Exception as e:
-            logger.error(f"Error processing job {job_id}: {str(e)}")
-            
-            # Update job status to failed
-            update_job_status(job_id, 'failed', str(e))
-            send_completion_event(job_id, 'failed')
+        
+        logger.info(f"Successfully processed job: {job_id}")
+        return True
+        
+    except LeaseLost:
+        # The lease expired and another worker took the job over; its result stands
+        logger.warning(f"Job {job_id} was taken over by another worker, dropping this result")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error processing job {job_id or record.get('messageId')}: {str(e)}")
+        last_attempt = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1')) >= MAX_RECEIVE_COUNT
+        # Without a lease the job is still queued for the next delivery, unless there is none
+        if job_id is None or (lease is None and not last_attempt):
+            return False
+        
+        try:
+            if last_attempt:
+                # Last attempt before the message moves to the dead letter queue; when the
+                # claim itself failed, e.g. throttled, there is no lease to condition it on
+                update_job_status(job_id, 'failed', str(e), lease=lease)
+                send_completion_event(job_id, 'failed')
+            else:
+                update_job_status(job_id, 'queued', str(e), lease=lease)
+        except Exception as status_error:
+            logger.error(f"Error recording failure of job {job_id}: {str(status_error)}")
+        return False
 
 def get_document_from_s3(s3_key: str) -> str:
     """Retrieve document content from S3"""
@@ -70,47 +175,89 @@ def get_document_from_s3(s3_key: str) -> str:
         logger.error(f"Error retrieving document from S3: {str(e)}")
         raise
 
-def summarize_with_openai(document_content: str, summary_length: str) -> str:
-    """Summarize document using OpenAI API"""
-    try:
-        # Initialize OpenAI client
-        openai.api_key = os.environ['OPENAI_API_KEY']
-        
-        # Define length parameters
-        length_params = {
-            'short': '2-3 sentences',
-            'medium': '1-2 paragraphs',
-            'long': '3-4 paragraphs'
-        }
-        
-        length_instruction = length_params.get(summary_length, '1-2 paragraphs')
-        
-        # Create prompt
-        prompt = f"""
-        Please summarize the following document in {length_instruction}. 
-        Focus on the key points and main ideas:
+def openai_client():
+    """OpenAI client shared by every thread and invocation of this instance"""
+    global _openai_client
+    if _openai_client is None:
+        with _openai_lock:
+            if _openai_client is None:
+                # Retries and backoff are left to chat_completion and the rate limiter, which
+                # know the shared budget; the client's own would retry around it
+                _openai_client = OpenAI(api_key=os.environ['OPENAI_API_KEY'], timeout=OPENAI_TIMEOUT, max_retries=0)
+    return _openai_client
 
-        {document_content}
-        """
+def rate_limiter() -> RateLimiter:
+    """
+    Rate limiter of OPENAI_MODEL, shared through RATE_LIMIT_TABLE by every processor
+    instance, or local to this one without the table
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _openai_lock:
+            if _rate_limiter is None:
+                table_name = os.environ.get('RATE_LIMIT_TABLE')
+                if table_name:
+                    store = DynamoDBRateLimitStore(boto3.client('dynamodb'), table_name)
+                else:
+                    store = InMemoryRateLimitStore()
+                _rate_limiter = RateLimiter(
+                    store,
+                    OPENAI_MODEL,
+                    OPENAI_REQUESTS_PER_MINUTE,
+                    OPENAI_TOKENS_PER_MINUTE,
+                    max_wait=RATE_LIMIT_MAX_WAIT
+                )
+    return _rate_limiter
+
+def chat_completion(messages, max_tokens: int) -> str:
+    """Send one chat completion request within the rate limits, returning the reply text"""
+    limiter = rate_limiter()
+    # Prompt and the longest possible reply; settled against actual usage afterwards
+    reserved = sum(count_tokens(m['content'], OPENAI_MODEL) for m in messages) + max_tokens
+    
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        window = limiter.acquire(reserved)
+        try:
+            raw = openai_client().chat.completions.with_raw_response.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.3
+            )
+        except RateLimitError as e:
+            # Someone else shares the provider's limits, or they were lowered
+            logger.warning(f"OpenAI rate limit reached (attempt {attempt + 1}): {str(e)}")
+            limiter.update(e.response.headers)
+            limiter.pause(2 ** attempt)
+            if attempt == RATE_LIMIT_RETRIES:
+                raise
+            continue
         
-        # Call OpenAI API
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # or gpt-4
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a helpful assistant that creates concise, accurate summaries of documents."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            max_tokens=500,
-            temperature=0.3
+        limiter.update(raw.headers)
+        response = raw.parse()
+        if response.usage:
+            limiter.settle(window, reserved, response.usage.total_tokens)
+        return response.choices[0].message.content.strip()
+
+def summarize_with_openai(document_content: str, summary_length: str, job_id: str = None) -> str:
+    """Summarize document using OpenAI API, in chunks when it exceeds the model's context"""
+    try:
+        summarizer = MapReduceSummarizer(
+            chat_completion,
+            OPENAI_MODEL,
+            context_tokens=OPENAI_CONTEXT_TOKENS,
+            chunk_tokens=CHUNK_TOKENS,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS,
+            concurrency=CHUNK_CONCURRENCY
         )
+        if PRECONDENSE_TOKENS:
+            document_content = condense.condense(document_content, PRECONDENSE_TOKENS, OPENAI_MODEL)
+        
+        checkpoints = None
+        if job_id:
+            checkpoints = S3CheckpointStore(s3, os.environ['DOCUMENTS_BUCKET'], f"checkpoints/{job_id}")
         
-        summary = response.choices[0].message.content.strip()
+        summary = summarizer.summarize(document_content, summary_length, checkpoints)
         logger.info("Successfully generated summary with OpenAI")
         return summary
         
@@ -118,11 +265,9 @@ def summarize_with_openai(document_content: str, summary_length: str) -> str:
         logger.error(f"Error calling OpenAI API: {str(e)}")
         raise
 
-def update_job_status(job_id: str, status: str, error_message: str = None):
-    """Update job status in DynamoDB"""
+def update_job_status(job_id: str, status: str, error_message: str = None, lease: JobLease = None):
+    """Update job status in DynamoDB, releasing the lease when one is given"""
     try:
-        jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
-        
         update_expression = "SET #status = :status, updatedAt = :updated_at"
         expression_values = {
             ':status': status,
@@ -133,8 +278,9 @@ def update_job_status(job_id: str, status: str, error_message: str = None):
             update_expression += ", errorMessage = :error"
             expression_values[':error'] = error_message
         
-        jobs_table.update_item(
-            Key={'jobId': job_id},
+        update_with_lease(
+            job_id,
+            lease,
             UpdateExpression=update_expression,
             ExpressionAttributeNames={'#status': 'status'},
             ExpressionAttributeValues=expression_values
@@ -144,20 +290,23 @@ def update_job_status(job_id: str, status: str, error_message: str = None):
         logger.error(f"Error updating job status: {str(e)}")
         raise
 
-def update_job_with_results(job_id: str, summary: str):
-    """Update job with summary results"""
+def update_job_with_results(job_id: str, summary: str, cache_hit: bool = False, lease: JobLease = None):
+    """Update job with summary results, releasing the lease when one is given"""
     try:
-        jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
+        summary_attributes = store_summary(job_id, summary)
         
-        jobs_table.update_item(
-            Key={'jobId': job_id},
-            UpdateExpression="SET #status = :status, summary = :summary, completedAt = :completed_at, updatedAt = :updated_at",
+        update_with_lease(
+            job_id,
+            lease,
+            UpdateExpression="SET #status = :status, cacheHit = :cache_hit, completedAt = :completed_at, updatedAt = :updated_at, "
+                             + ', '.join(f"{name} = :{name}" for name in summary_attributes),
             ExpressionAttributeNames={'#status': 'status'},
             ExpressionAttributeValues={
                 ':status': 'completed',
-                ':summary': summary,
+                ':cache_hit': cache_hit,
                 ':completed_at': datetime.utcnow().isoformat(),
-                ':updated_at': datetime.utcnow().isoformat()
+                ':updated_at': datetime.utcnow().isoformat(),
+                **{f":{name}": value for name, value in summary_attributes.items()}
             }
         )
         
@@ -165,6 +314,24 @@ def update_job_with_results(job_id: str, summary: str):
         logger.error(f"Error updating job with results: {str(e)}")
         raise
 
+def update_with_lease(job_id: str, lease: JobLease, **update):
+    """
+    Update the job record only while lease is held, and release it in the same write
+
+    Raises LeaseLost when another worker has claimed the job since.
+    """
+    if lease is not None:
+        update['UpdateExpression'] += " REMOVE leaseOwner, leaseExpiresAt"
+        owned = lease.owned()
+        update['ConditionExpression'] = owned['ConditionExpression']
+        update['ExpressionAttributeValues'] = {**update['ExpressionAttributeValues'], **owned['ExpressionAttributeValues']}
+    try:
+        jobs_table().update_item(Key={'jobId': job_id}, **update)
+    except ClientError as e:
+        if lease is not None and is_condition_failure(e):
+            raise LeaseLost(job_id) from e
+        raise
+
 def send_completion_event(job_id: str, status: str):
     """Send completion event to EventBridge"""
     try:
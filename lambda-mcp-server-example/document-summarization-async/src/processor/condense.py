@@ -0,0 +1,107 @@
+import re
+import logging
+from typing import List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from summarizer import SENTENCE_END, count_tokens
+
+logger = logging.getLogger()
+
+WORD = re.compile(r'[a-z0-9]+')
+
+# Relative weight of rare terms against similarity to the whole document
+INFORMATIVENESS_WEIGHT = 2.0
+# Favours opening sentences slightly, where documents tend to state their subject
+POSITION_WEIGHT = 0.1
+
+def available() -> bool:
+    return np is not None
+
+def score_sentences(sentences: List[str]) -> 'np.ndarray':
+    """
+    Score sentences by TF-IDF similarity to the document's centroid and by how rare
+    their terms are, so that both the main thread and its specifics are kept
+
+    The term-sentence matrix is kept as (sentence, term, count) triples, so scoring
+    is a handful of vectorized passes whatever the vocabulary size.
+    """
+    sentence_ids = []
+    term_ids = []
+    vocabulary = {}
+    for index, sentence in enumerate(sentences):
+        for word in WORD.findall(sentence.lower()):
+            sentence_ids.append(index)
+            term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    n = len(sentences)
+    if not term_ids:
+        return np.zeros(n)
+
+    # Unique (sentence, term) pairs with their counts
+    pairs = np.asarray(sentence_ids, dtype=np.int64) * len(vocabulary) + np.asarray(term_ids, dtype=np.int64)
+    pairs, counts = np.unique(pairs, return_counts=True)
+    rows, cols = np.divmod(pairs, len(vocabulary))
+
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(counts)) * idf[cols]
+
+    centroid = np.bincount(cols, weights=weights, minlength=len(vocabulary))
+    dots = np.bincount(rows, weights=weights * centroid[cols], minlength=n)
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+    centrality = dots / np.maximum(norms * np.linalg.norm(centroid), 1e-12)
+
+    # Mean IDF of a sentence's terms: names and figures rare in the document score high
+    term_counts = np.bincount(rows, weights=counts, minlength=n)
+    informativeness = np.bincount(rows, weights=idf[cols] * counts, minlength=n) / np.maximum(term_counts, 1)
+
+    return (_scaled(centrality) + INFORMATIVENESS_WEIGHT * _scaled(informativeness)
+            + POSITION_WEIGHT * (1 - np.arange(n) / n))
+
+def _scaled(values: 'np.ndarray') -> 'np.ndarray':
+    top = values.max()
+    return values / top if top > 0 else values
+
+def condense(text: str, token_budget: int, model: str) -> str:
+    """
+    Keep the highest scoring sentences of text, in order, within token_budget
+
+    Repeated sentences are kept once. Returns text unchanged when it already fits or
+    NumPy is not installed.
+    """
+    if np is None or count_tokens(text, model) <= token_budget:
+        return text
+
+    sentences = []
+    seen = set()
+    for sentence in SENTENCE_END.split(text):
+        normalized = ' '.join(WORD.findall(sentence.lower()))
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            sentences.append(sentence.strip())
+
+    scores = score_sentences(sentences)
+    lengths = np.fromiter((count_tokens(s, model) for s in sentences), dtype=np.int64, count=len(sentences))
+
+    # Best sentences first, skipping any that would overrun the budget
+    order = np.argsort(-scores, kind='stable')
+    fits = np.cumsum(lengths[order]) <= token_budget
+    chosen = order[fits] if fits.all() else _greedy(order, lengths, token_budget)
+    chosen.sort()
+
+    condensed = ' '.join(sentences[i] for i in chosen)
+    logger.info(f"Condensed document from {len(sentences)} to {len(chosen)} sentences")
+    return condensed
+
+def _greedy(order: 'np.ndarray', lengths: 'np.ndarray', token_budget: int) -> 'np.ndarray':
+    chosen = []
+    used = 0
+    for index in order:
+        if used + lengths[index] <= token_budget:
+            chosen.append(index)
+            used += lengths[index]
+    return np.asarray(chosen, dtype=np.int64)
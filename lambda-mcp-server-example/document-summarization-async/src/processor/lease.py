@@ -0,0 +1,96 @@
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+class LeaseLost(Exception):
+    """Another worker claimed the job after this one's lease expired"""
+
+class JobLease:
+    """
+    Exclusive claim of one worker on a job record while it processes the job
+
+    A job can be claimed when it is queued, or when it is processing under a lease that
+    expired, its worker having died or timed out. While held, a heartbeat thread pushes
+    the lease expiry forward, so a long LLM call keeps its claim and a duplicate
+    delivery of the same message finds the job taken. Writes that finish the job are
+    conditioned on the lease token, so a worker that lost its lease cannot overwrite the
+    results of the one that took over.
+    """
+
+    def __init__(self, table: Callable[[], Any], job_id: str, duration_seconds: int = 120):
+        # A table factory rather than a table: the heartbeat runs on its own thread
+        self.table = table
+        self.job_id = job_id
+        self.duration_seconds = duration_seconds
+        self.token = str(uuid.uuid4())
+        self._stopped = threading.Event()
+        self._heartbeat = None
+
+    def claim(self) -> bool:
+        """Take the job for this worker, returning False when it is not claimable"""
+        try:
+            self.table().update_item(
+                Key={'jobId': self.job_id},
+                UpdateExpression="SET #status = :processing, leaseOwner = :owner, leaseExpiresAt = :expires_at, updatedAt = :updated_at",
+                ConditionExpression="#status = :queued OR (#status = :processing AND (attribute_not_exists(leaseExpiresAt) OR leaseExpiresAt < :now))",
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':processing': 'processing',
+                    ':queued': 'queued',
+                    ':owner': self.token,
+                    ':expires_at': self._expiry(),
+                    ':now': int(time.time()),
+                    ':updated_at': datetime.utcnow().isoformat()
+                }
+            )
+            return True
+        except ClientError as e:
+            if is_condition_failure(e):
+                return False
+            raise
+
+    def owned(self) -> dict:
+        """Condition and values that make an update_item apply only while the lease is held"""
+        return {
+            'ConditionExpression': "leaseOwner = :owner",
+            'ExpressionAttributeValues': {':owner': self.token}
+        }
+
+    def __enter__(self):
+        self._heartbeat = threading.Thread(target=self._beat, name=f"lease-{self.job_id}", daemon=True)
+        self._heartbeat.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._heartbeat.join()
+
+    def _beat(self):
+        while not self._stopped.wait(self.duration_seconds / 3):
+            try:
+                self.table().update_item(
+                    Key={'jobId': self.job_id},
+                    UpdateExpression="SET leaseExpiresAt = :expires_at",
+                    ConditionExpression="leaseOwner = :owner",
+                    ExpressionAttributeValues={':owner': self.token, ':expires_at': self._expiry()}
+                )
+            except ClientError as e:
+                if is_condition_failure(e):
+                    logger.warning(f"Lost lease on job {self.job_id}")
+                    return
+                logger.error(f"Error extending lease on job {self.job_id}: {str(e)}")
+            except Exception as e:
+                logger.error(f"Error extending lease on job {self.job_id}: {str(e)}")
+
+    def _expiry(self) -> int:
+        return int(time.time()) + self.duration_seconds
+
+def is_condition_failure(error: ClientError) -> bool:
+    return error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
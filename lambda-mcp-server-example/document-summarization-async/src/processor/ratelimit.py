@@ -0,0 +1,189 @@
+import re
+import time
+import random
+import logging
+import threading
+from typing import Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger()
+
+# Durations of the x-ratelimit-reset-* headers, e.g. "1s", "6m0s" or "120ms"
+DURATION_PART = re.compile(r'([\d.]+)(ms|h|m|s)')
+DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+class RateLimitTimeout(Exception):
+    """The budget did not free up within the limiter's maximum wait"""
+
+class InMemoryRateLimitStore:
+    """Window counters of a single process, for tests and local runs"""
+
+    def __init__(self):
+        self.windows: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, key: str, tokens: int, request_limit: int, token_limit: int, expires_at: int) -> bool:
+        with self.lock:
+            window = self.windows.setdefault(key, {'requests': 0, 'tokens': 0})
+            # The first request of a window always goes, however many tokens it needs
+            if window['requests'] and (window['requests'] + 1 > request_limit
+                                       or window['tokens'] + tokens > token_limit):
+                return False
+            window['requests'] += 1
+            window['tokens'] += tokens
+            return True
+
+    def adjust(self, key: str, tokens: int):
+        with self.lock:
+            if key in self.windows:
+                self.windows[key]['tokens'] += tokens
+
+class DynamoDBRateLimitStore:
+    """
+    Window counters shared by every processor instance, in a DynamoDB table
+
+    A reservation is one conditional update that adds to the window's request and
+    token counters only if both stay within their limits, so concurrent callers can
+    never overspend a window between them. Takes a DynamoDB client rather than a
+    table resource, as clients are safe to share between threads.
+    """
+
+    def __init__(self, dynamodb_client, table_name: str):
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+
+    def reserve(self, key: str, tokens: int, request_limit: int, token_limit: int, expires_at: int) -> bool:
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={'limiterKey': {'S': key}},
+                UpdateExpression="ADD requestCount :one, tokenCount :tokens SET expiresAt = if_not_exists(expiresAt, :expires_at)",
+                ConditionExpression="attribute_not_exists(requestCount) OR (requestCount <= :request_room AND tokenCount <= :token_room)",
+                ExpressionAttributeValues={
+                    ':one': {'N': '1'},
+                    ':tokens': {'N': str(tokens)},
+                    ':expires_at': {'N': str(expires_at)},
+                    ':request_room': {'N': str(request_limit - 1)},
+                    ':token_room': {'N': str(token_limit - tokens)}
+                }
+            )
+            return True
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            return False
+        except Exception as e:
+            # Don't stall summaries on the limiter; the provider still enforces its limits
+            logger.error(f"Error reserving rate limit budget: {str(e)}")
+            return True
+
+    def adjust(self, key: str, tokens: int):
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={'limiterKey': {'S': key}},
+                UpdateExpression="ADD tokenCount :tokens",
+                ConditionExpression="attribute_exists(limiterKey)",
+                ExpressionAttributeValues={':tokens': {'N': str(tokens)}}
+            )
+        except Exception as e:
+            logger.warning(f"Error adjusting rate limit budget: {str(e)}")
+
+class RateLimiter:
+    """
+    Requests per minute and tokens per minute budgets for calls to one provider
+
+    Budgets are spent in windows of window_seconds, each holding its share of the
+    per-minute limits; short windows keep bursts at a window boundary small. A caller
+    over budget waits for a later window, backing off with jitter so that waiting
+    instances don't all retry at the same instant. The limits start from the configured
+    values and follow the provider's x-ratelimit-* response headers from then on.
+    """
+
+    def __init__(self,
+                 store,
+                 name: str,
+                 requests_per_minute: int,
+                 tokens_per_minute: int,
+                 window_seconds: int = 10,
+                 headroom: float = 0.9,
+                 max_wait: float = 300):
+        self.store = store
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self.headroom = headroom
+        self.max_wait = max_wait
+        # Set when the provider reports its budget spent, by us or anyone else on the key
+        self.paused_until = 0.0
+
+    def acquire(self, tokens: int) -> str:
+        """
+        Wait until a window has room for one request of tokens and reserve it
+
+        Returns the key of the window the reservation was made in, for settle().
+        """
+        started = time.time()
+        attempt = 0
+        while True:
+            now = time.time()
+            if now >= self.paused_until:
+                window = int(now // self.window_seconds)
+                key = f"{self.name}#{window}"
+                request_limit, token_limit = self._window_limits()
+                expires_at = (window + 1) * self.window_seconds + 3600
+                if self.store.reserve(key, tokens, request_limit, token_limit, expires_at):
+                    return key
+                wait = (window + 1) * self.window_seconds - now
+            else:
+                wait = self.paused_until - now
+
+            attempt += 1
+            # Spread retries over a growing share of the next window
+            wait += random.uniform(0, min(self.window_seconds, 0.25 * 2 ** attempt))
+            if time.time() + wait - started > self.max_wait:
+                raise RateLimitTimeout(f"No rate limit budget for {tokens} tokens within {self.max_wait}s")
+            logger.info(f"Rate limit budget spent, waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def settle(self, key: str, reserved_tokens: int, used_tokens: int):
+        """Return the unused part of a reservation, or charge what it ran over"""
+        if used_tokens != reserved_tokens:
+            self.store.adjust(key, used_tokens - reserved_tokens)
+
+    def update(self, headers: Mapping[str, str]):
+        """Follow the limits, and any exhausted budget, the provider reports"""
+        limit_requests = _number(headers.get('x-ratelimit-limit-requests'))
+        limit_tokens = _number(headers.get('x-ratelimit-limit-tokens'))
+        if limit_requests:
+            self.requests_per_minute = int(limit_requests)
+        if limit_tokens:
+            self.tokens_per_minute = int(limit_tokens)
+
+        for budget in ('requests', 'tokens'):
+            remaining = _number(headers.get(f"x-ratelimit-remaining-{budget}"))
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{budget}"))
+            if remaining is not None and remaining < 1 and reset:
+                self.pause(reset)
+
+        retry_after = _number(headers.get('retry-after'))
+        if retry_after:
+            self.pause(retry_after)
+
+    def pause(self, seconds: float):
+        """Hold every caller of this instance for seconds"""
+        self.paused_until = max(self.paused_until, time.time() + seconds)
+
+    def _window_limits(self) -> Tuple[int, int]:
+        share = self.headroom * self.window_seconds / 60
+        return max(1, int(self.requests_per_minute * share)), max(1, int(self.tokens_per_minute * share))
+
+def parse_duration(value: Optional[str]) -> float:
+    """Seconds in a duration like "1m30s" or "250ms", 0 when missing or malformed"""
+    if not value:
+        return 0.0
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in DURATION_PART.findall(value))
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
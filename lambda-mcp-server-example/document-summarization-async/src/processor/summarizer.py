@@ -0,0 +1,232 @@
+import json
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger()
+
+# Sends chat messages to the LLM with a completion token limit, returning the reply text
+Complete = Callable[[List[Dict[str, str]], int], str]
+
+SYSTEM_PROMPT = "You are a helpful assistant that creates concise, accurate summaries of documents."
+
+LENGTH_INSTRUCTIONS = {
+    'short': '2-3 sentences',
+    'medium': '1-2 paragraphs',
+    'long': '3-4 paragraphs'
+}
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+
+def count_tokens(text: str, model: str) -> int:
+    """Tokens in text for the model, estimated at four characters a token without tiktoken"""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding('cl100k_base')
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def chunk_text(text: str, chunk_tokens: int, overlap_tokens: int, model: str) -> List[str]:
+    """
+    Split text into chunks of at most chunk_tokens, on sentence boundaries where possible
+
+    Each chunk starts with the last overlap_tokens worth of sentences of the previous
+    one, so that statements spanning a boundary keep their context.
+    """
+    sentences = [s for s in SENTENCE_END.split(text) if s.strip()]
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for sentence in sentences:
+        tokens = count_tokens(sentence, model)
+        if tokens > chunk_tokens:
+            # A sentence longer than a chunk is split on characters
+            step = max(1, len(sentence) * chunk_tokens // tokens)
+            pieces = [sentence[i:i + step] for i in range(0, len(sentence), step)]
+        else:
+            pieces = [sentence]
+
+        for piece in pieces:
+            piece_tokens = count_tokens(piece, model) if len(pieces) > 1 else tokens
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append(' '.join(current))
+                # Carry the tail of this chunk into the next
+                overlap: List[str] = []
+                overlap_size = 0
+                for previous in reversed(current):
+                    size = count_tokens(previous, model)
+                    if overlap_size + size > overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_size += size
+                current, current_tokens = overlap, overlap_size
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+class S3CheckpointStore:
+    """Intermediate summaries of a job kept in S3, so that a retried job resumes"""
+
+    def __init__(self, s3_client, bucket: str, prefix: str):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/') + '/'
+
+    def load(self) -> Dict[str, str]:
+        """Every checkpoint saved under the prefix, by name"""
+        checkpoints = {}
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', []):
+                body = self.s3.get_object(Bucket=self.bucket, Key=item['Key'])['Body'].read()
+                checkpoints[item['Key'][len(self.prefix):]] = json.loads(body)['summary']
+        return checkpoints
+
+    def save(self, name: str, summary: str):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + name,
+            Body=json.dumps({'summary': summary}),
+            ContentType='application/json'
+        )
+
+    def clear(self):
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            keys = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if keys:
+                self.s3.delete_objects(Bucket=self.bucket, Delete={'Objects': keys, 'Quiet': True})
+
+class MapReduceSummarizer:
+    """
+    Summarizes documents of any length within the model's context window
+
+    Documents that fit are summarized in one call. Longer ones are split into
+    overlapping chunks that are summarized concurrently (map); the chunk summaries are
+    then merged (reduce), in groups that fit the context, level after level until one
+    summary remains. Every intermediate summary is checkpointed when a store is given.
+    """
+
+    def __init__(self,
+                 complete: Complete,
+                 model: str,
+                 context_tokens: int = 16000,
+                 chunk_tokens: int = 6000,
+                 overlap_tokens: int = 200,
+                 partial_summary_tokens: int = 400,
+                 final_summary_tokens: int = 500,
+                 concurrency: int = 4):
+        self.complete = complete
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.partial_summary_tokens = partial_summary_tokens
+        self.final_summary_tokens = final_summary_tokens
+        self.concurrency = concurrency
+        # Room for the instructions and the reply
+        self.input_tokens = context_tokens - final_summary_tokens - 200
+
+    def summarize(self, document: str, summary_length: str, checkpoints: Optional[S3CheckpointStore] = None) -> str:
+        length_instruction = LENGTH_INSTRUCTIONS.get(summary_length, '1-2 paragraphs')
+        if count_tokens(document, self.model) <= self.input_tokens:
+            return self._final(document, length_instruction)
+
+        # Checkpoints only apply to the same chunking of the same document
+        saved = checkpoints.load() if checkpoints else {}
+        run_id = hashlib.sha256(
+            f"{self.model}:{self.chunk_tokens}:{self.overlap_tokens}:{self.partial_summary_tokens}".encode('utf-8')
+        ).hexdigest()[:12]
+
+        chunks = chunk_text(document, self.chunk_tokens, self.overlap_tokens, self.model)
+        logger.info(f"Summarizing {len(chunks)} chunks")
+        partials = self._map(
+            chunks, saved, checkpoints, f"{run_id}/map",
+            lambda chunk: self._partial(
+                "Summarize this section of a longer document, keeping every key point, "
+                "name, number and conclusion:", chunk)
+        )
+
+        level = 1
+        while count_tokens('\n\n'.join(partials), self.model) > self.input_tokens:
+            groups = self._group(partials)
+            logger.info(f"Reducing {len(partials)} partial summaries in {len(groups)} groups")
+            partials = self._map(
+                groups, saved, checkpoints, f"{run_id}/reduce-{level}",
+                lambda group: self._partial(
+                    "Combine these summaries of consecutive sections of a document into one "
+                    "summary, keeping every key point:", group)
+            )
+            level += 1
+
+        summary = self._final('\n\n'.join(partials), length_instruction, partial=True)
+        if checkpoints:
+            try:
+                checkpoints.clear()
+            except Exception as e:
+                logger.error(f"Error clearing checkpoints: {str(e)}")
+        return summary
+
+    def _map(self, texts: List[str], saved: Dict[str, str], checkpoints: Optional[S3CheckpointStore],
+             prefix: str, summarize: Callable[[str], str]) -> List[str]:
+        def run(index: int) -> str:
+            name = f"{prefix}/{index:05d}-{hashlib.sha256(texts[index].encode('utf-8')).hexdigest()[:12]}.json"
+            if name in saved:
+                return saved[name]
+            summary = summarize(texts[index])
+            if checkpoints:
+                checkpoints.save(name, summary)
+            return summary
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(texts)))) as pool:
+            return list(pool.map(run, range(len(texts))))
+
+    def _group(self, partials: List[str]) -> List[str]:
+        """Consecutive partial summaries joined into groups that each fit the input budget"""
+        groups = []
+        current: List[str] = []
+        current_tokens = 0
+        for partial in partials:
+            tokens = count_tokens(partial, self.model)
+            if current and current_tokens + tokens > self.input_tokens:
+                groups.append('\n\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(partial)
+            current_tokens += tokens
+        if current:
+            groups.append('\n\n'.join(current))
+        if len(groups) == len(partials) and len(groups) > 1:
+            # Every summary fills the budget alone; pair them up so the reduce converges
+            groups = ['\n\n'.join(partials[i:i + 2]) for i in range(0, len(partials), 2)]
+        return groups
+
+    def _partial(self, instruction: str, text: str) -> str:
+        return self.complete([
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"{instruction}\n\n{text}"}
+        ], self.partial_summary_tokens)
+
+    def _final(self, text: str, length_instruction: str, partial: bool = False) -> str:
+        source = "these summaries of the sections of a document" if partial else "the following document"
+        prompt = f"""
+        Please summarize {source} in {length_instruction}.
+        Focus on the key points and main ideas:
+
+        {text}
+        """
+        return self.complete([
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ], self.final_summary_tokens)
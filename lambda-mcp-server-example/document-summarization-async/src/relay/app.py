@@ -0,0 +1,75 @@
+import json
+import boto3
+import os
+import logging
+from boto3.dynamodb.types import TypeDeserializer
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+sqs = boto3.client('sqs')
+deserializer = TypeDeserializer()
+
+# SendMessageBatch takes at most 10 messages
+SQS_BATCH_SIZE = 10
+
+def lambda_handler(event, context):
+    """
+    Relay newly queued jobs from the JobsTable stream to the processing queue
+
+    The job record is the outbox: writing it with status 'queued' is all an upload
+    does, and this function delivers the message. Records whose message could not be
+    sent are reported as batch item failures, so the stream retries from there.
+    """
+    pending = []
+    for record in event['Records']:
+        new_image = record['dynamodb'].get('NewImage', {})
+        old_image = record['dynamodb'].get('OldImage', {})
+
+        # Queued on insert, or once a direct upload completed; jobs put back to queued
+        # for a retry are still in flight on the processing queue
+        if new_image.get('status', {}).get('S') != 'queued':
+            continue
+        if old_image and old_image.get('status', {}).get('S') != 'uploading':
+            continue
+
+        job = {key: deserializer.deserialize(value) for key, value in new_image.items()}
+        message = {
+            'jobId': job['jobId'],
+            's3Key': job['s3Key'],
+            'documentType': job['documentType'],
+            'summaryLength': job['summaryLength']
+        }
+        # Hashed by the upload for inline documents, saving the processor a pass
+        if 'contentHash' in job:
+            message['contentHash'] = job['contentHash']
+        pending.append((record['dynamodb']['SequenceNumber'], message))
+
+    failures = []
+    for start in range(0, len(pending), SQS_BATCH_SIZE):
+        batch = pending[start:start + SQS_BATCH_SIZE]
+        failures.extend(send_batch(batch))
+
+    if pending:
+        logger.info(f"Relayed {len(pending) - len(failures)} of {len(pending)} queued jobs")
+
+    return {'batchItemFailures': [{'itemIdentifier': sequence_number} for sequence_number in failures]}
+
+def send_batch(batch):
+    """Send up to 10 job messages, returning the sequence numbers of those that failed"""
+    try:
+        response = sqs.send_message_batch(
+            QueueUrl=os.environ['PROCESSING_QUEUE'],
+            Entries=[
+                {'Id': str(index), 'MessageBody': json.dumps(message)}
+                for index, (_, message) in enumerate(batch)
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error sending job messages: {str(e)}")
+        return [sequence_number for sequence_number, _ in batch]
+
+    failed = response.get('Failed', [])
+    for failure in failed:
+        logger.error(f"Error sending job message: {failure.get('Code')} {failure.get('Message')}")
+    return [batch[int(failure['Id'])][0] for failure in failed]
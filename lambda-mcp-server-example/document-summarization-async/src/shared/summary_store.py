@@ -0,0 +1,131 @@
+"""
+Summaries shared by the upload and processor functions: the summary cache, keyed by
+document content, summary length and model, and the storage of long summaries in S3
+
+Deployed as SharedLayer, which puts this module on the path of both functions.
+"""
+import os
+import gzip
+import json
+import time
+import boto3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger()
+
+_local = threading.local()
+_s3 = None
+
+OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+SUMMARY_CACHE_TTL_DAYS = int(os.environ.get('SUMMARY_CACHE_TTL_DAYS', '30'))
+# Longer summaries are stored in S3, leaving a pointer, size and preview on the job
+SUMMARY_INLINE_BYTES = int(os.environ.get('SUMMARY_INLINE_BYTES', '1024'))
+SUMMARY_COMPRESSION = os.environ.get('SUMMARY_COMPRESSION', 'gzip')
+SUMMARY_PREVIEW_CHARS = 200
+SUMMARY_PREFIX = 'summaries/'
+
+def dynamodb():
+    """DynamoDB resource of the calling thread; boto3 resources are not thread safe"""
+    if not hasattr(_local, 'dynamodb'):
+        _local.dynamodb = boto3.resource('dynamodb')
+    return _local.dynamodb
+
+def s3():
+    """S3 client, created on first use; clients are safe to share between threads"""
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client('s3')
+    return _s3
+
+def store_summary(job_id: str, summary: str) -> Dict[str, Any]:
+    """
+    Job attributes holding a summary: the text itself when it is short, otherwise a
+    pointer to a copy in S3 with its size and a preview
+
+    Keeping long summaries out of the item keeps job reads, writes and stream records
+    small. The object key depends on the summary, so a retry writing the same summary
+    reuses it.
+    """
+    data = summary.encode('utf-8')
+    if len(data) <= SUMMARY_INLINE_BYTES:
+        return {'summary': summary}
+
+    key = f"{SUMMARY_PREFIX}{job_id}/{hashlib.sha256(data).hexdigest()[:16]}.txt"
+    encoding = 'gzip' if SUMMARY_COMPRESSION == 'gzip' else 'identity'
+    extra = {'ContentEncoding': 'gzip'} if encoding == 'gzip' else {}
+    s3().put_object(
+        Bucket=os.environ['DOCUMENTS_BUCKET'],
+        Key=key,
+        Body=gzip.compress(data) if encoding == 'gzip' else data,
+        ContentType='text/plain; charset=utf-8',
+        **extra
+    )
+    return {
+        'summaryKey': key,
+        'summarySize': len(data),
+        'summaryEncoding': encoding,
+        'summaryPreview': summary[:SUMMARY_PREVIEW_CHARS]
+    }
+
+def summary_cache_key(content_hash: str, summary_length: str, model: str = OPENAI_MODEL) -> str:
+    """Key of the summary cache entry for a document, summary length and model"""
+    return hashlib.sha256(f"{content_hash}:{summary_length}:{model}".encode('utf-8')).hexdigest()
+
+def get_cached_summary(content_hash: str, summary_length: str) -> Optional[Dict[str, Any]]:
+    """The cached summary for a document, or None on a miss or when there is no cache"""
+    table_name = os.environ.get('SUMMARY_CACHE_TABLE')
+    if not table_name:
+        return None
+    try:
+        cache_table = dynamodb().Table(table_name)
+        item = cache_table.get_item(Key={'cacheKey': summary_cache_key(content_hash, summary_length)}).get('Item')
+    except Exception as e:
+        # The cache only saves work; fall back to processing the document
+        logger.error(f"Error reading summary cache: {str(e)}")
+        return None
+    # Expired items linger until DynamoDB's TTL sweep removes them
+    if item and int(item.get('expiresAt', 0)) > time.time():
+        return item
+    return None
+
+def put_cached_summary(content_hash: str, summary_length: str, summary: str):
+    """Cache a summary for later uploads of the same document"""
+    table_name = os.environ.get('SUMMARY_CACHE_TABLE')
+    if not table_name:
+        return
+    try:
+        dynamodb().Table(table_name).put_item(
+            Item={
+                'cacheKey': summary_cache_key(content_hash, summary_length),
+                'contentHash': content_hash,
+                'summaryLength': summary_length,
+                'model': OPENAI_MODEL,
+                'summary': summary,
+                'createdAt': datetime.utcnow().isoformat(),
+                'expiresAt': int(time.time()) + SUMMARY_CACHE_TTL_DAYS * 86400
+            }
+        )
+    except Exception as e:
+        # Don't raise - the summary is already paid for and goes on the job either way
+        logger.error(f"Error writing summary cache: {str(e)}")
+
+def emit_cache_metric(hit: bool, stage: str):
+    """Record a summary cache lookup of a stage in CloudWatch through the embedded metric format"""
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': 'DocumentSummarization',
+                'Dimensions': [['Stage']],
+                'Metrics': [{'Name': 'SummaryCacheHit', 'Unit': 'Count'},
+                            {'Name': 'SummaryCacheMiss', 'Unit': 'Count'}]
+            }]
+        },
+        'Stage': stage,
+        'SummaryCacheHit': int(hit),
+        'SummaryCacheMiss': int(not hit)
+    }))
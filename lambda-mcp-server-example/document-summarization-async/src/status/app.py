@@ -1,17 +1,26 @@
 import json
 import boto3
 import os
+import gzip
 import logging
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource('dynamodb')
+# Presigned URLs must be SigV4 and use the bucket's regional endpoint
+s3 = boto3.client('s3', config=Config(signature_version='s3v4', s3={'addressing_style': 'virtual'}))
+
+SUMMARY_URL_EXPIRY_SECONDS = int(os.environ.get('SUMMARY_URL_EXPIRY', '3600'))
 
 def lambda_handler(event, context):
     """
     Get job status and results
+
+    Summaries stored in S3 are returned inline by default; with ?summary=url only a
+    presigned URL to them is, along with their size and a preview.
     """
     try:
         # Extract job ID from path parameters
@@ -47,10 +56,18 @@ def lambda_handler(event, context):
         
         # Add completion details if job is completed
         if job['status'] == 'completed':
-            response_data.update({
-                'summary': job.get('summary', ''),
-                'completedAt': job.get('completedAt', '')
-            })
+            response_data['completedAt'] = job.get('completedAt', '')
+            if 'summaryKey' in job:
+                query = event.get('queryStringParameters') or {}
+                response_data.update({
+                    'summarySize': int(job['summarySize']),
+                    'summaryPreview': job.get('summaryPreview', ''),
+                    'summaryUrl': summary_url(job['summaryKey'])
+                })
+                if query.get('summary') != 'url':
+                    response_data['summary'] = read_summary(job['summaryKey'], job.get('summaryEncoding'))
+            else:
+                response_data['summary'] = job.get('summary', '')
         
         # Add error details if job failed
         if job['status'] == 'failed':
@@ -80,4 +97,19 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json'},
             'body': json.dumps({'error': 'Internal server error'})
-        }
\ No newline at end of file
+        }
+
+def summary_url(s3_key: str) -> str:
+    """Presigned URL of a summary stored in S3; gzipped summaries are served with Content-Encoding: gzip"""
+    return s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': os.environ['DOCUMENTS_BUCKET'], 'Key': s3_key},
+        ExpiresIn=SUMMARY_URL_EXPIRY_SECONDS
+    )
+
+def read_summary(s3_key: str, encoding: str = None) -> str:
+    """Text of a summary stored in S3"""
+    data = s3.get_object(Bucket=os.environ['DOCUMENTS_BUCKET'], Key=s3_key)['Body'].read()
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    return data.decode('utf-8')
\ No newline at end of file
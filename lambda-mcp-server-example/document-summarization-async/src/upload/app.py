@@ -1,99 +1,353 @@
 import json
+import os
+import re
+import math
 import boto3
 import uuid
 import base64
+import binascii
+import hashlib
+import threading
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
 
+# From SharedLayer
+from summary_store import emit_cache_metric, get_cached_summary, store_summary
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client('s3')
+# Presigned URLs must be SigV4 and use the bucket's regional endpoint
+s3 = boto3.client('s3', config=Config(signature_version='s3v4', s3={'addressing_style': 'virtual'}))
 dynamodb = boto3.resource('dynamodb')
-sqs = boto3.client('sqs')
+
+# S3 multipart limits: parts of at least 5 MiB (except the last), at most 10,000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+DEFAULT_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', str(8 * 1024 * 1024)))
+MAX_DOCUMENT_SIZE = int(os.environ.get('MAX_DOCUMENT_SIZE', str(5 * 1024 * 1024 * 1024)))
+URL_EXPIRY_SECONDS = int(os.environ.get('UPLOAD_URL_EXPIRY', '3600'))
+# Parts of an inline document uploaded at once, which bounds the memory it takes
+UPLOAD_CONCURRENCY = int(os.environ.get('UPLOAD_CONCURRENCY', '4'))
+
+DOCUMENT_FIELD = re.compile(r'"document"\s*:\s*"')
+WHITESPACE = re.compile(r'\s')
+
+# Direct uploads land under their own prefix, whose completion triggers processing
+DIRECT_UPLOAD_PREFIX = 'uploads/'
 
 def lambda_handler(event, context):
+    """
+    Route upload requests: inline documents, direct-upload initiation and completion
+    """
+    resource = event.get('resource', '')
+    if resource == '/uploads':
+        return initiate_upload(event)
+    if resource == '/uploads/{jobId}/complete':
+        return complete_upload(event)
+    return inline_upload(event)
+
+def inline_upload(event):
+    """Accept a document inline in the request body and queue it for processing"""
     try:
-        # Parse request
-        body = json.loads(event['body'])
-        
-        # Extract document content and metadata
-        document_content = body.get('document')  # Base64 encoded or text
+        # Parse the metadata, leaving the document where it is in the raw body
+        body, document = parse_upload_body(event['body'])
+
+        # Extract document metadata
         document_type = body.get('type', 'text')  # text, pdf, docx
         summary_length = body.get('summary_length', 'medium')  # short, medium, long
-        
-        if not document_content:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'Document content is required'})
-            }
-        
+
+        if document is None:
+            return response(400, {'error': 'Document content is required'})
+
         # Generate job ID
         job_id = str(uuid.uuid4())
-        
+
         # Store document in S3
         bucket_name = os.environ['DOCUMENTS_BUCKET']
         s3_key = f"documents/{job_id}.{document_type}"
-        
+
         if document_type == 'text':
+            source, start, end = document
+            document_bytes = source[start:end].encode('utf-8')
+            content_hash = hashlib.sha256(document_bytes).hexdigest()
             s3.put_object(
                 Bucket=bucket_name,
                 Key=s3_key,
-                Body=document_content,
+                Body=document_bytes,
                 ContentType='text/plain'
             )
         else:
             # Assume base64 encoded for other types
-            document_bytes = base64.b64decode(document_content)
-            s3.put_object(
-                Bucket=bucket_name,
-                Key=s3_key,
-                Body=document_bytes,
-                ContentType=f'application/{document_type}'
+            content_hash = upload_base64(document, bucket_name, s3_key, f'application/{document_type}')
+
+        # A document summarized before completes without a queue hop or an LLM call
+        cached = get_cached_summary(content_hash, summary_length)
+        emit_cache_metric(cached is not None, 'upload')
+        if cached is not None:
+            now = datetime.utcnow().isoformat()
+            create_job(
+                job_id, 'completed', document_type, summary_length, s3_key,
+                contentHash=content_hash, cacheHit=True, completedAt=now,
+                **store_summary(job_id, cached['summary'])
             )
-        
-        # Create job record in DynamoDB
-        jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
-        jobs_table.put_item(
-            Item={
+            logger.info(f"Document summary served from cache: {job_id}")
+            return response(200, {
                 'jobId': job_id,
-                'status': 'queued',
-                'documentType': document_type,
-                'summaryLength': summary_length,
-                's3Key': s3_key,
-                'createdAt': datetime.utcnow().isoformat(),
-                'updatedAt': datetime.utcnow().isoformat()
-            }
-        )
-        
-        # Send message to processing queue
-        sqs.send_message(
-            QueueUrl=os.environ['PROCESSING_QUEUE'],
-            MessageBody=json.dumps({
-                'jobId': job_id,
-                's3Key': s3_key,
-                'documentType': document_type,
-                'summaryLength': summary_length
+                'status': 'completed',
+                'summary': cached['summary'],
+                'message': 'Summary served from cache'
             })
-        )
-        
+
+        # Create job record in DynamoDB; the stream relay queues it for processing
+        create_job(job_id, 'queued', document_type, summary_length, s3_key, contentHash=content_hash)
+
         logger.info(f"Document upload queued successfully: {job_id}")
-        
-        return {
-            'statusCode': 202,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'jobId': job_id,
-                'status': 'queued',
-                'message': 'Document queued for processing'
-            })
-        }
-        
+
+        return response(202, {
+            'jobId': job_id,
+            'status': 'queued',
+            'message': 'Document queued for processing'
+        })
+
+    except binascii.Error:
+        return response(400, {'error': 'Document is not valid base64'})
     except Exception as e:
         logger.error(f"Error processing upload: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({'error': 'Internal server error'})
-        }
\ No newline at end of file
+        return response(500, {'error': 'Internal server error'})
+
+def parse_upload_body(raw_body: str):
+    """
+    Parse an inline upload request without copying the document out of the raw body
+
+    Returns the request fields and (source, start, end) where source[start:end] is the
+    document, or None when there is no document. Documents containing JSON escapes
+    fall back to a full parse.
+    """
+    match = DOCUMENT_FIELD.search(raw_body)
+    if match:
+        start = match.end()
+        end = raw_body.find('"', start)
+        if end > start and raw_body.find('\\', start, end) == -1:
+            try:
+                body = json.loads(raw_body[:start] + raw_body[end:])
+            except ValueError:
+                body = None
+            # An empty document here confirms the match was the top-level field
+            if isinstance(body, dict) and body.get('document') == '':
+                return body, (raw_body, start, end)
+
+    body = json.loads(raw_body)
+    document = body.get('document')
+    if not document or not isinstance(document, str):
+        return body, None
+    return body, (document, 0, len(document))
+
+def upload_base64(document, bucket_name: str, s3_key: str, content_type: str):
+    """
+    Decode a base64 document into S3 one part at a time, returning its SHA-256
+
+    Parts upload concurrently, at most UPLOAD_CONCURRENCY of them decoded at once, so
+    the memory used stays the same whatever the document size.
+    """
+    source, start, end = document
+    if WHITESPACE.search(source, start, end):
+        # Line-wrapped base64; drop the line breaks so that chunks stay aligned
+        source = WHITESPACE.sub('', source[start:end])
+        start, end = 0, len(source)
+    # Encoded characters per part; a multiple of 4 so that every chunk decodes on its own
+    chunk = DEFAULT_PART_SIZE // 3 * 4
+
+    if end - start <= chunk:
+        data = base64.b64decode(source[start:end], validate=True)
+        s3.put_object(Bucket=bucket_name, Key=s3_key, Body=data, ContentType=content_type)
+        return hashlib.sha256(data).hexdigest()
+
+    upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=s3_key, ContentType=content_type)['UploadId']
+    slots = threading.BoundedSemaphore(UPLOAD_CONCURRENCY)
+    # Parts are decoded in order, so the digest covers the document as stored
+    digest = hashlib.sha256()
+
+    def upload_part(part_number: int, data: bytes) -> dict:
+        try:
+            part = s3.upload_part(
+                Bucket=bucket_name, Key=s3_key, UploadId=upload_id, PartNumber=part_number, Body=data
+            )
+            return {'PartNumber': part_number, 'ETag': part['ETag']}
+        finally:
+            slots.release()
+
+    try:
+        futures = []
+        with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+            for part_number, offset in enumerate(range(start, end, chunk), start=1):
+                # Wait for a part to finish before decoding another
+                slots.acquire()
+                if any(f.done() and f.exception() is not None for f in futures):
+                    slots.release()
+                    break
+                data = base64.b64decode(source[offset:min(offset + chunk, end)], validate=True)
+                digest.update(data)
+                futures.append(pool.submit(upload_part, part_number, data))
+                del data
+        parts = [future.result() for future in futures]
+
+        s3.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket_name, Key=s3_key, UploadId=upload_id)
+        raise
+    return digest.hexdigest()
+
+def initiate_upload(event):
+    """
+    Create a job and a multipart upload, returning presigned URLs for every part
+
+    The client PUTs each part straight to S3, then calls the complete endpoint with
+    the part ETags. The document never passes through API Gateway or Lambda.
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        document_type = body.get('type', 'text')
+        summary_length = body.get('summary_length', 'medium')
+        size = body.get('size')
+
+        if not isinstance(size, int) or size <= 0:
+            return response(400, {'error': 'Document size in bytes is required'})
+        if size > MAX_DOCUMENT_SIZE:
+            return response(413, {'error': f'Documents are limited to {MAX_DOCUMENT_SIZE} bytes'})
+
+        part_size = choose_part_size(size, body.get('part_size'))
+        part_count = math.ceil(size / part_size)
+
+        job_id = str(uuid.uuid4())
+        bucket_name = os.environ['DOCUMENTS_BUCKET']
+        s3_key = f"{DIRECT_UPLOAD_PREFIX}{job_id}.{document_type}"
+        content_type = 'text/plain' if document_type == 'text' else f'application/{document_type}'
+
+        upload = s3.create_multipart_upload(Bucket=bucket_name, Key=s3_key, ContentType=content_type)
+        upload_id = upload['UploadId']
+
+        # Queued once the S3 event for the completed upload marks it so
+        create_job(job_id, 'uploading', document_type, summary_length, s3_key, uploadId=upload_id, size=size)
+
+        parts = [
+            {
+                'partNumber': part_number,
+                'url': s3.generate_presigned_url(
+                    'upload_part',
+                    Params={'Bucket': bucket_name, 'Key': s3_key, 'UploadId': upload_id, 'PartNumber': part_number},
+                    ExpiresIn=URL_EXPIRY_SECONDS
+                )
+            }
+            for part_number in range(1, part_count + 1)
+        ]
+
+        logger.info(f"Direct upload initiated: {job_id} ({part_count} parts of {part_size} bytes)")
+
+        return response(201, {
+            'jobId': job_id,
+            'status': 'uploading',
+            'uploadId': upload_id,
+            'partSize': part_size,
+            'parts': parts,
+            'expiresIn': URL_EXPIRY_SECONDS,
+            'completeUrl': f"/uploads/{job_id}/complete"
+        })
+
+    except Exception as e:
+        logger.error(f"Error initiating upload: {str(e)}")
+        return response(500, {'error': 'Internal server error'})
+
+def complete_upload(event):
+    """Complete a job's multipart upload from the part numbers and ETags the client collected"""
+    try:
+        job_id = (event.get('pathParameters') or {}).get('jobId')
+        body = json.loads(event.get('body') or '{}')
+        parts = body.get('parts') or []
+
+        jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
+        job = jobs_table.get_item(Key={'jobId': job_id}).get('Item') if job_id else None
+        if not job or 'uploadId' not in job:
+            return response(404, {'error': 'Upload not found'})
+        if job['status'] != 'uploading':
+            return response(409, {'error': f"Upload already completed, job is {job['status']}"})
+        if not parts:
+            return response(400, {'error': 'Part ETags are required'})
+        completed_parts = parse_parts(parts)
+        if completed_parts is None:
+            return response(400, {'error': 'Each part needs a partNumber from 1 to 10000 and an etag'})
+
+        s3.complete_multipart_upload(
+            Bucket=os.environ['DOCUMENTS_BUCKET'],
+            Key=job['s3Key'],
+            UploadId=job['uploadId'],
+            MultipartUpload={'Parts': completed_parts}
+        )
+
+        logger.info(f"Direct upload completed: {job_id}")
+
+        # Processing is queued by the S3 event for the completed object
+        return response(202, {
+            'jobId': job_id,
+            'status': 'uploading',
+            'message': 'Upload complete, document will be queued for processing'
+        })
+
+    except s3.exceptions.NoSuchUpload:
+        return response(404, {'error': 'Upload not found or expired'})
+    except Exception as e:
+        logger.error(f"Error completing upload: {str(e)}")
+        return response(500, {'error': 'Internal server error'})
+
+def parse_parts(parts):
+    """Parts of a completion request as S3 expects them, sorted, or None when any is malformed"""
+    if not isinstance(parts, list):
+        return None
+    completed = []
+    for part in parts:
+        if not isinstance(part, dict):
+            return None
+        number, etag = part.get('partNumber'), part.get('etag')
+        if isinstance(number, bool) or not isinstance(number, (int, str)) or not str(number).isdigit():
+            return None
+        if not 1 <= int(number) <= MAX_PARTS or not isinstance(etag, str) or not etag:
+            return None
+        completed.append({'PartNumber': int(number), 'ETag': etag})
+    return sorted(completed, key=lambda part: part['PartNumber'])
+
+def choose_part_size(size: int, requested=None) -> int:
+    """Part size honouring the client's request and S3's part size and count limits"""
+    part_size = requested if isinstance(requested, int) and requested > 0 else DEFAULT_PART_SIZE
+    part_size = max(part_size, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+    return min(part_size, max(size, MIN_PART_SIZE))
+
+def create_job(job_id: str, status: str, document_type: str, summary_length: str, s3_key: str, **attributes):
+    """Create the job record in DynamoDB"""
+    jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
+    now = datetime.utcnow().isoformat()
+    jobs_table.put_item(
+        Item={
+            'jobId': job_id,
+            'status': status,
+            'documentType': document_type,
+            'summaryLength': summary_length,
+            's3Key': s3_key,
+            'createdAt': now,
+            'updatedAt': now,
+            **attributes
+        }
+    )
+
+def response(status_code: int, body: dict) -> dict:
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(body)
+    }
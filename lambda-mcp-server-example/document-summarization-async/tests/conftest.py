@@ -0,0 +1,11 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules are imported the way Lambda loads them: the processor's from its code
+# directory, the shared ones from SharedLayer
+for directory in ('src/processor', 'src/shared'):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
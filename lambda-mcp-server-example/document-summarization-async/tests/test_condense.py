@@ -0,0 +1,59 @@
+import pytest
+
+import condense
+import summarizer
+
+MODEL = 'gpt-3.5-turbo'
+
+pytestmark = pytest.mark.skipif(not condense.available(), reason='NumPy is not installed')
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    monkeypatch.setattr(summarizer, 'tiktoken', None)
+
+DOCUMENT = ' '.join([
+    'The river project will supply water to the valley.',
+    'The valley farms depend on the river water for irrigation.',
+    'Construction of the river dam starts in spring.',
+    'The water authority approved the river project budget.',
+    'Engineer Okonkwo estimated costs at 42 million dollars.',
+    'The river water supply will reach the valley farms next year.',
+] * 3)
+
+def test_fitting_text_is_unchanged():
+    assert condense.condense('Short text. Still short.', 100, MODEL) == 'Short text. Still short.'
+
+def test_condensed_text_fits_the_budget_in_document_order():
+    condensed = condense.condense(DOCUMENT, 40, MODEL)
+
+    assert summarizer.count_tokens(condensed, MODEL) <= 40 + 5
+    sentences = condensed.split('. ')
+    positions = [DOCUMENT.index(sentence.rstrip('.')) for sentence in sentences]
+    assert positions == sorted(positions)
+
+def test_repeated_sentences_are_kept_once():
+    condensed = condense.condense(DOCUMENT, 200, MODEL)
+
+    assert condensed.count('Construction of the river dam starts in spring.') == 1
+
+def test_rare_specifics_are_kept():
+    # The only sentence with a name and a figure scores high on informativeness
+    assert '42 million' in condense.condense(DOCUMENT, 40, MODEL)
+
+def test_central_sentences_outscore_off_topic_ones(monkeypatch):
+    monkeypatch.setattr(condense, 'INFORMATIVENESS_WEIGHT', 0.0)
+    scores = condense.score_sentences([
+        'The river water reaches the valley.',
+        'River water irrigates valley farms.',
+        'Lunch was served at noon.',
+    ])
+
+    assert scores[0] > scores[2] and scores[1] > scores[2]
+
+def test_sentences_without_words_score_zero():
+    assert list(condense.score_sentences(['...', '!!'])) == [0, 0]
+
+def test_without_numpy_text_is_unchanged(monkeypatch):
+    monkeypatch.setattr(condense, 'np', None)
+
+    assert condense.condense(DOCUMENT, 40, MODEL) == DOCUMENT
@@ -0,0 +1,68 @@
+import importlib.util
+import os
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_enqueue():
+    # Every function's module is app.py; load the enqueue's under its own name
+    spec = importlib.util.spec_from_file_location('enqueue_app', os.path.join(ROOT, 'src/enqueue/app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+enqueue = load_enqueue()
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    monkeypatch.setenv('JOBS_TABLE', 'jobs')
+    with Stubber(enqueue.dynamodb.meta.client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+def s3_event(*keys):
+    return {'Records': [{'s3': {'object': {'key': key}}} for key in keys]}
+
+def queue_update(job_id: str, s3_key: str):
+    """Parameters of the conditional uploading to queued update of a job"""
+    return {
+        'TableName': 'jobs',
+        'Key': {'jobId': job_id},
+        'UpdateExpression': "SET #status = :queued, updatedAt = :updated_at, uploadedAt = :updated_at",
+        'ConditionExpression': "#status = :uploading AND s3Key = :s3_key",
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {
+            ':queued': 'queued',
+            ':uploading': 'uploading',
+            ':s3_key': s3_key,
+            ':updated_at': ANY,
+        },
+    }
+
+def test_uploaded_job_is_queued(dynamodb):
+    dynamodb.add_response('update_item', {}, queue_update('job-1', 'uploads/job-1.pdf'))
+
+    enqueue.lambda_handler(s3_event('uploads/job-1.pdf'), None)
+
+def test_object_keys_are_url_decoded(dynamodb):
+    dynamodb.add_response('update_item', {}, queue_update('my job', 'uploads/my job.text'))
+
+    enqueue.lambda_handler(s3_event('uploads/my+job.text'), None)
+
+def test_duplicate_event_is_ignored(dynamodb):
+    # S3 delivers the event again after the first one queued the job
+    dynamodb.add_response('update_item', {}, queue_update('job-1', 'uploads/job-1.pdf'))
+    dynamodb.add_client_error('update_item', 'ConditionalCheckFailedException',
+                              expected_params=queue_update('job-1', 'uploads/job-1.pdf'))
+    dynamodb.add_response('update_item', {}, queue_update('job-2', 'uploads/job-2.pdf'))
+
+    enqueue.lambda_handler(s3_event('uploads/job-1.pdf'), None)
+    enqueue.lambda_handler(s3_event('uploads/job-1.pdf', 'uploads/job-2.pdf'), None)
+
+def test_other_errors_fail_the_invocation(dynamodb):
+    dynamodb.add_client_error('update_item', 'ProvisionedThroughputExceededException')
+
+    with pytest.raises(enqueue.dynamodb.meta.client.exceptions.ProvisionedThroughputExceededException):
+        enqueue.lambda_handler(s3_event('uploads/job-1.pdf'), None)
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+import lease
+from lease import JobLease, is_condition_failure
+
+def client_error(code: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'UpdateItem')
+
+class FakeJobsTable:
+    """Records update_item calls, failing them with the queued errors first"""
+
+    def __init__(self, *errors):
+        self.calls = []
+        self.errors = list(errors)
+        self.lock = threading.Lock()
+
+    def update_item(self, **kwargs):
+        with self.lock:
+            self.calls.append(kwargs)
+            if self.errors:
+                raise self.errors.pop(0)
+        return {}
+
+@pytest.fixture
+def now(monkeypatch):
+    monkeypatch.setattr(lease.time, 'time', lambda: 1000.0)
+
+def test_claim_takes_a_queued_or_expired_job(now):
+    table = FakeJobsTable()
+    job_lease = JobLease(lambda: table, 'job-1', duration_seconds=120)
+
+    assert job_lease.claim()
+
+    [call] = table.calls
+    assert call['Key'] == {'jobId': 'job-1'}
+    assert 'leaseExpiresAt < :now' in call['ConditionExpression']
+    values = call['ExpressionAttributeValues']
+    assert (values[':owner'], values[':expires_at'], values[':now']) == (job_lease.token, 1120, 1000)
+
+def test_claim_of_a_taken_job_fails(now):
+    table = FakeJobsTable(client_error('ConditionalCheckFailedException'))
+
+    assert not JobLease(lambda: table, 'job-1').claim()
+
+def test_claim_raises_other_errors(now):
+    table = FakeJobsTable(client_error('ProvisionedThroughputExceededException'))
+
+    with pytest.raises(ClientError):
+        JobLease(lambda: table, 'job-1').claim()
+
+def test_owned_conditions_writes_on_the_token():
+    job_lease = JobLease(lambda: None, 'job-1')
+
+    assert job_lease.owned() == {
+        'ConditionExpression': 'leaseOwner = :owner',
+        'ExpressionAttributeValues': {':owner': job_lease.token},
+    }
+
+def test_leases_have_distinct_tokens():
+    assert JobLease(lambda: None, 'job-1').token != JobLease(lambda: None, 'job-1').token
+
+def test_heartbeat_extends_the_lease_while_held():
+    table = FakeJobsTable()
+    job_lease = JobLease(lambda: table, 'job-1', duration_seconds=0.03)
+
+    with job_lease:
+        threading.Event().wait(0.1)
+    beats = len(table.calls)
+    threading.Event().wait(0.05)
+
+    assert beats >= 2
+    assert len(table.calls) == beats
+    assert all(call['ConditionExpression'] == 'leaseOwner = :owner' for call in table.calls)
+    assert all(call['ExpressionAttributeValues'][':owner'] == job_lease.token for call in table.calls)
+
+def test_heartbeat_stops_once_the_lease_is_lost():
+    table = FakeJobsTable(client_error('ConditionalCheckFailedException'))
+
+    with JobLease(lambda: table, 'job-1', duration_seconds=0.03):
+        threading.Event().wait(0.1)
+
+    assert len(table.calls) == 1
+
+def test_heartbeat_survives_transient_errors():
+    table = FakeJobsTable(client_error('InternalServerError'), RuntimeError('connection reset'))
+
+    with JobLease(lambda: table, 'job-1', duration_seconds=0.03):
+        threading.Event().wait(0.12)
+
+    assert len(table.calls) >= 3
+
+def test_is_condition_failure():
+    assert is_condition_failure(client_error('ConditionalCheckFailedException'))
+    assert not is_condition_failure(client_error('ThrottlingException'))
@@ -0,0 +1,162 @@
+import importlib.util
+import io
+import json
+import os
+
+import pytest
+
+from test_lease import FakeJobsTable, client_error
+
+pytest.importorskip('openai', reason='the processor needs openai')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_processor():
+    # Every function's module is app.py; load the processor's under its own name
+    spec = importlib.util.spec_from_file_location('processor_app', os.path.join(ROOT, 'src/processor/app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+processor = load_processor()
+
+class JobsTable(FakeJobsTable):
+    """Jobs table where claims of taken jobs, and writes to lost ones, fail their condition"""
+
+    def __init__(self, *errors):
+        super().__init__(*errors)
+        self.taken = set()
+        self.lost = set()
+
+    def update_item(self, **kwargs):
+        job_id = kwargs['Key']['jobId']
+        if job_id in (self.taken if is_claim(kwargs) else self.lost):
+            with self.lock:
+                self.calls.append(kwargs)
+            raise client_error('ConditionalCheckFailedException')
+        return super().update_item(**kwargs)
+
+    def updates(self, job_id):
+        """Updates of a job other than its claim"""
+        return [call for call in self.calls if call['Key']['jobId'] == job_id and not is_claim(call)]
+
+def is_claim(call) -> bool:
+    return ':queued' in call.get('ExpressionAttributeValues', {})
+
+class FakeS3:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.documents[Key].encode('utf-8'))}
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Processor wired to a fake table, bucket and LLM; jobs whose document contains 'fail' raise"""
+    monkeypatch.setenv('DOCUMENTS_BUCKET', 'documents')
+    table = JobsTable()
+    events = []
+    summarized = []
+
+    def summarize(document_content, summary_length, job_id=None):
+        summarized.append(job_id)
+        if 'fail' in document_content:
+            raise RuntimeError('LLM unavailable')
+        return f"summary of {document_content}"
+
+    monkeypatch.setattr(processor, 'jobs_table', lambda: table)
+    monkeypatch.setattr(processor, 's3', FakeS3({f"documents/{job}.txt": job for job in ('job-1', 'job-2', 'fail-3')}))
+    monkeypatch.setattr(processor, 'summarize_with_openai', summarize)
+    monkeypatch.setattr(processor, 'get_cached_summary', lambda content_hash, summary_length: None)
+    monkeypatch.setattr(processor, 'put_cached_summary', lambda content_hash, summary_length, summary: None)
+    monkeypatch.setattr(processor, 'emit_cache_metric', lambda hit, source: None)
+    monkeypatch.setattr(processor, 'store_summary', lambda job_id, summary: {'summary': summary})
+    monkeypatch.setattr(processor, 'send_completion_event', lambda job_id, status: events.append((job_id, status)))
+    return table, events, summarized
+
+def sqs_record(job_id: str, receive_count: int = 1):
+    return {
+        'messageId': f"message-{job_id}",
+        'attributes': {'ApproximateReceiveCount': str(receive_count)},
+        'body': json.dumps({
+            'jobId': job_id,
+            's3Key': f"documents/{job_id}.txt",
+            'documentType': 'text',
+            'summaryLength': 'short',
+        }),
+    }
+
+def test_only_failed_messages_are_reported(worker):
+    table, events, _ = worker
+
+    response = processor.lambda_handler({'Records': [sqs_record('job-1'), sqs_record('fail-3'), sqs_record('job-2')]}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'message-fail-3'}]}
+    assert sorted(events) == [('job-1', 'completed'), ('job-2', 'completed')]
+    [completed] = table.updates('job-1')
+    assert completed['ExpressionAttributeValues'][':status'] == 'completed'
+    assert completed['ExpressionAttributeValues'][':summary'] == 'summary of job-1'
+
+def test_failed_job_is_requeued_before_the_last_delivery(worker):
+    table, events, _ = worker
+
+    assert not processor.process_record(sqs_record('fail-3', receive_count=processor.MAX_RECEIVE_COUNT - 1))
+
+    [requeued] = table.updates('fail-3')
+    assert requeued['ExpressionAttributeValues'][':status'] == 'queued'
+    assert requeued['ExpressionAttributeValues'][':error'] == 'LLM unavailable'
+    # Released under the lease, so the next delivery can claim it
+    assert requeued['ConditionExpression'] == 'leaseOwner = :owner'
+    assert 'REMOVE leaseOwner, leaseExpiresAt' in requeued['UpdateExpression']
+    assert events == []
+
+@pytest.mark.parametrize('receive_count', [3, 4])
+def test_failed_job_is_marked_failed_on_the_last_delivery(worker, monkeypatch, receive_count):
+    table, events, _ = worker
+    monkeypatch.setattr(processor, 'MAX_RECEIVE_COUNT', 3)
+
+    assert not processor.process_record(sqs_record('fail-3', receive_count=receive_count))
+
+    [failed] = table.updates('fail-3')
+    assert failed['ExpressionAttributeValues'][':status'] == 'failed'
+    assert events == [('fail-3', 'failed')]
+
+@pytest.mark.parametrize('receive_count, status', [(2, None), (3, 'failed')])
+def test_job_whose_claim_errors_is_failed_on_the_last_delivery(worker, monkeypatch, receive_count, status):
+    table, events, summarized = worker
+    monkeypatch.setattr(processor, 'MAX_RECEIVE_COUNT', 3)
+    table.errors = [client_error('ProvisionedThroughputExceededException')]
+
+    assert not processor.process_record(sqs_record('job-1', receive_count=receive_count))
+
+    assert summarized == []
+    updates = table.updates('job-1')
+    if status is None:
+        # Left queued for the next delivery
+        assert updates == []
+        assert events == []
+    else:
+        [failed] = updates
+        assert failed['ExpressionAttributeValues'][':status'] == status
+        assert 'ConditionExpression' not in failed
+        assert events == [('job-1', 'failed')]
+
+def test_duplicate_delivery_is_acknowledged(worker):
+    table, events, summarized = worker
+    table.taken.add('job-1')
+
+    response = processor.lambda_handler({'Records': [sqs_record('job-1')]}, None)
+
+    assert response == {'batchItemFailures': []}
+    assert summarized == []
+    assert table.updates('job-1') == []
+    assert events == []
+
+def test_lost_lease_drops_the_result(worker):
+    table, events, _ = worker
+    # Claimed, but taken over by another worker before the results are written
+    table.lost.add('job-1')
+
+    assert processor.process_record(sqs_record('job-1'))
+    assert len(table.updates('job-1')) == 1
+    assert events == []
@@ -0,0 +1,144 @@
+import boto3
+import pytest
+from botocore.stub import ANY, Stubber
+
+import ratelimit
+from ratelimit import DynamoDBRateLimitStore, InMemoryRateLimitStore, RateLimiter, RateLimitTimeout, parse_duration
+
+class FakeClock:
+    """Stands in for time.time and time.sleep, sleeping by moving the clock"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, 'time', clock.time)
+    monkeypatch.setattr(ratelimit.time, 'sleep', clock.sleep)
+    monkeypatch.setattr(ratelimit.random, 'uniform', lambda low, high: 0.0)
+    return clock
+
+def limiter(store=None, **kwargs) -> RateLimiter:
+    # 60 requests and 6000 tokens a minute: 9 requests and 900 tokens per 10 s window
+    options = {'requests_per_minute': 60, 'tokens_per_minute': 6000, **kwargs}
+    return RateLimiter(store or InMemoryRateLimitStore(), 'model', **options)
+
+@pytest.mark.parametrize('value, seconds', [
+    ('1s', 1), ('6m0s', 360), ('120ms', 0.12), ('1h2m3.5s', 3723.5), ('', 0), (None, 0), ('soon', 0)
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+def test_window_limits_take_their_share_with_headroom():
+    assert limiter()._window_limits() == (9, 900)
+    assert limiter(requests_per_minute=1, tokens_per_minute=1)._window_limits() == (1, 1)
+
+def test_requests_within_budget_do_not_wait(clock):
+    rate = limiter()
+
+    keys = {rate.acquire(100) for _ in range(9)}
+
+    assert keys == {'model#100'}
+    assert clock.sleeps == []
+
+def test_request_over_budget_waits_for_the_next_window(clock):
+    rate = limiter()
+    for _ in range(9):
+        rate.acquire(10)
+
+    assert rate.acquire(10) == 'model#101'
+    assert clock.now == pytest.approx(1010)
+
+def test_token_budget_is_enforced(clock):
+    rate = limiter()
+    rate.acquire(800)
+
+    assert rate.acquire(200) == 'model#101'
+
+def test_first_request_of_a_window_goes_whatever_its_size(clock):
+    assert limiter().acquire(10_000) == 'model#100'
+
+def test_settle_returns_unused_tokens(clock):
+    store = InMemoryRateLimitStore()
+    rate = limiter(store)
+    key = rate.acquire(800)
+
+    rate.settle(key, 800, 300)
+
+    assert store.windows[key]['tokens'] == 300
+    assert rate.acquire(500) == key
+
+def test_gives_up_after_max_wait(clock):
+    rate = limiter(max_wait=5)
+    rate.acquire(900)
+
+    with pytest.raises(RateLimitTimeout):
+        rate.acquire(900)
+
+def test_update_follows_provider_limits():
+    rate = limiter()
+
+    rate.update({'x-ratelimit-limit-requests': '120', 'x-ratelimit-limit-tokens': '12000'})
+
+    assert (rate.requests_per_minute, rate.tokens_per_minute) == (120, 12000)
+
+def test_exhausted_budget_pauses_until_reset(clock):
+    rate = limiter()
+
+    rate.update({'x-ratelimit-remaining-tokens': '0', 'x-ratelimit-reset-tokens': '6s'})
+    rate.acquire(10)
+
+    assert clock.now == pytest.approx(1006)
+
+def test_retry_after_pauses(clock):
+    rate = limiter()
+
+    rate.update({'retry-after': '3'})
+
+    assert rate.paused_until == pytest.approx(1003)
+
+@pytest.fixture
+def dynamodb():
+    client = boto3.client('dynamodb', region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+    with Stubber(client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
+
+def test_dynamodb_store_reserves_with_a_conditional_update(dynamodb):
+    client, stubber = dynamodb
+    stubber.add_response('update_item', {}, {
+        'TableName': 'limits',
+        'Key': {'limiterKey': {'S': 'model#100'}},
+        'UpdateExpression': ANY,
+        'ConditionExpression': ANY,
+        'ExpressionAttributeValues': {
+            ':one': {'N': '1'},
+            ':tokens': {'N': '100'},
+            ':expires_at': {'N': '4610'},
+            ':request_room': {'N': '8'},
+            ':token_room': {'N': '800'},
+        },
+    })
+
+    assert DynamoDBRateLimitStore(client, 'limits').reserve('model#100', 100, 9, 900, 4610)
+
+def test_dynamodb_store_reports_a_full_window(dynamodb):
+    client, stubber = dynamodb
+    stubber.add_client_error('update_item', 'ConditionalCheckFailedException')
+
+    assert not DynamoDBRateLimitStore(client, 'limits').reserve('model#100', 100, 9, 900, 4610)
+
+def test_dynamodb_store_fails_open(dynamodb):
+    client, stubber = dynamodb
+    stubber.add_client_error('update_item', 'ProvisionedThroughputExceededException')
+
+    assert DynamoDBRateLimitStore(client, 'limits').reserve('model#100', 100, 9, 900, 4610)
@@ -0,0 +1,111 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_relay():
+    # Every function's module is app.py; load the relay's under its own name
+    spec = importlib.util.spec_from_file_location('relay_app', os.path.join(ROOT, 'src/relay/app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+relay = load_relay()
+
+class FakeSQS:
+    def __init__(self, failed_ids=(), error=None):
+        self.batches = []
+        self.failed_ids = failed_ids
+        self.error = error
+
+    def send_message_batch(self, QueueUrl, Entries):
+        if self.error:
+            raise self.error
+        self.batches.append([json.loads(entry['MessageBody']) for entry in Entries])
+        return {'Failed': [{'Id': id, 'Code': 'InternalError', 'Message': 'retry'} for id in self.failed_ids
+                           if int(id) < len(Entries)]}
+
+@pytest.fixture
+def sqs(monkeypatch):
+    monkeypatch.setenv('PROCESSING_QUEUE', 'https://sqs.example/queue')
+    def install(**kwargs):
+        client = FakeSQS(**kwargs)
+        monkeypatch.setattr(relay, 'sqs', client)
+        return client
+    return install
+
+def job_image(job_id: str, status: str, **extra):
+    image = {
+        'jobId': {'S': job_id},
+        'status': {'S': status},
+        's3Key': {'S': f"documents/{job_id}.text"},
+        'documentType': {'S': 'text'},
+        'summaryLength': {'S': 'short'},
+    }
+    image.update({key: {'S': value} for key, value in extra.items()})
+    return image
+
+def stream_record(sequence: int, new_image, old_image=None):
+    change = {'SequenceNumber': str(sequence), 'NewImage': new_image}
+    if old_image:
+        change['OldImage'] = old_image
+    return {'dynamodb': change}
+
+def test_relays_inserted_and_uploaded_jobs(sqs):
+    client = sqs()
+    event = {'Records': [
+        stream_record(1, job_image('inserted', 'queued', contentHash='abc')),
+        stream_record(2, job_image('uploaded', 'queued'), job_image('uploaded', 'uploading')),
+    ]}
+
+    assert relay.lambda_handler(event, None) == {'batchItemFailures': []}
+    [batch] = client.batches
+    assert batch == [
+        {'jobId': 'inserted', 's3Key': 'documents/inserted.text', 'documentType': 'text',
+         'summaryLength': 'short', 'contentHash': 'abc'},
+        {'jobId': 'uploaded', 's3Key': 'documents/uploaded.text', 'documentType': 'text',
+         'summaryLength': 'short'},
+    ]
+
+@pytest.mark.parametrize('new_status, old_status', [
+    ('processing', 'queued'),
+    ('completed', 'processing'),
+    # Put back to queued for a retry, its message is still on the queue
+    ('queued', 'processing'),
+    ('uploading', None),
+])
+def test_other_changes_are_not_relayed(sqs, new_status, old_status):
+    client = sqs()
+    old_image = job_image('job', old_status) if old_status else None
+
+    relay.lambda_handler({'Records': [stream_record(1, job_image('job', new_status), old_image)]}, None)
+
+    assert client.batches == []
+
+def test_sends_in_batches_of_ten(sqs):
+    client = sqs()
+    records = [stream_record(i, job_image(f"job-{i}", 'queued')) for i in range(23)]
+
+    relay.lambda_handler({'Records': records}, None)
+
+    assert [len(batch) for batch in client.batches] == [10, 10, 3]
+
+def test_failed_messages_are_reported(sqs):
+    sqs(failed_ids=['1'])
+    records = [stream_record(i, job_image(f"job-{i}", 'queued')) for i in range(12)]
+
+    result = relay.lambda_handler({'Records': records}, None)
+
+    # Entry 1 of each batch failed
+    assert result == {'batchItemFailures': [{'itemIdentifier': '1'}, {'itemIdentifier': '11'}]}
+
+def test_a_failed_call_reports_the_whole_batch(sqs):
+    sqs(error=RuntimeError('throttled'))
+    records = [stream_record(i, job_image(f"job-{i}", 'queued')) for i in range(3)]
+
+    result = relay.lambda_handler({'Records': records}, None)
+
+    assert [failure['itemIdentifier'] for failure in result['batchItemFailures']] == ['0', '1', '2']
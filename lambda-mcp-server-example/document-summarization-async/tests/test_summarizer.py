@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+import summarizer
+from summarizer import MapReduceSummarizer, chunk_text, count_tokens
+
+MODEL = 'gpt-3.5-turbo'
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Four characters a token, whether or not tiktoken is installed
+    monkeypatch.setattr(summarizer, 'tiktoken', None)
+
+def sentences(count: int) -> list:
+    return [f"Sentence number {i:03d} says something." for i in range(count)]
+
+class FakeLLM:
+    """Replies with reply, or a short summary numbering the call, recording every prompt"""
+
+    def __init__(self, reply=None):
+        self.reply = reply
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def __call__(self, messages, max_tokens):
+        with self.lock:
+            self.prompts.append(messages[-1]['content'])
+            return self.reply or f"Summary {len(self.prompts)}."
+
+class DictCheckpoints:
+    def __init__(self, saved=None):
+        self.saved = dict(saved or {})
+        self.cleared = False
+
+    def load(self):
+        return dict(self.saved)
+
+    def save(self, name, summary):
+        self.saved[name] = summary
+
+    def clear(self):
+        self.cleared = True
+
+def test_count_tokens_estimate():
+    assert count_tokens('x' * 40, MODEL) == 11
+
+def test_chunk_text_respects_size_and_covers_the_text():
+    text = ' '.join(sentences(60))
+
+    chunks = chunk_text(text, chunk_tokens=50, overlap_tokens=12, model=MODEL)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk, MODEL) <= 51 for chunk in chunks)
+    for sentence in sentences(60):
+        assert any(sentence in chunk for chunk in chunks)
+
+def test_chunks_start_with_the_tail_of_the_previous_one():
+    chunks = chunk_text(' '.join(sentences(60)), chunk_tokens=50, overlap_tokens=12, model=MODEL)
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_sentence = previous.rsplit('. ', 1)[-1]
+        assert chunk.startswith(last_sentence.rstrip('.'))
+
+def test_chunk_text_without_overlap():
+    chunks = chunk_text(' '.join(sentences(60)), chunk_tokens=50, overlap_tokens=0, model=MODEL)
+
+    assert ' '.join(chunks) == ' '.join(sentences(60))
+
+def test_sentence_longer_than_a_chunk_is_split():
+    chunks = chunk_text('x' * 1000, chunk_tokens=50, overlap_tokens=0, model=MODEL)
+
+    assert ''.join(chunks) == 'x' * 1000
+    assert all(count_tokens(chunk, MODEL) <= 51 for chunk in chunks)
+
+def test_short_document_is_summarized_in_one_call():
+    llm = FakeLLM()
+
+    summary = MapReduceSummarizer(llm, MODEL, context_tokens=2000).summarize('A short document.', 'short')
+
+    assert summary == 'Summary 1.'
+    assert len(llm.prompts) == 1
+    assert '2-3 sentences' in llm.prompts[0]
+
+def test_long_document_is_mapped_then_reduced():
+    llm = FakeLLM()
+    document = ' '.join(sentences(200))
+    chunks = chunk_text(document, 200, 20, MODEL)
+
+    MapReduceSummarizer(llm, MODEL, context_tokens=1000, chunk_tokens=200, overlap_tokens=20).summarize(document, 'long')
+
+    map_prompts = [p for p in llm.prompts if p.startswith('Summarize this section')]
+    assert len(map_prompts) == len(chunks)
+    assert 'these summaries of the sections' in llm.prompts[-1]
+    assert '3-4 paragraphs' in llm.prompts[-1]
+
+def test_partials_over_the_context_are_reduced_in_levels():
+    # Partial summaries of 201 tokens against an input budget of 300: no two fit together,
+    # so every level pairs them up until one remains
+    llm = FakeLLM(reply='p' * 800)
+    document = ' '.join(sentences(100))
+    chunks = chunk_text(document, 200, 0, MODEL)
+
+    MapReduceSummarizer(llm, MODEL, context_tokens=1000, chunk_tokens=200, overlap_tokens=0).summarize(document, 'medium')
+
+    reduce_prompts = [p for p in llm.prompts if p.startswith('Combine these summaries')]
+    assert len(chunks) == 5
+    # 5 -> 3 -> 2 -> 1
+    assert len(reduce_prompts) == 3 + 2 + 1
+    assert 'these summaries of the sections' in llm.prompts[-1]
+
+def test_checkpoints_resume_a_retried_job():
+    document = ' '.join(sentences(200))
+    checkpoints = DictCheckpoints()
+    first = FakeLLM()
+    MapReduceSummarizer(first, MODEL, context_tokens=1000, chunk_tokens=200).summarize(document, 'short', checkpoints)
+    assert checkpoints.cleared
+
+    retry = FakeLLM()
+    MapReduceSummarizer(retry, MODEL, context_tokens=1000, chunk_tokens=200).summarize(
+        document, 'short', DictCheckpoints(checkpoints.saved)
+    )
+
+    # Only the final summary is asked for again
+    assert len(retry.prompts) == 1
+    assert len(first.prompts) > 1
+
+def test_checkpoints_of_another_chunking_are_ignored():
+    document = ' '.join(sentences(200))
+    checkpoints = DictCheckpoints()
+    MapReduceSummarizer(FakeLLM(), MODEL, context_tokens=1000, chunk_tokens=200).summarize(document, 'short', checkpoints)
+
+    retry = FakeLLM()
+    MapReduceSummarizer(retry, MODEL, context_tokens=1000, chunk_tokens=150).summarize(
+        document, 'short', DictCheckpoints(checkpoints.saved)
+    )
+
+    assert len(retry.prompts) > 1
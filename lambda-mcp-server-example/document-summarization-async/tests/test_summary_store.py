@@ -0,0 +1,101 @@
+import gzip
+import json
+import time
+
+import pytest
+
+import summary_store
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = {'Body': Body, **kwargs}
+
+class FakeTable:
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key):
+        item = self.items.get(Key['cacheKey'])
+        return {'Item': item} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item['cacheKey']] = Item
+
+class FakeDynamoDB:
+    def __init__(self):
+        self.table = FakeTable()
+
+    def Table(self, name):
+        return self.table
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3()
+    monkeypatch.setattr(summary_store, '_s3', client)
+    monkeypatch.setenv('DOCUMENTS_BUCKET', 'documents')
+    return client
+
+@pytest.fixture
+def cache(monkeypatch):
+    resource = FakeDynamoDB()
+    monkeypatch.setattr(summary_store, 'dynamodb', lambda: resource)
+    monkeypatch.setenv('SUMMARY_CACHE_TABLE', 'cache')
+    return resource.table
+
+def test_short_summary_stays_inline(s3):
+    assert summary_store.store_summary('job-1', 'Short.') == {'summary': 'Short.'}
+    assert s3.objects == {}
+
+def test_long_summary_is_offloaded_compressed(s3, monkeypatch):
+    monkeypatch.setattr(summary_store, 'SUMMARY_INLINE_BYTES', 10)
+    summary = 'é' * 300
+
+    attributes = summary_store.store_summary('job-1', summary)
+
+    stored = s3.objects[attributes['summaryKey']]
+    assert attributes['summaryKey'].startswith('summaries/job-1/')
+    assert attributes['summarySize'] == 600
+    assert attributes['summaryEncoding'] == 'gzip'
+    assert attributes['summaryPreview'] == summary[:summary_store.SUMMARY_PREVIEW_CHARS]
+    assert gzip.decompress(stored['Body']).decode('utf-8') == summary
+    assert stored['ContentEncoding'] == 'gzip'
+    # The same summary written again reuses the object
+    assert summary_store.store_summary('job-1', summary)['summaryKey'] == attributes['summaryKey']
+
+def test_cache_key_covers_length_and_model():
+    key = summary_store.summary_cache_key('hash', 'short', 'model-a')
+    assert key == summary_store.summary_cache_key('hash', 'short', 'model-a')
+    assert key != summary_store.summary_cache_key('hash', 'long', 'model-a')
+    assert key != summary_store.summary_cache_key('hash', 'short', 'model-b')
+
+def test_cached_summary_round_trip(cache):
+    assert summary_store.get_cached_summary('hash', 'short') is None
+
+    summary_store.put_cached_summary('hash', 'short', 'A summary.')
+
+    [item] = cache.items.values()
+    assert item['expiresAt'] == pytest.approx(time.time() + summary_store.SUMMARY_CACHE_TTL_DAYS * 86400, abs=5)
+    assert summary_store.get_cached_summary('hash', 'short')['summary'] == 'A summary.'
+    assert summary_store.get_cached_summary('hash', 'long') is None
+
+def test_expired_entries_are_misses(cache):
+    summary_store.put_cached_summary('hash', 'short', 'A summary.')
+    for item in cache.items.values():
+        item['expiresAt'] = int(time.time()) - 1
+
+    assert summary_store.get_cached_summary('hash', 'short') is None
+
+def test_no_cache_table(monkeypatch):
+    monkeypatch.delenv('SUMMARY_CACHE_TABLE', raising=False)
+    assert summary_store.get_cached_summary('hash', 'short') is None
+
+def test_emit_cache_metric(capsys):
+    summary_store.emit_cache_metric(True, 'upload')
+
+    metric = json.loads(capsys.readouterr().out)
+    assert metric['Stage'] == 'upload'
+    assert (metric['SummaryCacheHit'], metric['SummaryCacheMiss']) == (1, 0)
+    assert metric['_aws']['Timestamp'] == pytest.approx(time.time() * 1000, abs=5000)
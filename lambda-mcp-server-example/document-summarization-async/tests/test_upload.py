@@ -0,0 +1,311 @@
+import base64
+import binascii
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_upload():
+    # Every function's module is app.py; load the upload's under its own name
+    spec = importlib.util.spec_from_file_location('upload_app', os.path.join(ROOT, 'src/upload/app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+upload = load_upload()
+
+# Decoded bytes per part in these tests; 8 base64 characters encode a part
+PART_SIZE = 6
+
+class NoSuchUpload(Exception):
+    pass
+
+class FakeS3:
+    """Records objects and multipart uploads like S3, failing parts listed in fail_parts"""
+
+    exceptions = SimpleNamespace(NoSuchUpload=NoSuchUpload)
+
+    def __init__(self, fail_parts=()):
+        self.objects = {}
+        self.parts = {}
+        self.completed = None
+        self.aborted = []
+        self.fail_parts = set(fail_parts)
+        self.expired = False
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        return {'UploadId': 'upload-1'}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber in self.fail_parts:
+            raise RuntimeError(f"part {PartNumber} failed")
+        with self.lock:
+            self.parts[PartNumber] = Body
+        return {'ETag': f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        if self.expired:
+            raise NoSuchUpload(UploadId)
+        self.completed = MultipartUpload['Parts']
+        # Parts of direct uploads go straight to S3 through the presigned URLs
+        self.objects[Key] = b''.join(self.parts.get(part['PartNumber'], b'') for part in MultipartUpload['Parts'])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        return f"https://s3.example/{Params['Key']}?uploadId={Params['UploadId']}&partNumber={Params['PartNumber']}"
+
+class FakeJobsTable:
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item):
+        self.items[Item['jobId']] = Item
+
+    def get_item(self, Key):
+        item = self.items.get(Key['jobId'])
+        return {'Item': item} if item else {}
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3()
+    monkeypatch.setattr(upload, 's3', client)
+    monkeypatch.setattr(upload, 'DEFAULT_PART_SIZE', PART_SIZE)
+    return client
+
+@pytest.fixture
+def jobs(monkeypatch):
+    monkeypatch.setenv('DOCUMENTS_BUCKET', 'bucket')
+    monkeypatch.setenv('JOBS_TABLE', 'jobs')
+    table = FakeJobsTable()
+    monkeypatch.setattr(upload, 'dynamodb', SimpleNamespace(Table=lambda name: table))
+    # Small S3 limits, so the tests can reason in bytes
+    monkeypatch.setattr(upload, 'MIN_PART_SIZE', 10)
+    monkeypatch.setattr(upload, 'MAX_PARTS', 4)
+    monkeypatch.setattr(upload, 'MAX_DOCUMENT_SIZE', 1000)
+    return table
+
+def encoded(data: bytes):
+    text = base64.b64encode(data).decode('ascii')
+    return text, 0, len(text)
+
+def document_of(raw_body: str):
+    _, document = upload.parse_upload_body(raw_body)
+    source, start, end = document
+    return source[start:end]
+
+def test_document_is_sliced_from_the_raw_body():
+    raw_body = '{"document": "aGVsbG8=", "type": "pdf"}'
+
+    body, (source, start, end) = upload.parse_upload_body(raw_body)
+
+    assert source is raw_body
+    assert raw_body[start:end] == 'aGVsbG8='
+    assert body == {'document': '', 'type': 'pdf'}
+
+def test_whitespace_around_the_document_field():
+    raw_body = '{\n  "type" : "text",\n  "document"  :\t"Some text." ,\n  "summary_length": "short"\n}'
+
+    body, _ = upload.parse_upload_body(raw_body)
+
+    assert document_of(raw_body) == 'Some text.'
+    assert body['summary_length'] == 'short'
+
+def test_escaped_document_falls_back_to_a_full_parse():
+    raw_body = json.dumps({'document': 'He said "hi"\nthen left \\ quietly', 'type': 'text'})
+
+    assert document_of(raw_body) == 'He said "hi"\nthen left \\ quietly'
+
+def test_nested_document_field_is_not_taken_for_the_document():
+    raw_body = '{"meta": {"document": "nested"}, "document": "top level"}'
+
+    assert document_of(raw_body) == 'top level'
+
+def test_missing_document():
+    assert upload.parse_upload_body('{"type": "text"}') == ({'type': 'text'}, None)
+    assert upload.parse_upload_body('{"document": ""}')[1] is None
+
+def test_document_of_exactly_one_part_is_put_whole(s3):
+    data = b'abcdef'
+
+    digest = upload.upload_base64(encoded(data), 'bucket', 'doc.pdf', 'application/pdf')
+
+    assert s3.objects == {'doc.pdf': data}
+    assert s3.parts == {}
+    assert digest == hashlib.sha256(data).hexdigest()
+
+def test_document_one_byte_past_a_part_boundary(s3):
+    data = b'abcdefg'
+
+    digest = upload.upload_base64(encoded(data), 'bucket', 'doc.pdf', 'application/pdf')
+
+    assert s3.parts == {1: b'abcdef', 2: b'g'}
+    assert s3.objects['doc.pdf'] == data
+    assert digest == hashlib.sha256(data).hexdigest()
+
+def test_parts_join_back_in_part_number_order(s3, monkeypatch):
+    monkeypatch.setattr(upload, 'UPLOAD_CONCURRENCY', 3)
+    data = bytes(range(256)) * 3
+
+    digest = upload.upload_base64(encoded(data), 'bucket', 'doc.pdf', 'application/pdf')
+
+    assert [part['PartNumber'] for part in s3.completed] == list(range(1, 129))
+    assert [part['ETag'] for part in s3.completed[:2]] == ['"etag-1"', '"etag-2"']
+    assert s3.objects['doc.pdf'] == data
+    assert digest == hashlib.sha256(data).hexdigest()
+
+def test_line_wrapped_base64_keeps_parts_aligned(s3):
+    data = bytes(range(100))
+    text = base64.encodebytes(data).decode('ascii')
+
+    upload.upload_base64((text, 0, len(text)), 'bucket', 'doc.pdf', 'application/pdf')
+
+    assert s3.objects['doc.pdf'] == data
+
+def test_invalid_base64_aborts_the_multipart_upload(s3):
+    text, start, end = encoded(b'abcdefghijkl')
+    text = text[:10] + '!!' + text[12:]
+
+    with pytest.raises(binascii.Error):
+        upload.upload_base64((text, start, end), 'bucket', 'doc.pdf', 'application/pdf')
+
+    assert s3.aborted == ['upload-1']
+    assert s3.completed is None
+
+def test_failed_part_aborts_the_multipart_upload(s3):
+    s3.fail_parts = {2}
+
+    with pytest.raises(RuntimeError):
+        upload.upload_base64(encoded(bytes(100)), 'bucket', 'doc.pdf', 'application/pdf')
+
+    assert s3.aborted == ['upload-1']
+    assert s3.completed is None
+
+def test_invalid_base64_upload_is_rejected(s3, monkeypatch):
+    monkeypatch.setenv('DOCUMENTS_BUCKET', 'bucket')
+    event = {'body': json.dumps({'document': 'not base64!', 'type': 'pdf'})}
+
+    result = upload.lambda_handler(event, None)
+
+    assert result['statusCode'] == 400
+    assert s3.objects == {}
+
+def initiate(**body):
+    result = upload.lambda_handler({'resource': '/uploads', 'body': json.dumps(body)}, None)
+    return result['statusCode'], json.loads(result['body'])
+
+def test_initiate_creates_a_job_and_a_url_per_part(s3, jobs):
+    status, body = initiate(size=25, part_size=10, type='pdf', summary_length='short')
+
+    assert status == 201
+    assert (body['status'], body['uploadId'], body['partSize']) == ('uploading', 'upload-1', 10)
+    assert [part['partNumber'] for part in body['parts']] == [1, 2, 3]
+    assert body['parts'][2]['url'].endswith('uploadId=upload-1&partNumber=3')
+    assert body['completeUrl'] == f"/uploads/{body['jobId']}/complete"
+    job = jobs.items[body['jobId']]
+    assert (job['status'], job['uploadId'], job['size']) == ('uploading', 'upload-1', 25)
+    assert job['s3Key'] == f"uploads/{body['jobId']}.pdf"
+
+@pytest.mark.parametrize('size, part_size, expected_part_size, expected_parts', [
+    # S3's minimum part size
+    (25, 1, 10, 3),
+    # At most MAX_PARTS parts, however small the requested part size
+    (100, 10, 25, 4),
+    (101, None, 26, 4),
+    # No part larger than the document
+    (7, 50, 10, 1),
+    (30, 50, 30, 1),
+])
+def test_initiate_keeps_parts_within_s3_limits(s3, jobs, size, part_size, expected_part_size, expected_parts):
+    status, body = initiate(size=size, part_size=part_size)
+
+    assert status == 201
+    assert body['partSize'] == expected_part_size
+    assert len(body['parts']) == expected_parts
+
+@pytest.mark.parametrize('size', [None, 0, -1, '25', 2.5])
+def test_initiate_requires_a_size(s3, jobs, size):
+    status, body = initiate(size=size)
+
+    assert status == 400
+    assert jobs.items == {}
+
+def test_initiate_rejects_documents_over_the_size_limit(s3, jobs):
+    status, body = initiate(size=1001)
+
+    assert status == 413
+    assert body == {'error': 'Documents are limited to 1000 bytes'}
+    assert jobs.items == {}
+
+def complete(job_id, parts):
+    event = {'resource': '/uploads/{jobId}/complete', 'pathParameters': {'jobId': job_id},
+             'body': json.dumps({'parts': parts})}
+    result = upload.lambda_handler(event, None)
+    return result['statusCode'], json.loads(result['body'])
+
+@pytest.fixture
+def started(s3, jobs):
+    _, body = initiate(size=25, part_size=10)
+    return body['jobId']
+
+def test_complete_sends_the_parts_in_order(s3, jobs, started):
+    status, body = complete(started, [{'partNumber': 2, 'etag': '"b"'}, {'partNumber': 1, 'etag': '"a"'}])
+
+    assert status == 202
+    assert body['status'] == 'uploading'
+    assert s3.completed == [{'PartNumber': 1, 'ETag': '"a"'}, {'PartNumber': 2, 'ETag': '"b"'}]
+    # Queued by the S3 event of the completed object, not by this request
+    assert jobs.items[started]['status'] == 'uploading'
+
+def test_complete_of_an_unknown_job(s3, jobs):
+    assert complete('missing', [{'partNumber': 1, 'etag': 'a'}])[0] == 404
+    assert s3.completed is None
+
+def test_complete_of_a_queued_job_conflicts(s3, jobs, started):
+    jobs.items[started]['status'] = 'queued'
+
+    assert complete(started, [{'partNumber': 1, 'etag': 'a'}])[0] == 409
+    assert s3.completed is None
+
+@pytest.mark.parametrize('parts', [[], [{'partNumber': 1}]])
+def test_complete_rejects_missing_or_malformed_parts(s3, jobs, started, parts):
+    assert complete(started, parts)[0] == 400
+    assert s3.completed is None
+
+def test_complete_of_an_expired_upload(s3, jobs, started):
+    s3.expired = True
+
+    assert complete(started, [{'partNumber': 1, 'etag': 'a'}]) == (404, {'error': 'Upload not found or expired'})
+
+def test_parse_parts_sorts_and_converts_part_numbers(jobs):
+    parts = [{'partNumber': '3', 'etag': 'c'}, {'partNumber': 1, 'etag': 'a', 'size': 10}]
+
+    assert upload.parse_parts(parts) == [{'PartNumber': 1, 'ETag': 'a'}, {'PartNumber': 3, 'ETag': 'c'}]
+
+@pytest.mark.parametrize('parts', [
+    {'partNumber': 1, 'etag': 'a'},
+    ['a'],
+    [{'partNumber': 0, 'etag': 'a'}],
+    [{'partNumber': 5, 'etag': 'a'}],
+    [{'partNumber': -1, 'etag': 'a'}],
+    [{'partNumber': True, 'etag': 'a'}],
+    [{'partNumber': 1.0, 'etag': 'a'}],
+    [{'partNumber': '1a', 'etag': 'a'}],
+    [{'etag': 'a'}],
+    [{'partNumber': 1}],
+    [{'partNumber': 1, 'etag': ''}],
+    [{'partNumber': 1, 'etag': 7}],
+])
+def test_parse_parts_rejects_malformed_parts(jobs, parts):
+    assert upload.parse_parts(parts) is None
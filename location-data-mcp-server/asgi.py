@@ -0,0 +1,29 @@
+"""
+Container entry point: the location data MCP server as an ASGI app
+
+    uvicorn asgi:app --workers 4 --host 0.0.0.0 --port 8080
+    python asgi.py --workers 4
+
+Each worker process imports main (tools, session store, shared HTTP client) once and
+primes it at startup. Authorization comes from the same config as the Lambda handler.
+"""
+import argparse
+import os
+
+import uvicorn
+
+from main import mcp
+from mcp_asgi import create_app
+from mcp_auth_decorator import authorization_from_config
+
+app = create_app(mcp, auth=authorization_from_config("/mcp/location-data/auth-config"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the location data MCP server over HTTP")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Worker processes, one event loop and thread pool each")
+    args = parser.parse_args()
+    uvicorn.run("asgi:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
@@ -1,18 +1,58 @@
+import os
+import threading
+
 import boto3
 
+from mcp_metrics import timed
+from mcp_priming import registry
+from ttl_cache import TTLCache
+
+# Parameters are re-read after this many seconds so rotations are picked up
+_secrets = TTLCache(max_entries=64, ttl=float(os.environ.get("SECRET_CACHE_TTL", "300")))
+_client = None
+_client_lock = threading.Lock()
+
+
+def ssm_client():
+    """Systems Manager client shared by every call, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Parameter Store is part of Systems Manager
+                _client = boto3.session.Session().client(service_name='ssm', region_name="eu-west-1")
+    return _client
+
+
+def reset_ssm_client():
+    """Replace the shared client, e.g. when its connections did not survive a snapshot"""
+    global _client
+    with _client_lock:
+        _client = None
+    ssm_client()
+
+
+def set_ssm_client(client):
+    """Serve Parameter Store calls from the given client, e.g. a local stand-in"""
+    global _client
+    with _client_lock:
+        _client = client
+    _secrets.clear()
+
+
 def get_secret(secret_name):
-    # Create a Systems Manager client (Parameter Store is part of Systems Manager)
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='ssm',  # Changed from 'secretsmanager' to 'ssm'
-        region_name="eu-west-1"
-    )
+    secret = _secrets.get(secret_name)
+    if secret is not None:
+        return secret
+
+    client = ssm_client()
     try:
         # Get parameter from Parameter Store
-        response = client.get_parameter(
-            Name=secret_name,
-            WithDecryption=True  # This will decrypt SecureString parameters automatically
-        )
+        with timed("ssm"):
+            response = client.get_parameter(
+                Name=secret_name,
+                WithDecryption=True  # This will decrypt SecureString parameters automatically
+            )
     except client.exceptions.ParameterNotFound as e:
         # Parameter not found
         raise e
@@ -22,4 +62,8 @@ def get_secret(secret_name):
 
     # Extract the parameter value
     secret = response['Parameter']['Value']
-    return secret
\ No newline at end of file
+    _secrets.set(secret_name, secret)
+    return secret
+
+
+registry.register("ssm-client", ssm_client, restore=reset_ssm_client)
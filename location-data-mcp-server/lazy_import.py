@@ -0,0 +1,55 @@
+"""
+Deferred module loading for dependencies only some code paths need
+
+``httpx = lazy_import("httpx")`` binds a module object whose code runs on the first
+attribute access, so importing a module that mentions httpx does not add its load time
+to every cold start, only to the requests that actually use it.
+"""
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Dict, Iterable
+
+# Modules bound by lazy_import whose code may not have run yet, by name
+_pending: Dict[str, ModuleType] = {}
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return the named module, executing it on first attribute access
+
+    Modules already imported are returned as they are. ``from x import y`` still
+    loads x immediately, so lazily imported modules must be used as ``x.y``.
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    _pending[name] = module
+    return module
+
+
+def load_lazy_modules(names: Iterable[str]) -> None:
+    """Run the code of the named modules if they were imported lazily and not loaded yet
+
+    LazyLoader is not thread-safe before Python 3.12: threads touching a module while
+    another thread runs its deferred load can see it half initialized. Call this with
+    the modules work fanned out to threads will use, before fanning it out.
+
+    Raises:
+        ImportError: If a module fails to load; the remaining ones stay pending
+    """
+    for name in names:
+        module = _pending.pop(name, None)
+        if module is not None:
+            # Any attribute access runs the deferred load
+            getattr(module, "__name__")
@@ -1,43 +1,113 @@
-import json
 import os
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, Optional, Union
 
-import httpx
-from mcp.server.fastmcp import FastMCP
 import aws_util
 
 from aws_lambda_powertools import Logger
-from awslabs.mcp_lambda_handler import MCPLambdaHandler
 
 # Import authorization components
 from mcp_auth_decorator import with_mcp_authorization, with_mcp_authorization_from_config
 from mcp_security_utils import log_safe_event
+from mcp_deadline import DeadlineExceeded, current_deadline
+from mcp_handler import MCPServerHandler, StructuredResult
+from mcp_json import JSONFragment, codec
+from mcp_metrics import timed, with_request_metrics
+from mcp_priming import prime_on_init, registry
+from mcp_profiling import with_sampled_profiling
+from mcp_session_store import create_session_store
+from mcp_tool_cache import CachePolicy, create_tool_cache_backend
+from mcp_warmer import with_warmer_fast_path
+from lazy_import import lazy_import
+
+# Loaded by the first tool call rather than by every cold start
+httpx = lazy_import("httpx")
 
 logger = Logger()
 
-mcp = MCPLambdaHandler(name="location-data-mcp-server")
+mcp = MCPServerHandler(
+    name="location-data-mcp-server",
+    session_store=create_session_store(),
+    tool_cache_backend=create_tool_cache_backend(),
+)
 
-# Shared utility function
-def do_get(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    headers = {"Accept": "application/json"}
+# Overridden to point the tools at a local stand-in, e.g. scripts/tomtom_stub.py
+TOMTOM_BASE_URL = os.getenv("TOMTOM_BASE_URL", "https://api.tomtom.com")
+
+# Upper bound for a single upstream call, shrunk to the time left in the request
+UPSTREAM_TIMEOUT = 30.0
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+# Shared utility functions
+def http_client() -> "httpx.Client":
+    """HTTP client shared across invocations, so connections to TomTom are reused"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(headers={"Accept": "application/json"})
+    return _http_client
 
-    with httpx.Client()  as client:
-        try:
-            response = client.get(url, headers=headers, params=params, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
 
+def connect_http_client() -> None:
+    """Open a connection to TomTom ahead of the first tool call"""
+    http_client().head(TOMTOM_BASE_URL, timeout=2.0)
 
-@mcp.tool()
-def get_nearby_pois(address: str) -> str:
+
+def reconnect_http_client() -> None:
+    """Replace the shared client, whose connections do not survive a snapshot"""
+    global _http_client
+    with _http_client_lock:
+        stale, _http_client = _http_client, None
+    if stale is not None:
+        stale.close()
+    connect_http_client()
+
+
+def do_get_raw(url: str, params: Dict[str, Any]) -> Optional[bytes]:
+    # Raises DeadlineExceeded rather than starting a call there is no time left for
+    timeout = current_deadline.get().timeout(UPSTREAM_TIMEOUT)
+
+    try:
+        with timed("upstream_http"):
+            response = http_client().get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+    except Exception:
+        return None
+
+
+def is_json_object(body: bytes) -> bool:
+    """Cheap check that a body passed through as a JSONFragment is a whole JSON object"""
+    body = body.strip()
+    return body.startswith(b"{") and body.endswith(b"}")
+
+
+def do_get(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    body = do_get_raw(url, params)
+    try:
+        return codec.loads(body) if body is not None else None
+    except ValueError:
+        return None
+
+
+# POIs around an address change slowly; error results are JSON strings and not cached
+@mcp.tool(cache=CachePolicy(
+    ttl=float(os.getenv("POI_CACHE_TTL", "3600")),
+    shared=True,
+    cache_if=lambda result: isinstance(result, StructuredResult),
+))
+def get_nearby_pois(address: str) -> Union[StructuredResult, str]:
     """Fetch nearby points of interest given an address
     Args:
        address (str): The address to search for nearby POIs.
        Example: {"address": "1600 Pennsylvania Ave NW, Washington, DC 20500"}
     Returns:
-        str: A JSON string containing the nearby POIs.
+        Union[StructuredResult, str]: The TomTom nearbySearch response as structured
+        content, or a JSON string describing the error.
     
     """
     logger.info(f"Fetching nearby POIs for address: {address}")
@@ -50,18 +120,31 @@ def get_nearby_pois(address: str) -> str:
             logger.warning("Geocoding returned no results")
         latitude = geocode["results"][0]["position"]["lat"]
         longitude = geocode["results"][0]["position"]["lon"]
+        # Streamed calls see the resolved position while the POI search runs
+        mcp.report_progress(1, 2, "Geocoded address")
+        mcp.send_partial({"geocode": {"lat": latitude, "lon": longitude}})
         api_key = aws_util.get_secret("/location/tomtom")
-        url = "https://api.tomtom.com/search/2/nearbySearch/.json"
+        url = f"{TOMTOM_BASE_URL}/search/2/nearbySearch/.json"
         params = {"lat": latitude, "lon": longitude, "key": api_key}
-        response = do_get(url, params=params)
+        response = do_get_raw(url, params=params)
 
         if response is None:
-            return json.dumps({"error": "Failed to fetch nearby POIs"})
-
-        return json.dumps(response)
+            return codec.dumps({"error": "Failed to fetch nearby POIs"})
+        # The body goes into the response unparsed; an HTML error page or a truncated
+        # body would make it invalid, and structuredContent has to be an object
+        if not is_json_object(response):
+            logger.warning(f"TomTom returned {len(response)} bytes that are not a JSON object")
+            return codec.dumps({"error": "Unexpected response from the POI search"})
+
+        mcp.report_progress(2, 2, "Fetched nearby POIs")
+        # Pass the upstream body through untouched instead of decoding and re-encoding it
+        return StructuredResult(JSONFragment(response))
+    except DeadlineExceeded:
+        # Answered by the handler with a structured timeout error
+        raise
     except Exception as e:
         logger.error(f"Error fetching POIs: {str(e)}")
-        return json.dumps({"error": f"Error fetching POIs: {str(e)}"})
+        return codec.dumps({"error": f"Error fetching POIs: {str(e)}"})
 
 
 def get_geocoding(address: str):
@@ -70,18 +153,23 @@ def get_geocoding(address: str):
     """
     try:
         api_key = aws_util.get_secret("/location/tomtom")
-        url = "https://api.tomtom.com/search/2/geocode/.json"
+        url = f"{TOMTOM_BASE_URL}/search/2/geocode/.json"
         params = {"key": api_key, "query": address}
         response = do_get(url, params=params)
         if response is None:
-            return json.dumps({"error": "Failed to fetch geocoding information"})
+            return codec.dumps({"error": "Failed to fetch geocoding information"})
         return response
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error fetching geocoding information: {str(e)}")
-        return json.dumps({"error": f"Error fetching geocoding information: {str(e)}"})
+        return codec.dumps({"error": f"Error fetching geocoding information: {str(e)}"})
 
 
 # Example 1: Manual authorization configuration
+@with_warmer_fast_path
+@with_request_metrics
+@with_sampled_profiling
 @with_mcp_authorization(
     resource_id="location-data-mcp-server",
     authorization_servers=["https://auth.example.com"],
@@ -102,6 +190,9 @@ def lambda_handler_with_auth(event, context):
 
 
 # Example 2: Configuration-based authorization (recommended for production)
+@with_warmer_fast_path
+@with_request_metrics
+@with_sampled_profiling
 @with_mcp_authorization_from_config(config_key="/mcp/location-data/auth-config")
 def lambda_handler_with_config_auth(event, context):
     """Lambda handler with configuration-based authorization"""
@@ -118,6 +209,9 @@ def lambda_handler_with_config_auth(event, context):
 
 
 # Default handler without authorization (for backward compatibility)
+@with_warmer_fast_path
+@with_request_metrics
+@with_sampled_profiling
 def lambda_handler(event, context):
     """Default Lambda handler without authorization"""
     # Log safe event information (without Authorization headers)
@@ -127,4 +221,10 @@ def lambda_handler(event, context):
 
 # Use the configuration-based auth handler as default
 # This can be overridden by setting the handler in template.yaml
-lambda_handler = lambda_handler_with_config_auth
\ No newline at end of file
+lambda_handler = lambda_handler_with_config_auth
+
+
+# Warm up what the first tool call needs while the instance initializes
+registry.register("tomtom-api-key", lambda: aws_util.get_secret("/location/tomtom"))
+registry.register("tomtom-http", connect_http_client, restore=reconnect_http_client, needs=("httpx",))
+prime_on_init()
\ No newline at end of file
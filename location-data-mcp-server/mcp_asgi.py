@@ -0,0 +1,113 @@
+"""
+ASGI adapter serving an MCPServerHandler over plain HTTP
+
+Requests are translated into API Gateway proxy events and handled by the same
+handler, tools, session store and authorization middleware as the Lambda function.
+The process stays up, so pooled clients, caches and JWKS are shared by every request
+it serves and the authorization middleware runs on uvicorn's event loop. Tools are
+synchronous and run on the thread pool; ``tools/call`` requests that accept
+``text/event-stream`` are streamed through ``handle_request_stream``.
+"""
+import base64
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import anyio.to_thread
+from aws_lambda_powertools import Logger
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse as StarletteStreamingResponse
+from starlette.routing import Route
+
+from mcp_authorization import MCPAuthorizationMiddleware
+from mcp_handler import MCPServerHandler
+from mcp_metrics import request_metrics
+from mcp_priming import registry
+from mcp_streaming import StreamingResponse, accepts_event_stream
+
+logger = Logger()
+
+
+async def request_to_event(request: Request) -> Dict[str, Any]:
+    """Build the API Gateway proxy event for an HTTP request"""
+    body = await request.body()
+    try:
+        event_body, is_base64 = body.decode("utf-8"), False
+    except UnicodeDecodeError:
+        event_body, is_base64 = base64.b64encode(body).decode("ascii"), True
+    return {
+        "httpMethod": request.method,
+        "path": request.url.path,
+        "headers": dict(request.headers),
+        "queryStringParameters": dict(request.query_params) or None,
+        "body": event_body,
+        "isBase64Encoded": is_base64,
+        "requestContext": {"identity": {"sourceIp": request.client.host if request.client else None}},
+    }
+
+
+def event_to_response(result: Any) -> Response:
+    """Turn a proxy response, or a streamed response, into a Starlette response"""
+    if isinstance(result, StreamingResponse):
+        return StarletteStreamingResponse(result.body, status_code=result.status_code, headers=result.headers)
+    body = result.get("body") or ""
+    content = base64.b64decode(body) if result.get("isBase64Encoded") else body.encode("utf-8")
+    return Response(content=content, status_code=result.get("statusCode", 200), headers=result.get("headers"))
+
+
+def create_app(handler: MCPServerHandler,
+               auth: Optional[MCPAuthorizationMiddleware] = None,
+               thread_limit: Optional[int] = None,
+               priming_budget: float = 10.0) -> Starlette:
+    """Create an ASGI app serving the handler's tools
+
+    Args:
+        handler: Handler whose tools are served
+        auth: Authorization middleware applied to every request, None for no authorization
+        thread_limit: Threads running tools concurrently, defaults to MCP_ASGI_THREADS or 40
+        priming_budget: Seconds startup waits for the priming registry and the JWKS
+    """
+    thread_limit = thread_limit or int(os.environ.get("MCP_ASGI_THREADS", "40"))
+
+    async def call_handler(event: Dict[str, Any], context: Any) -> Any:
+        headers = event["headers"]
+        if accepts_event_stream(headers) and _is_tool_call(handler, event):
+            return await run_in_threadpool(handler.handle_request_stream, event, context)
+        return await run_in_threadpool(handler.handle_request, event, context)
+
+    async def endpoint(request: Request) -> Response:
+        event = await request_to_event(request)
+        with request_metrics():
+            if auth is not None:
+                result = await auth(event, None, call_handler)
+            else:
+                result = await call_handler(event, None)
+        return event_to_response(result)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        anyio.to_thread.current_default_thread_limiter().total_tokens = thread_limit
+        await run_in_threadpool(registry.prime, priming_budget)
+        if auth is not None:
+            with anyio.move_on_after(priming_budget):
+                await auth.auth_server.prime()
+        yield
+
+    methods = ["GET", "POST", "DELETE"]
+    return Starlette(
+        routes=[Route("/", endpoint, methods=methods), Route("/{path:path}", endpoint, methods=methods)],
+        lifespan=lifespan,
+    )
+
+
+def _is_tool_call(handler: MCPServerHandler, event: Dict[str, Any]) -> bool:
+    """Whether a request is a tools/call, the only method worth streaming"""
+    if event["httpMethod"] != "POST" or event["isBase64Encoded"]:
+        return False
+    try:
+        body = handler.codec.loads(event["body"])
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("method") == "tools/call"
@@ -1,8 +1,13 @@
 import asyncio
+import json
+import logging
+import os
 from functools import wraps
 from typing import Any, Dict, List, Optional, Callable
 
+from aws_util import get_secret
 from mcp_authorization import create_mcp_authorization, MCPAuthorizationMiddleware
+from mcp_priming import registry
 
 def with_mcp_authorization(
     resource_id: str,
@@ -35,6 +40,10 @@ def with_mcp_authorization(
             audience=audience,
             resource_metadata_url=resource_metadata_url
         )
+        # Fetch discovery metadata and JWKS at init instead of on the first request
+        registry.register(
+            f"auth:{resource_id}", lambda: asyncio.run(auth_middleware.auth_server.prime()), needs=("httpx",)
+        )
         
         @wraps(handler_func)
         def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -46,10 +55,45 @@ def with_mcp_authorization(
                 async def async_handler(event, context):
                     return handler_func(event, context)
                 return asyncio.run(auth_middleware(event, context, async_handler))
-                
+
+        wrapper.auth_middleware = auth_middleware
         return wrapper
     return decorator
 
+def _load_config(config_key: str) -> Optional[str]:
+    # Try to get config from environment first, then parameter store
+    config_json = os.environ.get(config_key)
+    if not config_json:
+        try:
+            config_json = get_secret(config_key)
+        except Exception:
+            return None
+    return config_json or None
+
+def authorization_from_config(config_key: str = "MCP_AUTH_CONFIG") -> Optional[MCPAuthorizationMiddleware]:
+    """
+    Build the authorization middleware described by an environment/parameter store config
+    
+    Args:
+        config_key: Parameter Store key for authorization configuration
+        
+    Returns:
+        The middleware, or None when there is no config or it disables authorization
+    """
+    config_json = _load_config(config_key)
+    if not config_json:
+        return None
+    config = json.loads(config_json)
+    if not config.get("enable_authorization", True):
+        return None
+    return create_mcp_authorization(
+        resource_id=config.get("resource_id", "mcp-server"),
+        authorization_servers=config.get("authorization_servers", []),
+        required_scopes=config.get("required_scopes"),
+        audience=config.get("audience"),
+        resource_metadata_url=config.get("resource_metadata_url")
+    )
+
 def with_mcp_authorization_from_config(config_key: str = "MCP_AUTH_CONFIG"):
     """
     Decorator that reads authorization config from environment/parameter store
@@ -58,44 +102,52 @@ def with_mcp_authorization_from_config(config_key: str = "MCP_AUTH_CONFIG"):
         config_key: Parameter Store key for authorization configuration
     """
     def decorator(handler_func: Callable) -> Callable:
-        @wraps(handler_func)
-        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-            import os
-            import json
-            from aws_util import get_secret
-            
-            # Try to get config from environment first, then parameter store
-            config_json = os.environ.get(config_key)
-            if not config_json:
-                try:
-                    config_json = get_secret(config_key)
-                except Exception:
-                    # If no config found, proceed without authorization
-                    return handler_func(event, context)
-            
-            if not config_json:
-                return handler_func(event, context)
-                
-            try:
+        # Handlers wrapped per distinct config, so token validation caches (JWKS,
+        # discovery metadata) survive across requests
+        authorized_handlers: Dict[str, Callable] = {}
+
+        def authorized_handler(config_json: str) -> Callable:
+            handler = authorized_handlers.get(config_json)
+            if handler is None:
                 config = json.loads(config_json)
-                
+
                 # Apply authorization with config
-                auth_decorator = with_mcp_authorization(
+                handler = with_mcp_authorization(
                     resource_id=config.get("resource_id", "mcp-server"),
                     authorization_servers=config.get("authorization_servers", []),
                     required_scopes=config.get("required_scopes"),
                     audience=config.get("audience"),
                     resource_metadata_url=config.get("resource_metadata_url"),
                     enable_authorization=config.get("enable_authorization", True)
-                )
-                
-                return auth_decorator(handler_func)(event, context)
-                
+                )(handler_func)
+                authorized_handlers[config_json] = handler
+            return handler
+
+        def prime() -> None:
+            config_json = _load_config(config_key)
+            if not config_json:
+                return
+            middleware = getattr(authorized_handler(config_json), "auth_middleware", None)
+            if middleware is not None:
+                asyncio.run(middleware.auth_server.prime())
+
+        registry.register(f"auth-config:{config_key}", prime, needs=("httpx",))
+
+        @wraps(handler_func)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            config_json = _load_config(config_key)
+            if not config_json:
+                # If no config found, proceed without authorization
+                return handler_func(event, context)
+
+            try:
+                handler = authorized_handler(config_json)
             except (json.JSONDecodeError, KeyError) as e:
                 # If config is invalid, log and proceed without authorization
-                import logging
                 logging.warning(f"Invalid authorization config: {e}")
                 return handler_func(event, context)
-                
+
+            return handler(event, context)
+
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import time
 import base64
@@ -6,11 +7,15 @@ from urllib.parse import urljoin, urlparse
 from dataclasses import dataclass, asdict
 from enum import Enum
 
-import httpx
-import jwt
-from jwt.exceptions import InvalidTokenError as JWTInvalidTokenError
 from aws_lambda_powertools import Logger
 
+from lazy_import import lazy_import
+from mcp_metrics import timed
+
+# Only loaded once a request actually carries a token to validate
+httpx = lazy_import("httpx")
+jwt = lazy_import("jwt")
+
 logger = Logger()
 
 class AuthorizationError(Exception):
@@ -178,6 +183,18 @@ class MCPAuthorizationServer:
                 logger.error(f"Failed to fetch JWKS: {str(e)}")
                 raise AuthorizationError(f"JWKS fetch failed: {str(e)}")
                 
+    async def prime(self) -> None:
+        """Fetch the metadata and JWKS of every authorization server into the caches"""
+        async def prime_server(server_url: str) -> None:
+            try:
+                metadata = await self.discover_authorization_server(server_url)
+                if metadata.jwks_uri:
+                    await self.get_jwks(metadata.jwks_uri)
+            except AuthorizationError as e:
+                logger.warning(f"Could not prime authorization server {server_url}: {str(e)}")
+
+        await asyncio.gather(*(prime_server(url) for url in self.authorization_servers))
+
     async def validate_token(self, access_token: str) -> Dict[str, Any]:
         """Validate access token according to OAuth 2.1 and MCP specification"""
         try:
@@ -224,7 +241,7 @@ class MCPAuthorizationServer:
                 raise InvalidTokenError("Token audience invalid")
             except jwt.InvalidIssuerError:
                 raise InvalidTokenError("Token issuer invalid")
-            except JWTInvalidTokenError as e:
+            except jwt.InvalidTokenError as e:
                 raise InvalidTokenError(f"Token validation failed: {str(e)}")
                 
             # Validate scopes if required
@@ -325,7 +342,8 @@ class MCPAuthorizationMiddleware:
                 )
                 
             # Validate token
-            token_payload = await self.auth_server.validate_token(access_token)
+            with timed("auth"):
+                token_payload = await self.auth_server.validate_token(access_token)
             
             # Add token payload to event for handler use
             event["mcp_token_payload"] = token_payload
@@ -3,9 +3,12 @@ from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 from dataclasses import dataclass, asdict
 
-import httpx
 from aws_lambda_powertools import Logger
 
+from lazy_import import lazy_import
+
+httpx = lazy_import("httpx")
+
 logger = Logger()
 
 @dataclass
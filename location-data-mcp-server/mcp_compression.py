@@ -0,0 +1,154 @@
+"""
+Accept-Encoding negotiated compression of Lambda proxy responses
+
+gzip is always available; brotli is offered when the ``brotli`` package is installed.
+Responses are only compressed above a size threshold, and are returned base64 encoded
+with ``isBase64Encoded`` so API Gateway delivers the compressed bytes.
+"""
+import base64
+import gzip
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment package
+    brotli = None
+
+logger = Logger()
+
+
+@dataclass
+class CompressionConfig:
+    """When and how hard to compress responses"""
+    enabled: bool = True
+    min_bytes: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    allow_brotli: bool = True
+
+    @classmethod
+    def from_env(cls) -> "CompressionConfig":
+        """Read MCP_COMPRESSION, MCP_COMPRESSION_MIN_BYTES, MCP_COMPRESSION_GZIP_LEVEL
+        and MCP_COMPRESSION_BROTLI_QUALITY"""
+        defaults = cls()
+        mode = os.environ.get("MCP_COMPRESSION", "auto").lower()
+        return cls(
+            enabled=mode != "off",
+            min_bytes=int(os.environ.get("MCP_COMPRESSION_MIN_BYTES", defaults.min_bytes)),
+            gzip_level=int(os.environ.get("MCP_COMPRESSION_GZIP_LEVEL", defaults.gzip_level)),
+            brotli_quality=int(os.environ.get("MCP_COMPRESSION_BROTLI_QUALITY", defaults.brotli_quality)),
+            allow_brotli=mode != "gzip",
+        )
+
+    def available_encodings(self) -> Tuple[str, ...]:
+        """Encodings this server can produce, in order of preference"""
+        if self.allow_brotli and brotli is not None:
+            return ("br", "gzip")
+        return ("gzip",)
+
+
+@dataclass
+class CompressionStats:
+    """What compressing one response cost and saved"""
+    encoding: str
+    original_bytes: int
+    compressed_bytes: int
+    cpu_ms: float
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes / self.original_bytes if self.original_bytes else 1.0
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into encoding -> q-value"""
+    preferences: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        preferences[coding] = q
+    return preferences
+
+
+def negotiate_encoding(header: Optional[str], available: Tuple[str, ...]) -> Optional[str]:
+    """Pick the client's most preferred encoding we can produce, None for identity"""
+    preferences = parse_accept_encoding(header)
+    wildcard = preferences.get("*", 0.0)
+    best, best_q = None, 0.0
+    # Ties go to the server's order of preference
+    for encoding in available:
+        q = preferences.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, config: CompressionConfig) -> bytes:
+    """Compress data with the given content coding"""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=config.gzip_level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=config.brotli_quality)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def compress_response(response: Dict[str, Any],
+                      accept_encoding: Optional[str],
+                      config: CompressionConfig) -> Tuple[Dict[str, Any], Optional[CompressionStats]]:
+    """Compress a Lambda proxy response in place when it is worth it
+
+    Returns:
+        The response and the compression stats, or None when it was left alone
+    """
+    body = response.get("body")
+    if not config.enabled or not body or response.get("isBase64Encoded"):
+        return response, None
+
+    raw = body.encode("utf-8") if isinstance(body, str) else body
+    if len(raw) < config.min_bytes:
+        return response, None
+
+    encoding = negotiate_encoding(accept_encoding, config.available_encodings())
+    if encoding is None:
+        return response, None
+
+    started = time.process_time()
+    compressed = compress(raw, encoding, config)
+    stats = CompressionStats(
+        encoding=encoding,
+        original_bytes=len(raw),
+        compressed_bytes=len(compressed),
+        cpu_ms=(time.process_time() - started) * 1000,
+    )
+    if stats.compressed_bytes >= stats.original_bytes:
+        return response, None
+
+    headers = dict(response.get("headers") or {})
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    response["headers"] = headers
+    response["body"] = base64.b64encode(compressed).decode("ascii")
+    response["isBase64Encoded"] = True
+
+    logger.info("Compressed response", extra={
+        "encoding": stats.encoding,
+        "original_bytes": stats.original_bytes,
+        "compressed_bytes": stats.compressed_bytes,
+        "cpu_ms": round(stats.cpu_ms, 3),
+    })
+    return response, stats
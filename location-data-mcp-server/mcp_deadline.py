@@ -0,0 +1,98 @@
+"""
+Per-request deadline derived from the Lambda context
+
+The deadline is the earlier of the invocation's own timeout and the API Gateway
+integration timeout, less a reserve for returning an error response. Tools and HTTP
+helpers read it from ``current_deadline`` and size their timeouts with
+``Deadline.timeout`` so upstream calls stop before the invocation is killed.
+"""
+import math
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# REST API Gateway gives up on the integration after 29 s, whatever the function timeout
+DEFAULT_REQUEST_BUDGET_MS = 29_000
+DEFAULT_RESERVE_MS = 500
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request deadline has passed or leaves too little time for a call"""
+
+    def __init__(self, message: str = "Request deadline exceeded", budget_ms: Optional[float] = None):
+        super().__init__(message)
+        self.budget_ms = budget_ms
+
+
+class Deadline:
+    """Point in time by which a request has to have produced its response"""
+
+    def __init__(self, expires_at: float, budget_ms: Optional[float] = None):
+        """
+        Args:
+            expires_at: time.monotonic() value at which the deadline passes, inf for none
+            budget_ms: Total time the request was given, for error reports
+        """
+        self.expires_at = expires_at
+        self.budget_ms = budget_ms
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """Deadline a number of seconds from now"""
+        return cls(time.monotonic() + seconds, budget_ms=seconds * 1000)
+
+    @classmethod
+    def never(cls) -> "Deadline":
+        """Deadline that never passes, for calls outside Lambda"""
+        return cls(math.inf)
+
+    @classmethod
+    def from_context(cls, context: Any) -> "Deadline":
+        """Deadline for the invocation a Lambda context belongs to
+
+        ``MCP_REQUEST_BUDGET_MS`` caps the time a request may take (API Gateway's 29 s
+        by default) and ``MCP_DEADLINE_RESERVE_MS`` is kept back for the response.
+        Without a Lambda context only the budget applies.
+        """
+        budget_ms = float(os.environ.get("MCP_REQUEST_BUDGET_MS", DEFAULT_REQUEST_BUDGET_MS))
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if callable(get_remaining):
+            budget_ms = min(budget_ms, float(get_remaining()))
+        budget_ms -= float(os.environ.get("MCP_DEADLINE_RESERVE_MS", DEFAULT_RESERVE_MS))
+        return cls.after(max(budget_ms, 0.0) / 1000)
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at != math.inf
+
+    def remaining(self) -> float:
+        """Seconds left, never negative; inf without a deadline"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the deadline has passed"""
+        if self.expired:
+            raise DeadlineExceeded(budget_ms=self.budget_ms)
+
+    def timeout(self, limit: float, minimum: float = 0.05) -> float:
+        """Timeout in seconds for a blocking call: ``limit``, shrunk to the time left
+
+        Raises:
+            DeadlineExceeded: If less than ``minimum`` seconds are left, since a call
+                that short would only fail anyway
+        """
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded(
+                f"Request deadline exceeded: {remaining * 1000:.0f} ms left", budget_ms=self.budget_ms
+            )
+        return min(limit, remaining)
+
+
+# Deadline of the request being handled in the current context
+current_deadline: ContextVar[Deadline] = ContextVar("current_deadline", default=Deadline.never())
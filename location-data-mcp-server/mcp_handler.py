@@ -0,0 +1,556 @@
+"""
+MCP Lambda handler extensions used by the location data server
+"""
+import base64
+import contextvars
+import copy
+import functools
+import inspect
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union, get_type_hints
+
+from aws_lambda_powertools import Logger
+from awslabs.mcp_lambda_handler import MCPLambdaHandler
+from awslabs.mcp_lambda_handler.mcp_lambda_handler import SessionData, current_session_id
+from awslabs.mcp_lambda_handler.session import NoOpSessionStore, SessionStore
+from awslabs.mcp_lambda_handler.types import (
+    Capabilities,
+    ErrorContent,
+    InitializeResult,
+    JSONRPCRequest,
+    ServerInfo,
+    TextContent,
+)
+
+from mcp_compression import CompressionConfig, compress_response
+from mcp_deadline import Deadline, DeadlineExceeded, current_deadline
+from mcp_json import JSONCodec, JSONFragment, codec as default_codec
+from mcp_metrics import request_metrics, set_dimension, timed
+from mcp_profiling import profile_in_thread
+from mcp_session_store import reissued_session_ids
+from mcp_streaming import ProgressReporter, StreamingResponse, current_reporter, sse_event, stream_sink
+from mcp_tool_cache import CachePolicy, ToolCacheBackend, ToolResultCache
+
+logger = Logger()
+
+_MISSING = object()
+
+# Protocol versions initialize can agree on; the first is offered when the client asks
+# for one the server does not know. Clients that negotiated STRUCTURED_OUTPUT_VERSION or
+# later read structuredContent and send their version in MCP-Protocol-Version.
+PROTOCOL_VERSIONS = ("2024-11-05", "2025-06-18")
+STRUCTURED_OUTPUT_VERSION = "2025-06-18"
+
+
+class TrackedSessionData(SessionData):
+    """SessionData that can tell which keys were changed or removed
+
+    Changes are found by comparing the data with a deep copy taken when the session
+    was loaded, so values edited in place (``session.get("items").append(x)``) and
+    edits made through ``raw()`` are caught as well as ``set`` calls.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        super().__init__(data)
+        self._snapshot = copy.deepcopy(data)
+
+    def delete(self, key: str) -> None:
+        """Remove a key from session data"""
+        self._data.pop(key, None)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.changes() or self.removed_keys())
+
+    def changes(self) -> Dict[str, Any]:
+        """Keys added or changed since the session was loaded, and their current values"""
+        return {
+            key: value for key, value in self._data.items()
+            if self._snapshot.get(key, _MISSING) != value
+        }
+
+    def removed_keys(self) -> Set[str]:
+        return set(self._snapshot) - set(self._data)
+
+
+class StructuredResult:
+    """Tool result returned to the client as MCP structured content
+
+    ``data`` is a JSON object, or a JSONFragment holding an encoded one, and is
+    embedded in ``structuredContent`` as-is rather than serialized into a text block.
+    ``text`` is an optional human-readable rendering for the ``content`` list.
+    """
+
+    __slots__ = ("data", "text")
+
+    def __init__(self, data: Union[Dict[str, Any], JSONFragment], text: Optional[str] = None):
+        self.data = data
+        self.text = text
+
+
+class MCPServerHandler(MCPLambdaHandler):
+    """MCPLambdaHandler tuned for the request path of a Lambda-hosted MCP server
+
+    - Request bodies are parsed and responses serialized with ``codec`` (orjson when
+      available, see ``mcp_json``) instead of stdlib json.
+    - Tools returning a dict, a JSONFragment or a StructuredResult have it embedded as
+      ``structuredContent``, along with the serialized ``TextContent`` copy the spec
+      recommends. ``omit_text_for_structured_clients`` leaves the copy out for clients
+      that negotiated structured output, saving its double encoding.
+    - Tool calls are bounded by a deadline derived from the Lambda context (see
+      ``mcp_deadline``) and answered with a structured error when they run out of time.
+    - Each phase of a request is timed and published as metrics, see ``mcp_metrics``.
+    - Large responses are compressed as negotiated through ``Accept-Encoding``.
+    - ``handle_request_stream`` streams progress notifications and partial results as
+      Server-Sent Events ahead of the final response.
+    - ``tool(cache=CachePolicy(...))`` memoizes a tool's results, see ``mcp_tool_cache``.
+    - ``update_session`` only sends the keys the updater touched when the session store
+      supports ``update_session_keys``; other stores still receive the whole data map.
+    - Stores that keep the session inside its ID (``SignedSessionStore``) reissue it on
+      update, and the response carries the new ID.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: str = "1.0.0",
+        session_store: Optional[Union[SessionStore, str]] = None,
+        codec: Optional[JSONCodec] = None,
+        structured_text_fallback: bool = True,
+        omit_text_for_structured_clients: bool = False,
+        compression: Optional[CompressionConfig] = None,
+        tool_cache_backend: Optional[ToolCacheBackend] = None,
+    ):
+        """Initialize the MCP handler.
+
+        Args:
+            name: Handler name
+            version: Handler version
+            session_store: Optional session storage, as for MCPLambdaHandler
+            codec: JSON codec for request and response bodies, defaults to mcp_json.codec
+            structured_text_fallback: Also serialize structured results into a text block
+                for clients on a protocol version without ``structuredContent``; with
+                False only ``structuredContent`` is ever sent
+            omit_text_for_structured_clients: Send clients that negotiated structured
+                output only ``structuredContent``, without the text block the spec
+                says tools SHOULD also return
+            compression: Response compression settings, defaults to CompressionConfig.from_env()
+            tool_cache_backend: Cache shared between instances, used by tools whose
+                CachePolicy is ``shared``
+        """
+        super().__init__(name=name, version=version, session_store=session_store)
+        self.codec = codec or default_codec
+        self.structured_text_fallback = structured_text_fallback
+        self.omit_text_for_structured_clients = omit_text_for_structured_clients
+        self.compression = compression or CompressionConfig.from_env()
+        self.tool_cache_backend = tool_cache_backend
+        self.tool_caches: Dict[str, ToolResultCache] = {}
+
+    def tool(self, cache: Optional[CachePolicy] = None):
+        """Create a decorator for a function as an MCP tool, optionally caching its results
+
+        Args:
+            cache: Memoize results per the policy instead of calling the tool every time
+        """
+        register = super().tool()
+
+        def decorator(func: Callable):
+            wrapper = register(func)
+            if cache is None:
+                return wrapper
+
+            tool_name = next(name for name, impl in self.tool_implementations.items() if impl is func)
+            tool_cache = ToolResultCache(
+                tool_name, cache, self.tool_cache_backend, _encode_cached_result, _decode_cached_result
+            )
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def cached(**kwargs):
+                bound = signature.bind(**kwargs)
+                bound.apply_defaults()
+                return tool_cache.call(func, bound.arguments, current_session_id.get())
+
+            self.tool_caches[tool_name] = tool_cache
+            self.tool_implementations[tool_name] = cached
+            return wrapper
+
+        return decorator
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit and miss counters of every cached tool"""
+        return {name: cache.stats.as_dict() for name, cache in self.tool_caches.items()}
+
+    def get_session(self) -> Optional[TrackedSessionData]:
+        """Get the current session data wrapper with change tracking"""
+        session_id = current_session_id.get()
+        if not session_id:
+            return None
+        data = self.session_store.get_session(session_id)
+        return TrackedSessionData(data) if data is not None else None
+
+    def update_session(self, updater_func: Callable[[SessionData], None]) -> bool:
+        """Update session data using a function, writing back only what changed"""
+        session = self.get_session()
+        if not session:
+            return False
+
+        updater_func(session)
+        if not session.is_dirty:
+            return True
+
+        update_keys = getattr(self.session_store, "update_session_keys", None)
+        if update_keys is None:
+            return self.set_session(session.raw())
+        return update_keys(current_session_id.get(), session.changes(), session.removed_keys())
+
+    def report_progress(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Report progress of the current tool call; a no-op unless the call is streamed"""
+        current_reporter.get().progress(progress, total, message)
+
+    def send_partial(self, data: Any) -> None:
+        """Send an intermediate result of the current tool call; a no-op unless streamed"""
+        current_reporter.get().partial(data)
+
+    def handle_request(self, event: Dict, context: Any) -> Dict:
+        """Handle an incoming Lambda request"""
+        with request_metrics():
+            response = self._handle_scoped(event, context)
+            with timed("compress"):
+                response, _ = compress_response(response, _header(event, "accept-encoding"), self.compression)
+            return response
+
+    def handle_request_stream(self, event: Dict, context: Any) -> StreamingResponse:
+        """Handle a request, streaming notifications as SSE before the final response
+
+        The request runs on a worker thread; the returned body yields each event as
+        soon as the tool emits it. Status and headers are fixed before the request
+        runs, so session IDs created or reissued by it cannot be returned; use
+        ``handle_request`` for ``initialize`` and with ``SignedSessionStore``.
+        """
+        frames: "queue.Queue[Union[str, Dict]]" = queue.Queue()
+
+        def emit(message: Dict[str, Any]) -> None:
+            frames.put(sse_event(self.codec.dumps(message)))
+
+        def run() -> None:
+            stream_sink.set(emit)
+            try:
+                with request_metrics():
+                    response = self._handle_scoped(event, context)
+            except BaseException as e:
+                response = self._create_error_response(-32603, f"Error processing request: {e}")
+            frames.put(response)
+
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True)
+        worker.start()
+
+        def body() -> Iterator[str]:
+            while True:
+                frame = frames.get()
+                if isinstance(frame, dict):
+                    # Notifications (202) and deletions (204) have no final message
+                    if frame.get("body"):
+                        yield sse_event(frame["body"])
+                    return
+                yield frame
+
+        headers = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "MCP-Version": "0.6"}
+        session_id = _header(event, "mcp-session-id")
+        if session_id:
+            headers["MCP-Session-Id"] = session_id
+        return StreamingResponse(status_code=200, headers=headers, body=body())
+
+    def _handle_scoped(self, event: Dict, context: Any) -> Dict:
+        """Handle a request with per-request context set up and torn down"""
+        token = reissued_session_ids.set({})
+        deadline_token = current_deadline.set(Deadline.from_context(context))
+        try:
+            return self._handle_request(event, context)
+        finally:
+            current_deadline.reset(deadline_token)
+            reissued_session_ids.reset(token)
+            current_session_id.set(None)
+
+    def _handle_request(self, event: Dict, context: Any) -> Dict:
+        request_id = None
+        session_id = None
+
+        try:
+            headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+
+            session_id = headers.get("mcp-session-id")
+            current_session_id.set(session_id)
+
+            if event.get("httpMethod") == "DELETE" and session_id:
+                if self.session_store.delete_session(session_id):
+                    return {"statusCode": 204}
+                return {"statusCode": 404}
+
+            if headers.get("content-type") != "application/json":
+                return self._create_error_response(-32700, "Unsupported Media Type")
+
+            try:
+                body = event["body"]
+                # Bodies arrive base64 encoded when the API has binary media types enabled
+                if event.get("isBase64Encoded") and body:
+                    body = base64.b64decode(body)
+                with timed("parse"):
+                    body = self.codec.loads(body)
+            except (ValueError, TypeError):
+                return self._create_error_response(-32700, "Parse error")
+
+            request_id = body.get("id") if isinstance(body, dict) else None
+
+            # Notifications have no id and get no response body
+            if isinstance(body, dict) and "id" not in body:
+                return {
+                    "statusCode": 202,
+                    "body": "",
+                    "headers": {"Content-Type": "application/json", "MCP-Version": "0.6"},
+                }
+
+            if not isinstance(body, dict) or body.get("jsonrpc") != "2.0" or "method" not in body:
+                return self._create_error_response(-32700, "Parse error", request_id)
+
+            request = JSONRPCRequest.model_validate(body)
+
+            if request.method == "initialize":
+                logger.info("Handling initialize request")
+                with timed("session_create"):
+                    session_id = self.session_store.create_session()
+                current_session_id.set(session_id)
+                requested_version = (request.params or {}).get("protocolVersion")
+                result = InitializeResult(
+                    protocolVersion=requested_version if requested_version in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0],
+                    serverInfo=ServerInfo(name=self.name, version=self.version),
+                    capabilities=Capabilities(tools={"list": True, "call": True}),
+                )
+                return self._create_success_response(result.model_dump(), request.id, session_id)
+
+            if session_id:
+                with timed("session_load"):
+                    session = self.session_store.get_session(session_id)
+                if session is None:
+                    return self._create_error_response(
+                        -32000, "Invalid or expired session", request.id, status_code=404
+                    )
+            elif not isinstance(self.session_store, NoOpSessionStore):
+                return self._create_error_response(
+                    -32000, "Session required", request.id, status_code=400
+                )
+
+            if request.method == "tools/list":
+                logger.info("Handling tools/list request")
+                return self._create_success_response(
+                    {"tools": list(self.tools.values())}, request.id, session_id
+                )
+
+            if request.method == "tools/call" and request.params:
+                protocol_version = headers.get("mcp-protocol-version", PROTOCOL_VERSIONS[0])
+                return self._call_tool(request, session_id, protocol_version >= STRUCTURED_OUTPUT_VERSION)
+
+            if request.method == "ping":
+                return self._create_success_response({}, request.id, session_id)
+
+            return self._create_error_response(
+                -32601, f"Method not found: {request.method}", request.id, session_id=session_id
+            )
+
+        except Exception as e:
+            logger.error(f"Error processing request: {str(e)}", exc_info=True)
+            return self._create_error_response(-32000, str(e), request_id, session_id=session_id)
+
+    def _call_tool(self, request: JSONRPCRequest, session_id: Optional[str], structured_output: bool = False) -> Dict:
+        """Run a tools/call request and wrap its result
+
+        Args:
+            structured_output: Whether the client reads ``structuredContent`` without a
+                text copy of it
+        """
+        tool_name = request.params.get("name")
+        tool_args = request.params.get("arguments", {})
+
+        if tool_name not in self.tools:
+            return self._create_error_response(
+                -32601, f"Tool '{tool_name}' not found", request.id, session_id=session_id
+            )
+
+        set_dimension("tool", tool_name)
+        meta = request.params.get("_meta") or {}
+        reporter = ProgressReporter(meta.get("progressToken"), tool_name, stream_sink.get())
+        token = current_reporter.set(reporter)
+        try:
+            tool_func = self.tool_implementations[tool_name]
+            with timed("bind"):
+                arguments = self._convert_arguments(tool_func, tool_args)
+            with timed("tool"):
+                result = self._run_tool(tool_name, tool_func, arguments)
+            return self._create_success_response(self._tool_result(result, structured_output), request.id, session_id)
+        except DeadlineExceeded as e:
+            logger.warning(f"Tool {tool_name} ran out of time: {e}")
+            return self._create_success_response(self._deadline_result(tool_name, e), request.id, session_id)
+        except Exception as e:
+            logger.error(f"Error executing tool {tool_name}: {e}")
+            error_content = [ErrorContent(text=str(e)).model_dump()]
+            return self._create_error_response(
+                -32603, f"Error executing tool: {str(e)}", request.id, error_content, session_id
+            )
+        finally:
+            current_reporter.reset(token)
+
+    def _run_tool(self, tool_name: str, tool_func: Callable, arguments: Dict[str, Any]) -> Any:
+        """Call a tool, giving up on it when the request deadline passes
+
+        With a bounded deadline the tool runs on a worker thread so a slow call can be
+        abandoned in time to answer; it finishes in the background, its upstream calls
+        being bounded by the same deadline. A sampled profile of the request follows it
+        onto the worker thread.
+        """
+        deadline = current_deadline.get()
+        if not deadline.bounded:
+            return tool_func(**arguments)
+        deadline.check()
+
+        outcome: Future = Future()
+        # Wraps the call alone, so its profile is collected before the result is handed over
+        call = profile_in_thread(functools.partial(tool_func, **arguments))
+
+        def run() -> None:
+            try:
+                outcome.set_result(call())
+            except BaseException as e:
+                outcome.set_exception(e)
+
+        worker = threading.Thread(
+            target=contextvars.copy_context().run, args=(run,), name=f"tool-{tool_name}", daemon=True
+        )
+        worker.start()
+        try:
+            return outcome.result(timeout=deadline.remaining())
+        except FutureTimeoutError:
+            raise DeadlineExceeded(
+                f"Tool {tool_name} did not finish within the request deadline", budget_ms=deadline.budget_ms
+            )
+
+    def _deadline_result(self, tool_name: str, error: DeadlineExceeded) -> Dict[str, Any]:
+        """CallToolResult telling the client a tool ran out of time"""
+        data = {
+            "error": {
+                "code": "DEADLINE_EXCEEDED",
+                "message": str(error),
+                "tool": tool_name,
+                "budgetMs": round(error.budget_ms) if error.budget_ms is not None else None,
+            }
+        }
+        return {
+            "content": [TextContent(text=str(error)).model_dump()],
+            "structuredContent": data,
+            "isError": True,
+        }
+
+    def _tool_result(self, result: Any, structured_output: bool = False) -> Dict[str, Any]:
+        """Build a CallToolResult from whatever the tool returned"""
+        if isinstance(result, StructuredResult):
+            data, text = result.data, result.text
+        elif isinstance(result, (dict, JSONFragment)):
+            data, text = result, None
+        else:
+            return {"content": [TextContent(text=str(result)).model_dump()]}
+
+        content = []
+        if text is not None:
+            content.append(TextContent(text=text).model_dump())
+        elif self.structured_text_fallback and not (structured_output and self.omit_text_for_structured_clients):
+            # A fragment is its own encoding
+            encoded = data.as_str() if isinstance(data, JSONFragment) else self.codec.dumps(data)
+            content.append(TextContent(text=encoded).model_dump())
+        return {"content": content, "structuredContent": data}
+
+    def _convert_arguments(self, tool_func: Callable, tool_args: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert enum string values to enum objects"""
+        hints = get_type_hints(tool_func)
+        converted_args = {}
+        for arg_name, arg_value in tool_args.items():
+            arg_type = hints.get(arg_name)
+            if isinstance(arg_type, type) and issubclass(arg_type, Enum):
+                converted_args[arg_name] = arg_type(arg_value)
+            else:
+                converted_args[arg_name] = arg_value
+        return converted_args
+
+    def _create_success_response(
+        self, result: Any, request_id: Optional[str], session_id: Optional[str] = None
+    ) -> Dict:
+        """Create a standardized success response"""
+        with timed("serialize"):
+            body = self.codec.dumps({"jsonrpc": "2.0", "id": request_id, "result": result})
+        return {
+            "statusCode": 200,
+            "body": body,
+            "headers": self._response_headers(session_id),
+        }
+
+    def _create_error_response(
+        self,
+        code: int,
+        message: str,
+        request_id: Optional[str] = None,
+        error_content: Optional[List[Dict]] = None,
+        session_id: Optional[str] = None,
+        status_code: Optional[int] = None,
+    ) -> Dict:
+        """Create a standardized error response"""
+        body: Dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+        if error_content is not None:
+            body["errorContent"] = error_content
+        with timed("serialize"):
+            encoded = self.codec.dumps(body)
+        return {
+            "statusCode": status_code or self._error_code_to_http_status(code),
+            "body": encoded,
+            "headers": self._response_headers(session_id),
+        }
+
+    def _response_headers(self, session_id: Optional[str]) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json", "MCP-Version": "0.6"}
+        session_id = _response_session_id(session_id)
+        if session_id:
+            headers["MCP-Session-Id"] = session_id
+        return headers
+
+
+def _header(event: Dict, name: str) -> Optional[str]:
+    """Case-insensitive header lookup on a proxy event"""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _response_session_id(session_id: Optional[str]) -> Optional[str]:
+    """Session ID to send back, taking reissues during this request into account"""
+    reissued = reissued_session_ids.get()
+    if session_id and reissued:
+        return reissued.get(session_id, session_id)
+    return session_id
+
+
+def _encode_cached_result(result: Any) -> str:
+    """Encode a tool result for a shared tool cache"""
+    if isinstance(result, StructuredResult):
+        return default_codec.dumps({"structured": result.data, "text": result.text})
+    if isinstance(result, (dict, JSONFragment)):
+        return default_codec.dumps({"structured": result, "text": None})
+    return default_codec.dumps({"text": str(result)})
+
+
+def _decode_cached_result(encoded: str) -> Any:
+    """Decode a tool result stored by _encode_cached_result"""
+    value = default_codec.loads(encoded)
+    if "structured" in value:
+        return StructuredResult(value["structured"], value["text"])
+    return value["text"]
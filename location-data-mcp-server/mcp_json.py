@@ -0,0 +1,126 @@
+"""
+Pluggable JSON codec for the MCP request/response path
+
+orjson is used when it is installed and stdlib json otherwise. ``MCP_JSON_CODEC``
+(``auto``, ``orjson`` or ``stdlib``) forces a choice, e.g. to compare them.
+"""
+import json
+import os
+import secrets
+from abc import ABC, abstractmethod
+from typing import Any, List, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment package
+    orjson = None
+
+
+class JSONFragment:
+    """Already-encoded JSON that codecs splice into their output verbatim
+
+    Lets a tool hand back an upstream response body without parsing it and without
+    having it escaped into a string by the response encoder. The content is trusted
+    to be valid JSON.
+    """
+
+    __slots__ = ("json",)
+
+    def __init__(self, json_text: Union[str, bytes]):
+        self.json = json_text
+
+    def as_str(self) -> str:
+        return self.json.decode("utf-8") if isinstance(self.json, bytes) else self.json
+
+    def __repr__(self) -> str:
+        return f"JSONFragment({len(self.json)} bytes)"
+
+
+class JSONCodec(ABC):
+    """Encodes and decodes JSON documents"""
+
+    name: str = "abstract"
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Parse a JSON document, raising ValueError when it is invalid"""
+        pass
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> str:
+        """Serialize an object to a compact JSON string"""
+        pass
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON"""
+        return self.dumps(obj).encode("utf-8")
+
+
+class StdlibJSONCodec(JSONCodec):
+    """JSON codec backed by the standard library
+
+    json has no raw-output hook, so fragments are encoded as unique placeholder
+    strings that are replaced with the fragment text afterwards.
+    """
+
+    name = "stdlib"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        fragments: List[JSONFragment] = []
+        nonce = secrets.token_hex(8)
+
+        def default(value: Any) -> Any:
+            if isinstance(value, JSONFragment):
+                fragments.append(value)
+                return f"\x00{nonce}:{len(fragments) - 1}\x00"
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+        text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default)
+        for i, fragment in enumerate(fragments):
+            text = text.replace(f'"\\u0000{nonce}:{i}\\u0000"', fragment.as_str(), 1)
+        return text
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec backed by orjson"""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, itself a ValueError
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, JSONFragment):
+        # orjson.Fragment (3.10+) is emitted as-is; older releases have to re-parse
+        fragment_type = getattr(orjson, "Fragment", None)
+        return fragment_type(value.json) if fragment_type else orjson.loads(value.json)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def create_codec(name: str = "auto") -> JSONCodec:
+    """Factory function to create a codec by name, falling back to stdlib for auto"""
+    if name == "stdlib":
+        return StdlibJSONCodec()
+    if name == "orjson" or (name == "auto" and orjson is not None):
+        return OrjsonCodec()
+    if name != "auto":
+        raise ValueError(f"Unknown JSON codec: {name}")
+    return StdlibJSONCodec()
+
+
+codec: JSONCodec = create_codec(os.environ.get("MCP_JSON_CODEC", "auto"))
@@ -0,0 +1,188 @@
+"""
+Per-phase request latency metrics
+
+Code on the request path wraps each phase in ``timed("phase")``. The timings of a
+request are collected by its ``request_metrics()`` scope and handed to the sink when
+the scope ends: CloudWatch Embedded Metric Format through Powertools ``Metrics`` in
+Lambda, or ``InMemoryMetricsSink`` to inspect them locally. Every metric of a request
+carries its dimensions, e.g. ``tool`` and ``cache`` (hit, shared_hit or miss).
+
+``MCP_METRICS`` selects the sink: ``emf`` (default), ``memory`` or ``off``.
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+logger = Logger()
+
+DEFAULT_NAMESPACE = "LocationDataMCP"
+
+
+@dataclass
+class RequestMetrics:
+    """Phase timings and dimensions collected for one request"""
+    dimensions: Dict[str, str] = field(default_factory=dict)
+    timings: List[Tuple[str, float]] = field(default_factory=list)
+
+    def __post_init__(self):
+        # Tools may run on a worker thread that shares this object
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, duration_ms: float) -> None:
+        with self._lock:
+            self.timings.append((phase, duration_ms))
+
+    def set_dimension(self, name: str, value: str) -> None:
+        with self._lock:
+            self.dimensions[name] = value
+
+
+class MetricsSink(ABC):
+    """Destination of the metrics of finished requests"""
+
+    @abstractmethod
+    def publish(self, request: RequestMetrics) -> None:
+        """Publish every timing of a request with its dimensions"""
+        pass
+
+
+class EMFMetricsSink(MetricsSink):
+    """Writes one Embedded Metric Format document per request to stdout"""
+
+    def __init__(self, namespace: Optional[str] = None):
+        self.metrics = Metrics(namespace=namespace or os.environ.get("POWERTOOLS_METRICS_NAMESPACE", DEFAULT_NAMESPACE))
+        # Powertools Metrics keeps its buffer at class level; flush one request at a time
+        self._lock = threading.Lock()
+
+    def publish(self, request: RequestMetrics) -> None:
+        if not request.timings:
+            return
+        with self._lock:
+            for name, value in sorted(request.dimensions.items()):
+                self.metrics.add_dimension(name=name, value=value)
+            for phase, duration_ms in request.timings:
+                self.metrics.add_metric(name=f"{phase}_ms", unit=MetricUnit.Milliseconds, value=duration_ms)
+            self.metrics.flush_metrics()
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """Keeps published requests in memory, for tests and local runs"""
+
+    def __init__(self):
+        self.requests: List[RequestMetrics] = []
+        self._lock = threading.Lock()
+
+    def publish(self, request: RequestMetrics) -> None:
+        with self._lock:
+            self.requests.append(request)
+
+    def values(self, phase: str, **dimensions: str) -> List[float]:
+        """Durations recorded for a phase by requests matching the given dimensions"""
+        return [
+            duration_ms
+            for request in self.requests
+            if all(request.dimensions.get(k) == v for k, v in dimensions.items())
+            for name, duration_ms in request.timings
+            if name == phase
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.requests.clear()
+
+
+class NullMetricsSink(MetricsSink):
+    """Discards metrics"""
+
+    def publish(self, request: RequestMetrics) -> None:
+        pass
+
+
+def create_metrics_sink(name: str = "emf") -> MetricsSink:
+    """Factory function to create a metrics sink by name"""
+    if name == "emf":
+        return EMFMetricsSink()
+    if name == "memory":
+        return InMemoryMetricsSink()
+    if name == "off":
+        return NullMetricsSink()
+    raise ValueError(f"Unknown metrics sink: {name}")
+
+
+sink: MetricsSink = create_metrics_sink(os.environ.get("MCP_METRICS", "emf"))
+
+# Metrics of the request being handled in the current context
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("current_metrics", default=None)
+
+
+def set_sink(new_sink: MetricsSink) -> MetricsSink:
+    """Replace the sink, returning the previous one"""
+    global sink
+    previous, sink = sink, new_sink
+    return previous
+
+
+@contextmanager
+def request_metrics() -> Iterator[RequestMetrics]:
+    """Collect metrics for a request, publishing them when the outermost scope ends
+
+    Nested scopes, e.g. the MCP handler inside an instrumented Lambda handler,
+    share the outer scope's metrics.
+    """
+    active = current_metrics.get()
+    if active is not None:
+        yield active
+        return
+
+    metrics = RequestMetrics()
+    token = current_metrics.set(metrics)
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.record("request", (time.perf_counter() - started) * 1000)
+        current_metrics.reset(token)
+        try:
+            sink.publish(metrics)
+        except Exception as e:
+            logger.warning(f"Failed to publish request metrics: {e}")
+
+
+def with_request_metrics(handler):
+    """Decorator collecting metrics for every invocation of a Lambda handler"""
+    @wraps(handler)
+    def wrapper(event, context):
+        with request_metrics():
+            return handler(event, context)
+
+    return wrapper
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time a phase of the current request; does nothing outside a request"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record(phase, (time.perf_counter() - started) * 1000)
+
+
+def set_dimension(name: str, value: str) -> None:
+    """Attach a dimension to every metric of the current request"""
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.set_dimension(name, value)
@@ -0,0 +1,188 @@
+"""
+Registry of warm-ups run during the Lambda init phase
+
+Modules register the setup their first request would otherwise pay for: clients,
+secrets, JWKS. ``prime_on_init`` runs every warm-up concurrently under a time budget
+once the handler module has finished importing. With SnapStart the same warm-ups run
+before the snapshot, and restore hooks re-establish what does not survive it, such as
+open connections.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+
+from lazy_import import load_lazy_modules
+
+try:
+    from snapshot_restore_py import register_after_restore, register_before_snapshot
+except ImportError:  # pragma: no cover - only present in SnapStart-enabled runtimes
+    register_after_restore = register_before_snapshot = None
+
+logger = Logger()
+
+
+@dataclass
+class PrimingTask:
+    """A registered warm-up and its optional restore hook"""
+    name: str
+    warm: Callable[[], None]
+    restore: Optional[Callable[[], None]] = None
+    # Lazily imported modules the warm-up and restore hook use
+    needs: Tuple[str, ...] = ()
+
+
+@dataclass
+class PrimingResult:
+    """Outcome of one warm-up"""
+    name: str
+    status: str  # "ok", "failed" or "timeout"
+    duration_ms: float
+    error: Optional[str] = None
+
+
+class PrimingRegistry:
+    """Warm-ups to run at init and hooks to run after a SnapStart restore"""
+
+    def __init__(self):
+        self._tasks: Dict[str, PrimingTask] = {}
+        self._lock = threading.Lock()
+        self.results: List[PrimingResult] = []
+        # Latest outcome of each warm-up across runs
+        self.status: Dict[str, PrimingResult] = {}
+
+    def register(self,
+                 name: str,
+                 warm: Callable[[], None],
+                 restore: Optional[Callable[[], None]] = None,
+                 needs: Iterable[str] = ()) -> None:
+        """Register a warm-up, replacing any earlier one of the same name
+
+        Args:
+            name: Identifies the warm-up in logs and results
+            warm: Does the setup; exceptions are logged and do not fail init
+            restore: Re-establishes state after a SnapStart restore, e.g. reconnects
+            needs: Names of lazily imported modules warm and restore use, such as
+                ``"httpx"``; they are loaded before the warm-ups run concurrently
+        """
+        with self._lock:
+            self._tasks[name] = PrimingTask(name=name, warm=warm, restore=restore, needs=tuple(needs))
+
+    @property
+    def names(self) -> List[str]:
+        return [task.name for task in self._snapshot()]
+
+    def prime(self, budget: float = 2.0) -> List[PrimingResult]:
+        """Run every warm-up concurrently, waiting at most budget seconds
+
+        Warm-ups still running when the budget is spent carry on in the background
+        and are reported as timed out.
+        """
+        tasks = self._snapshot()
+        return self._run({task.name: task.warm for task in tasks}, budget, _needs(tasks))
+
+    def ensure_primed(self, budget: float = 2.0) -> List[PrimingResult]:
+        """Run the warm-ups that have not succeeded yet on this instance"""
+        with self._lock:
+            pending = [
+                task for task in self._tasks.values()
+                if getattr(self.status.get(task.name), "status", None) != "ok"
+            ]
+        return self._run({task.name: task.warm for task in pending}, budget, _needs(pending))
+
+    def before_checkpoint(self, budget: float = 10.0) -> List[PrimingResult]:
+        """Warm everything up before SnapStart takes the snapshot"""
+        return self.prime(budget)
+
+    def after_restore(self, budget: float = 2.0) -> List[PrimingResult]:
+        """Run the restore hooks in an instance resumed from a snapshot"""
+        tasks = [task for task in self._snapshot() if task.restore]
+        return self._run({task.name: task.restore for task in tasks}, budget, _needs(tasks))
+
+    def install_snapstart_hooks(self) -> bool:
+        """Register before_checkpoint/after_restore with the SnapStart runtime, if present"""
+        if register_before_snapshot is None:
+            return False
+        register_before_snapshot(self.before_checkpoint)
+        register_after_restore(self.after_restore)
+        return True
+
+    def _snapshot(self) -> List[PrimingTask]:
+        # Warm-ups may register further warm-ups while others are running
+        with self._lock:
+            return list(self._tasks.values())
+
+    def _run(self,
+             calls: Dict[str, Callable[[], None]],
+             budget: float,
+             needs: Iterable[str] = ()) -> List[PrimingResult]:
+        if not calls:
+            return []
+        started = time.perf_counter()
+        # Warm-ups share lazily imported modules such as httpx, whose deferred load
+        # must not race between the worker threads; the rest stay deferred
+        try:
+            load_lazy_modules(needs)
+        except Exception:
+            logger.exception("Loading lazily imported modules failed")
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="prime")
+        futures = {name: executor.submit(_timed, call) for name, call in calls.items()}
+        wait(futures.values(), timeout=budget)
+        executor.shutdown(wait=False)
+
+        results = []
+        for name, future in futures.items():
+            if not future.done():
+                results.append(PrimingResult(name, "timeout", budget * 1000))
+                continue
+            duration_ms, error = future.result()
+            status = "ok" if error is None else "failed"
+            results.append(PrimingResult(name, status, duration_ms, error))
+        self.results = results
+        with self._lock:
+            self.status.update((result.name, result) for result in results)
+
+        logger.info("Priming finished", extra={
+            "priming_ms": round((time.perf_counter() - started) * 1000, 1),
+            "priming": {r.name: {"status": r.status, "ms": round(r.duration_ms, 1)} for r in results},
+        })
+        return results
+
+
+def _needs(tasks: List[PrimingTask]) -> List[str]:
+    """Lazily imported modules any of the tasks use, each once"""
+    return list(dict.fromkeys(name for task in tasks for name in task.needs))
+
+
+def _timed(call: Callable[[], None]):
+    started = time.perf_counter()
+    try:
+        call()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return (time.perf_counter() - started) * 1000, error
+
+
+# Registry shared by every module of the function
+registry = PrimingRegistry()
+
+
+def prime_on_init() -> List[PrimingResult]:
+    """Run the registered warm-ups for this init, as configured in the environment
+
+    ``MCP_PRIMING`` is ``auto`` (only inside Lambda), ``on`` or ``off``;
+    ``MCP_PRIMING_BUDGET_MS`` bounds how long init waits (2000 by default). Under
+    SnapStart the warm-ups run from the before-snapshot hook instead.
+    """
+    mode = os.environ.get("MCP_PRIMING", "auto").lower()
+    in_lambda = "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+    if mode == "off" or (mode == "auto" and not in_lambda):
+        return []
+    if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "snap-start" and registry.install_snapstart_hooks():
+        return []
+    return registry.prime(float(os.environ.get("MCP_PRIMING_BUDGET_MS", "2000")) / 1000)
@@ -0,0 +1,177 @@
+"""
+Sampled cProfile profiling of Lambda invocations
+
+``MCP_PROFILE_SAMPLE=1/100`` profiles one in a hundred invocations (``0``, the default,
+disables it). Each profile is dumped in pstats format to ``MCP_PROFILE_DIR``
+(``/tmp/profiles``) and, when ``MCP_PROFILE_BUCKET`` is set, uploaded to S3 under
+``MCP_PROFILE_PREFIX``. File names carry the tool and whether the invocation was a cold
+start: ``<epoch ms>-<cold|warm>-<tool>-<request id>.prof``. scripts/merge_profiles.py
+merges them into one pstats file and collapsed stacks for flame graphs.
+
+cProfile only sees the thread that enabled it, so code handing work of a sampled
+invocation to another thread wraps it with ``profile_in_thread`` to have it included.
+"""
+import base64
+import cProfile
+import os
+import pstats
+import random
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+from aws_lambda_powertools import Logger
+
+from mcp_json import codec
+
+logger = Logger()
+
+# Profiles kept in /tmp when they are not uploaded, oldest removed first
+MAX_LOCAL_PROFILES = 20
+
+_cold_start = True
+
+# Profiles of the other threads a sampled invocation ran work on, None when not sampled
+_thread_profiles: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar("thread_profiles", default=None)
+
+
+@dataclass
+class ProfilingConfig:
+    """Which invocations are profiled and where the profiles go"""
+    sample_rate: float = 0.0
+    directory: str = "/tmp/profiles"
+    bucket: Optional[str] = None
+    prefix: str = "profiles/"
+
+    @classmethod
+    def from_env(cls) -> "ProfilingConfig":
+        """Read MCP_PROFILE_SAMPLE, MCP_PROFILE_DIR, MCP_PROFILE_BUCKET and MCP_PROFILE_PREFIX"""
+        defaults = cls()
+        return cls(
+            sample_rate=parse_sample_rate(os.environ.get("MCP_PROFILE_SAMPLE", "0")),
+            directory=os.environ.get("MCP_PROFILE_DIR", defaults.directory),
+            bucket=os.environ.get("MCP_PROFILE_BUCKET") or None,
+            prefix=os.environ.get("MCP_PROFILE_PREFIX", defaults.prefix),
+        )
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+def parse_sample_rate(value: str) -> float:
+    """Parse ``1/N`` or a fraction such as ``0.01`` into a probability"""
+    value = value.strip()
+    if "/" in value:
+        numerator, _, denominator = value.partition("/")
+        return min(float(numerator) / float(denominator), 1.0)
+    return min(float(value), 1.0)
+
+
+def tool_name(event: Dict[str, Any]) -> str:
+    """Name of the tool a tools/call request invokes, else the JSON-RPC method"""
+    try:
+        body = event.get("body") or ""
+        if event.get("isBase64Encoded"):
+            body = base64.b64decode(body)
+        request = codec.loads(body)
+        if request.get("method") == "tools/call":
+            return str((request.get("params") or {}).get("name", "unknown"))
+        return str(request.get("method", "unknown"))
+    except Exception:
+        return "unknown"
+
+
+def with_sampled_profiling(handler, config: Optional[ProfilingConfig] = None):
+    """Decorator profiling a sample of a Lambda handler's invocations with cProfile"""
+    config = config or ProfilingConfig.from_env()
+
+    @wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+        start, _cold_start = ("cold" if _cold_start else "warm"), False
+        if not config.sampled():
+            return handler(event, context)
+
+        profiler = cProfile.Profile()
+        thread_profiles: List[cProfile.Profile] = []
+        token = _thread_profiles.set(thread_profiles)
+        profiler.enable()
+        try:
+            return handler(event, context)
+        finally:
+            profiler.disable()
+            _thread_profiles.reset(token)
+            request_id = getattr(context, "aws_request_id", None) or "local"
+            _save_profile([profiler, *thread_profiles], config, tool_name(event), start, request_id)
+
+    return wrapper
+
+
+def profile_in_thread(func: Callable[[], Any]) -> Callable[[], Any]:
+    """Wrap a function about to run on another thread so a sampled invocation's profile covers it
+
+    Returns func itself when the current invocation is not being profiled. Work still
+    running when the invocation's profile is saved is left out of it.
+    """
+    thread_profiles = _thread_profiles.get()
+    if thread_profiles is None:
+        return func
+
+    @wraps(func)
+    def run():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the one that enabled it
+            return func()
+        try:
+            return func()
+        finally:
+            profiler.disable()
+            thread_profiles.append(profiler)
+
+    return run
+
+
+def _save_profile(profilers: List[cProfile.Profile],
+                  config: ProfilingConfig,
+                  tool: str,
+                  start: str,
+                  request_id: str) -> None:
+    """Dump the profiles of an invocation as one to the profile directory and upload it when a bucket is configured"""
+    safe_tool = re.sub(r"[^A-Za-z0-9_.]", "_", tool)
+    name = f"{int(time.time() * 1000)}-{start}-{safe_tool}-{request_id}.prof"
+    try:
+        os.makedirs(config.directory, exist_ok=True)
+        path = os.path.join(config.directory, name)
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        if config.bucket:
+            _upload(path, config, name, tool, start)
+            os.remove(path)
+        else:
+            _prune(config.directory)
+        logger.info("Saved profile", extra={"profile": name, "tool": tool, "start": start})
+    except Exception as e:
+        # Profiling must never fail the invocation
+        logger.warning(f"Failed to save profile: {e}")
+
+
+def _upload(path: str, config: ProfilingConfig, name: str, tool: str, start: str) -> None:
+    boto3.client("s3").upload_file(
+        path, config.bucket, f"{config.prefix}{name}",
+        ExtraArgs={"Metadata": {"tool": tool, "start": start}},
+    )
+
+
+def _prune(directory: str) -> None:
+    profiles = sorted(entry for entry in os.listdir(directory) if entry.endswith(".prof"))
+    for stale in profiles[:-MAX_LOCAL_PROFILES]:
+        os.remove(os.path.join(directory, stale))
@@ -0,0 +1,432 @@
+"""
+Session stores for the MCP Lambda handler beyond the ones shipped with awslabs.mcp_lambda_handler
+"""
+import base64
+import copy
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+import zlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from aws_lambda_powertools import Logger
+from awslabs.mcp_lambda_handler.session import DynamoDBSessionStore, SessionStore
+from botocore.exceptions import ClientError
+
+from ttl_cache import TTLCache
+
+logger = Logger()
+
+# Session IDs replaced while handling the current request, keyed by the ID the client sent.
+# MCPServerHandler resets this per request and returns the replacement in MCP-Session-Id.
+reissued_session_ids: ContextVar[Optional[Dict[str, str]]] = ContextVar("reissued_session_ids", default=None)
+
+
+@dataclass
+class CachedSession:
+    """Session item as last read from or written to DynamoDB"""
+    data: Dict[str, Any]
+    version: int
+    expires_at: int = field(default=0)
+
+
+class CachingDynamoDBSessionStore(DynamoDBSessionStore):
+    """DynamoDB session store with a read-through cache and versioned write-back
+
+    Reads are served from an in-process LRU for ``cache_ttl`` seconds, so the session
+    validation in ``handle_request`` and the ``get_session`` call inside a tool cost a
+    single ``GetItem`` at most. Every write is conditional on the ``version`` attribute
+    seen at read time; ``update_session_keys`` sends only the changed keys as
+    ``SET data.#k`` expressions instead of rewriting the whole ``data`` map.
+    """
+
+    def __init__(self,
+                 table_name: str = "mcp_sessions",
+                 cache_ttl: float = 5.0,
+                 max_entries: int = 1024,
+                 version_attribute: str = "version",
+                 max_conflict_retries: int = 2):
+        """
+        Args:
+            table_name: Name of DynamoDB table to use for sessions
+            cache_ttl: Seconds a cached session is trusted without re-reading DynamoDB
+            max_entries: Maximum number of sessions kept in the LRU
+            version_attribute: Item attribute holding the optimistic lock version
+            max_conflict_retries: Retries of a key-level update after a version conflict
+        """
+        super().__init__(table_name=table_name)
+        self.version_attribute = version_attribute
+        self.max_conflict_retries = max_conflict_retries
+        self._cache: TTLCache[CachedSession] = TTLCache(max_entries=max_entries, ttl=cache_ttl)
+
+    def create_session(self, session_data: Optional[Dict[str, Any]] = None) -> str:
+        """Create a new session at version 1 and prime the cache with it"""
+        session_id = str(uuid.uuid4())
+        now = int(time.time())
+        expires_at = now + (24 * 60 * 60)
+        data = session_data or {}
+
+        self.table.put_item(Item={
+            "session_id": session_id,
+            "expires_at": expires_at,
+            "created_at": now,
+            "data": data,
+            self.version_attribute: 1,
+        })
+        self._cache.set(session_id, CachedSession(data=copy.deepcopy(data), version=1, expires_at=expires_at))
+        logger.info(f"Created session {session_id}")
+
+        return session_id
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get session data, from the cache when it is fresh enough"""
+        entry = self._cache.get(session_id)
+        if entry is None:
+            entry = self._load(session_id)
+            if entry is None:
+                return None
+
+        if entry.expires_at < time.time():
+            self.delete_session(session_id)
+            return None
+
+        # Hand out a deep copy so in-place edits, nested ones included, cannot leak into
+        # the cache before they are persisted
+        return copy.deepcopy(entry.data)
+
+    def update_session(self, session_id: str, session_data: Dict[str, Any]) -> bool:
+        """Replace the whole data map, conditional on the cached version"""
+        entry = self._cache.get(session_id) or self._load(session_id)
+        if entry is None:
+            return False
+
+        try:
+            self.table.update_item(
+                Key={"session_id": session_id},
+                UpdateExpression="SET #data = :data, #version = :next",
+                ConditionExpression=self._version_condition(entry.version),
+                ExpressionAttributeNames={"#data": "data", "#version": self.version_attribute},
+                ExpressionAttributeValues=self._version_values(entry.version, {":data": session_data}),
+            )
+        except ClientError as e:
+            self._cache.pop(session_id)
+            if _is_conditional_check_failure(e):
+                logger.warning(f"Session {session_id} was modified concurrently, update rejected")
+            else:
+                logger.error(f"Error updating session {session_id}: {e}")
+            return False
+
+        self._cache.set(session_id, CachedSession(
+            data=copy.deepcopy(session_data), version=entry.version + 1, expires_at=entry.expires_at
+        ))
+        return True
+
+    def update_session_keys(self,
+                            session_id: str,
+                            changes: Dict[str, Any],
+                            removed: Iterable[str] = ()) -> bool:
+        """Write only the given keys of the data map
+
+        Key-level updates commute with concurrent updates of other keys, so a version
+        conflict is resolved by re-reading the version and retrying.
+
+        Args:
+            session_id: The session ID to update
+            changes: Keys to set and their new values
+            removed: Keys to remove from the data map
+
+        Returns:
+            True if successful, False otherwise
+        """
+        removed = [key for key in removed if key not in changes]
+        if not changes and not removed:
+            return True
+
+        names = {"#data": "data", "#version": self.version_attribute}
+        values: Dict[str, Any] = {}
+        set_clauses = ["#version = :next"]
+        remove_clauses = []
+        for i, (key, value) in enumerate(changes.items()):
+            names[f"#k{i}"] = key
+            values[f":v{i}"] = value
+            set_clauses.append(f"#data.#k{i} = :v{i}")
+        for i, key in enumerate(removed):
+            names[f"#r{i}"] = key
+            remove_clauses.append(f"#data.#r{i}")
+
+        update_expression = "SET " + ", ".join(set_clauses)
+        if remove_clauses:
+            update_expression += " REMOVE " + ", ".join(remove_clauses)
+
+        entry = self._cache.get(session_id) or self._load(session_id)
+        for attempt in range(self.max_conflict_retries + 1):
+            if entry is None:
+                return False
+            try:
+                self.table.update_item(
+                    Key={"session_id": session_id},
+                    UpdateExpression=update_expression,
+                    ConditionExpression=self._version_condition(entry.version),
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=self._version_values(entry.version, values),
+                )
+            except ClientError as e:
+                self._cache.pop(session_id)
+                if not _is_conditional_check_failure(e):
+                    logger.error(f"Error updating session {session_id}: {e}")
+                    return False
+                logger.info(f"Version conflict on session {session_id}, retry {attempt + 1}")
+                entry = self._load(session_id)
+                continue
+
+            data = dict(entry.data)
+            data.update(copy.deepcopy(changes))
+            for key in removed:
+                data.pop(key, None)
+            self._cache.set(session_id, CachedSession(
+                data=data, version=entry.version + 1, expires_at=entry.expires_at
+            ))
+            return True
+
+        logger.warning(f"Giving up on session {session_id} after {self.max_conflict_retries} conflicts")
+        return False
+
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a session and evict it from the cache"""
+        self._cache.pop(session_id)
+        return super().delete_session(session_id)
+
+    def _load(self, session_id: str) -> Optional[CachedSession]:
+        """Read a session item from DynamoDB into the cache"""
+        try:
+            item = self.table.get_item(Key={"session_id": session_id}).get("Item")
+        except Exception as e:
+            logger.error(f"Error getting session {session_id}: {e}")
+            return None
+
+        if not item:
+            self._cache.pop(session_id)
+            return None
+
+        entry = CachedSession(
+            data=item.get("data", {}),
+            version=int(item.get(self.version_attribute, 0)),
+            expires_at=int(item.get("expires_at", 0)),
+        )
+        self._cache.set(session_id, entry)
+        return entry
+
+    def _version_condition(self, version: int) -> str:
+        # Items written before versioning was introduced have no version attribute
+        if version == 0:
+            return "attribute_exists(session_id) AND attribute_not_exists(#version)"
+        return "attribute_exists(session_id) AND #version = :expected"
+
+    def _version_values(self, version: int, values: Dict[str, Any]) -> Dict[str, Any]:
+        values = dict(values)
+        values[":next"] = version + 1
+        if version != 0:
+            values[":expected"] = version
+        return values
+
+
+class SessionTokenError(Exception):
+    """Session token is malformed, forged or signed with an unknown key"""
+    pass
+
+
+class SignedSessionStore(SessionStore):
+    """Stateless session store that keeps the session inside the session ID
+
+    The ``Mcp-Session-Id`` is an HMAC-SHA256 signed token carrying the session id,
+    expiry and session data, zlib-compressed when that makes it shorter:
+
+        v1.<key id>.<j|z>.<base64url payload>.<base64url signature>
+
+    Validation and decoding are local, so no storage I/O happens per request. Updates
+    reissue the token, which the handler returns in the response headers. Tokens are
+    signed with the active key and verified against every configured key, so a key
+    can be rotated by adding the new one as active and removing the old one once the
+    session TTL has passed. Deleting a session cannot revoke a token that was already
+    issued; it only tells the client to forget it.
+    """
+
+    TOKEN_VERSION = "v1"
+
+    def __init__(self,
+                 signing_keys: Dict[str, str],
+                 active_key_id: Optional[str] = None,
+                 ttl_seconds: int = 24 * 60 * 60,
+                 compress: bool = True,
+                 max_token_bytes: int = 4096):
+        """
+        Args:
+            signing_keys: Key id to secret mapping; every key is accepted for verification
+            active_key_id: Key id used to sign new tokens, defaults to the last key given
+            ttl_seconds: Session lifetime from creation
+            compress: Whether to zlib-compress payloads when that shortens the token
+            max_token_bytes: Largest token accepted as a header value; bigger updates fail
+        """
+        if not signing_keys:
+            raise ValueError("At least one signing key is required")
+        if any("." in key_id for key_id in signing_keys):
+            raise ValueError("Signing key ids must not contain '.'")
+
+        self._keys = {key_id: secret.encode("utf-8") for key_id, secret in signing_keys.items()}
+        self.active_key_id = active_key_id or list(signing_keys)[-1]
+        if self.active_key_id not in self._keys:
+            raise ValueError(f"Active key {self.active_key_id} is not among the signing keys")
+        self.ttl_seconds = ttl_seconds
+        self.compress = compress
+        self.max_token_bytes = max_token_bytes
+
+    def create_session(self, session_data: Optional[Dict[str, Any]] = None) -> str:
+        """Issue a token for a new session"""
+        claims = {
+            "sid": str(uuid.uuid4()),
+            "exp": int(time.time()) + self.ttl_seconds,
+            "data": session_data or {},
+        }
+        token = self.encode(claims)
+        logger.info(f"Created session {claims['sid']}")
+        return token
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Validate the token and return its session data"""
+        try:
+            claims = self.decode(self._latest(session_id))
+        except SessionTokenError as e:
+            logger.warning(f"Rejected session token: {e}")
+            return None
+
+        if claims.get("exp", 0) < time.time():
+            return None
+        return claims.get("data", {})
+
+    def update_session(self, session_id: str, session_data: Dict[str, Any]) -> bool:
+        """Reissue the token with new session data
+
+        The replacement token is recorded in ``reissued_session_ids`` so the handler can
+        return it; outside a request there is nowhere to send it and the update fails.
+        """
+        reissued = reissued_session_ids.get()
+        if reissued is None:
+            logger.warning("Signed session updated outside a request, the new token would be lost")
+            return False
+
+        try:
+            claims = self.decode(self._latest(session_id))
+        except SessionTokenError as e:
+            logger.warning(f"Rejected session token: {e}")
+            return False
+
+        claims["data"] = session_data
+        token = self.encode(claims)
+        if len(token) > self.max_token_bytes:
+            logger.error(f"Session {claims['sid']} data too large for a token ({len(token)} bytes)")
+            return False
+
+        reissued[session_id] = token
+        return True
+
+    def delete_session(self, session_id: str) -> bool:
+        """Nothing is stored, so there is nothing to delete"""
+        return True
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        """Serialize and sign session claims with the active key"""
+        raw = json.dumps(claims, separators=(",", ":")).encode("utf-8")
+        encoding = "j"
+        if self.compress:
+            compressed = zlib.compress(raw, 6)
+            if len(compressed) < len(raw):
+                raw, encoding = compressed, "z"
+
+        signing_input = ".".join([self.TOKEN_VERSION, self.active_key_id, encoding, _b64encode(raw)])
+        return f"{signing_input}.{_b64encode(self._sign(self.active_key_id, signing_input))}"
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verify a token and return its claims"""
+        parts = token.split(".")
+        if len(parts) != 5 or parts[0] != self.TOKEN_VERSION:
+            raise SessionTokenError("Malformed session token")
+
+        _, key_id, encoding, payload, signature = parts
+        if key_id not in self._keys:
+            raise SessionTokenError(f"Unknown signing key {key_id}")
+
+        signing_input = token.rsplit(".", 1)[0]
+        try:
+            expected = self._sign(key_id, signing_input)
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise SessionTokenError("Invalid session token signature")
+
+            raw = _b64decode(payload)
+            if encoding == "z":
+                raw = zlib.decompress(raw)
+            elif encoding != "j":
+                raise SessionTokenError(f"Unknown payload encoding {encoding}")
+            claims = json.loads(raw)
+        except SessionTokenError:
+            raise
+        except (ValueError, zlib.error) as e:
+            raise SessionTokenError(f"Undecodable session token: {type(e).__name__}")
+
+        if not isinstance(claims, dict):
+            raise SessionTokenError("Malformed session claims")
+        return claims
+
+    def _sign(self, key_id: str, signing_input: str) -> bytes:
+        return hmac.new(self._keys[key_id], signing_input.encode("ascii"), hashlib.sha256).digest()
+
+    def _latest(self, session_id: str) -> str:
+        # A tool may read the session again after updating it within the same request
+        reissued = reissued_session_ids.get()
+        return reissued.get(session_id, session_id) if reissued else session_id
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _is_conditional_check_failure(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def create_session_store() -> Optional[SessionStore]:
+    """Factory function to create the session store configured in the environment
+
+    ``MCP_SESSION_SIGNING_KEYS`` selects the signed stateless store. It holds, or names a
+    Parameter Store key holding, JSON of the form ``{"active": "k2", "keys": {"k1": "...",
+    "k2": "..."}}``. Otherwise ``MCP_SESSION_TABLE`` selects the cached DynamoDB store;
+    ``MCP_SESSION_CACHE_TTL`` overrides its cache TTL in seconds. Returns None (no
+    sessions) when neither is set.
+    """
+    signing_keys = os.environ.get("MCP_SESSION_SIGNING_KEYS")
+    if signing_keys:
+        if not signing_keys.lstrip().startswith("{"):
+            from aws_util import get_secret
+            signing_keys = get_secret(signing_keys)
+        key_config = json.loads(signing_keys)
+        return SignedSessionStore(
+            signing_keys=key_config["keys"],
+            active_key_id=key_config.get("active"),
+            ttl_seconds=int(os.environ.get("MCP_SESSION_TTL", str(24 * 60 * 60))),
+        )
+
+    table_name = os.environ.get("MCP_SESSION_TABLE")
+    if table_name:
+        return CachingDynamoDBSessionStore(
+            table_name=table_name,
+            cache_ttl=float(os.environ.get("MCP_SESSION_CACHE_TTL", "5")),
+        )
+    return None
@@ -0,0 +1,82 @@
+"""
+Progress reporting and Server-Sent Events framing for streamed MCP responses
+
+A tool reports progress through ``MCPServerHandler.report_progress`` and partial
+results through ``MCPServerHandler.send_partial``. When the request is being
+streamed and the client asked for progress (``params._meta.progressToken``), each
+report becomes an SSE event ahead of the final JSON-RPC response; otherwise the
+reports are dropped.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+# Where notifications go while a request is being streamed, None when buffered
+stream_sink: ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = ContextVar("stream_sink", default=None)
+
+
+class ProgressReporter:
+    """Emits MCP progress notifications and partial results for one tool call"""
+
+    def __init__(self,
+                 progress_token: Optional[Union[str, int]],
+                 tool_name: str,
+                 emit: Optional[Callable[[Dict[str, Any]], None]]):
+        self.progress_token = progress_token
+        self.tool_name = tool_name
+        self._emit = emit
+
+    @property
+    def enabled(self) -> bool:
+        return self._emit is not None and self.progress_token is not None
+
+    def progress(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Send a ``notifications/progress`` for the current call"""
+        if not self.enabled:
+            return
+        params: Dict[str, Any] = {"progressToken": self.progress_token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message is not None:
+            params["message"] = message
+        self._emit({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+
+    def partial(self, data: Any) -> None:
+        """Send an intermediate result as a ``notifications/message`` log event"""
+        if not self.enabled:
+            return
+        self._emit({
+            "jsonrpc": "2.0",
+            "method": "notifications/message",
+            "params": {
+                "level": "info",
+                "logger": self.tool_name,
+                "data": {"progressToken": self.progress_token, "partialResult": data},
+            },
+        })
+
+
+# Reporter for the tool call running in the current context
+current_reporter: ContextVar[ProgressReporter] = ContextVar(
+    "current_reporter", default=ProgressReporter(None, "", None)
+)
+
+
+@dataclass
+class StreamingResponse:
+    """Status and headers known up front, followed by a lazily produced SSE body"""
+    status_code: int
+    headers: Dict[str, str]
+    body: Iterator[str]
+
+
+def sse_event(data: str, event: str = "message") -> str:
+    """Frame one JSON message as a Server-Sent Event"""
+    # Spliced JSON fragments may be pretty-printed; every line needs its own data field
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+
+def accepts_event_stream(headers: Dict[str, str]) -> bool:
+    """Whether the client's Accept header (lower-cased keys) allows an SSE response"""
+    return "text/event-stream" in (headers.get("accept") or "")
@@ -0,0 +1,218 @@
+"""
+Declarative caching of tool results
+
+A tool opts in with ``@mcp.tool(cache=CachePolicy(...))``. Results are memoized in an
+in-process LRU per tool and, for ``shared`` policies, in a backend that every Lambda
+instance can read (``DynamoDBToolCacheBackend``). Hits and misses are counted per tool.
+"""
+import hashlib
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import boto3
+from aws_lambda_powertools import Logger
+
+from mcp_json import codec
+from mcp_metrics import set_dimension
+from ttl_cache import TTLCache
+
+logger = Logger()
+
+_MISSING = object()
+
+# DynamoDB items are capped at 400 KB; larger results (UTF-8 encoded) are only cached
+# in-process
+MAX_SHARED_VALUE_BYTES = 350 * 1024
+
+
+@dataclass
+class CachePolicy:
+    """How the results of one tool are cached
+
+    Attributes:
+        ttl: Seconds a result is reused
+        max_entries: In-process entries kept for the tool
+        key_args: Arguments that identify a result, all of them when None
+        session_scoped: Only reuse results within the MCP session that produced them;
+            calls without a session are not cached
+        shared: Also store results in the handler's shared backend, when it has one
+        cache_if: Predicate deciding whether a result is worth caching, e.g. to skip
+            error results; every result that was returned is cached when None
+    """
+    ttl: float = 300.0
+    max_entries: int = 256
+    key_args: Optional[Sequence[str]] = None
+    session_scoped: bool = False
+    shared: bool = False
+    cache_if: Optional[Callable[[Any], bool]] = None
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters of one tool's cache"""
+    hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.shared_hits + self.misses
+        return (self.hits + self.shared_hits) / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class ToolCacheBackend(ABC):
+    """Cache shared between Lambda instances, holding encoded results"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the encoded result stored under key, None if missing or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Store an encoded result for ttl seconds"""
+        pass
+
+
+class DynamoDBToolCacheBackend(ToolCacheBackend):
+    """Shared tool cache in a DynamoDB table
+
+    The table is keyed by ``cache_key`` (string); ``expires_at`` should be enabled as its
+    TTL attribute so expired entries are eventually deleted.
+    """
+
+    def __init__(self, table_name: str):
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            item = self.table.get_item(Key={"cache_key": key}).get("Item")
+        except Exception as e:
+            logger.warning(f"Tool cache read failed: {e}")
+            return None
+        # TTL deletion lags expiry by up to days, so check it here
+        if not item or int(item.get("expires_at", 0)) <= time.time():
+            return None
+        return item["value"]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        try:
+            self.table.put_item(Item={
+                "cache_key": key,
+                "value": value,
+                "expires_at": int(time.time() + ttl),
+            })
+        except Exception as e:
+            logger.warning(f"Tool cache write failed: {e}")
+
+
+class ToolResultCache:
+    """Result cache of one tool, applying its CachePolicy"""
+
+    def __init__(self,
+                 tool_name: str,
+                 policy: CachePolicy,
+                 backend: Optional[ToolCacheBackend] = None,
+                 encode: Callable[[Any], str] = codec.dumps,
+                 decode: Callable[[str], Any] = codec.loads):
+        """
+        Args:
+            tool_name: Name of the cached tool
+            policy: How its results are cached
+            backend: Shared backend, only used when the policy is ``shared``
+            encode: Turns a result into text for the shared backend
+            decode: Turns text from the shared backend back into a result
+        """
+        self.tool_name = tool_name
+        self.policy = policy
+        self.backend = backend if policy.shared else None
+        self.encode = encode
+        self.decode = decode
+        self.stats = CacheStats()
+        self._entries: TTLCache[Any] = TTLCache(max_entries=policy.max_entries, ttl=policy.ttl)
+        self._stats_lock = threading.Lock()
+
+    def key(self, arguments: Dict[str, Any], session_id: Optional[str]) -> Optional[str]:
+        """Cache key for a call, None when the call must not be cached"""
+        if self.policy.session_scoped and not session_id:
+            return None
+        names = self.policy.key_args if self.policy.key_args is not None else arguments.keys()
+        # Pairs in a fixed order, so the key does not depend on argument order
+        identity = [self.tool_name, session_id if self.policy.session_scoped else None,
+                    [[name, _key_value(arguments.get(name))] for name in sorted(names)]]
+        return hashlib.sha256(codec.dumps_bytes(identity)).hexdigest()
+
+    def call(self, func: Callable[..., Any], arguments: Dict[str, Any], session_id: Optional[str]) -> Any:
+        """Return the cached result for these arguments, calling func on a miss"""
+        key = self.key(arguments, session_id)
+        if key is None:
+            return func(**arguments)
+
+        result = self._entries.get(key, _MISSING)
+        if result is not _MISSING:
+            self._record("hit")
+            return result
+
+        if self.backend is not None:
+            encoded = self.backend.get(key)
+            if encoded is not None:
+                result = self.decode(encoded)
+                self._entries.set(key, result)
+                self._record("shared_hit")
+                return result
+
+        self._record("miss")
+        result = func(**arguments)
+        if self.policy.cache_if is None or self.policy.cache_if(result):
+            self._entries.set(key, result)
+            if self.backend is not None:
+                encoded = self.encode(result)
+                if len(encoded.encode("utf-8")) <= MAX_SHARED_VALUE_BYTES:
+                    self.backend.set(key, encoded, self.policy.ttl)
+        return result
+
+    def clear(self) -> None:
+        """Drop the in-process entries; shared entries expire on their own"""
+        self._entries.clear()
+
+    def _record(self, outcome: str) -> None:
+        with self._stats_lock:
+            if outcome == "hit":
+                self.stats.hits += 1
+            elif outcome == "shared_hit":
+                self.stats.shared_hits += 1
+            else:
+                self.stats.misses += 1
+        set_dimension("cache", outcome)
+        logger.debug("Tool cache lookup", extra={"tool": self.tool_name, "cache": outcome})
+
+
+def _key_value(value: Any) -> Any:
+    """Argument value as it identifies a result; Enum members, which the handler converts
+    arguments to, are keyed by their value"""
+    if isinstance(value, Enum):
+        return _key_value(value.value)
+    if isinstance(value, (list, tuple)):
+        return [_key_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _key_value(item) for key, item in value.items()}
+    return value
+
+
+def create_tool_cache_backend() -> Optional[ToolCacheBackend]:
+    """Factory function to create the shared backend named by ``MCP_TOOL_CACHE_TABLE``"""
+    table_name = os.environ.get("MCP_TOOL_CACHE_TABLE")
+    return DynamoDBToolCacheBackend(table_name) if table_name else None
@@ -0,0 +1,110 @@
+"""
+Fast path for warmer pings
+
+A scheduled rule or deploy hook sends ``{"warmer": true, "concurrency": N}``. The
+handler answers it without logging, authorization or sessions: it runs whatever
+warm-ups of the priming registry have not succeeded on this instance yet and, when N
+is above 1, invokes the function N - 1 more times concurrently so that N instances are
+warm. Each target holds its invocation for ``delay_ms`` so that the concurrent pings
+cannot be served by the same instance. The response reports what every instance
+primed. Self-invocation needs ``lambda:InvokeFunction`` on the function itself.
+"""
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Dict, List
+
+import boto3
+from aws_lambda_powertools import Logger
+
+from mcp_priming import registry
+
+logger = Logger()
+
+DEFAULT_DELAY_MS = 75
+MAX_CONCURRENCY = 50
+
+# Identifies this execution environment in warmer reports
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+_warm = False
+_lambda_client = None
+
+
+def is_warmer_event(event: Any) -> bool:
+    return isinstance(event, dict) and bool(event.get("warmer"))
+
+
+def handle_warmer(event: Dict[str, Any], context: Any, priming_budget: float = 5.0) -> Dict[str, Any]:
+    """Prime this instance, fan out to others when asked, and report the outcome"""
+    global _warm
+    started = time.perf_counter()
+    cold, _warm = not _warm, True
+
+    registry.ensure_primed(priming_budget)
+    report: Dict[str, Any] = {
+        "warmer": True,
+        "instance": INSTANCE_ID,
+        "cold": cold,
+        "primed": {name: result.status for name, result in sorted(registry.status.items())},
+    }
+
+    concurrency = min(int(event.get("concurrency", 1)), MAX_CONCURRENCY)
+    if event.get("target"):
+        # Keep this instance busy so sibling pings land elsewhere
+        remaining_ms = event.get("delay_ms", DEFAULT_DELAY_MS) - (time.perf_counter() - started) * 1000
+        if remaining_ms > 0:
+            time.sleep(remaining_ms / 1000)
+    elif concurrency > 1:
+        targets = _fan_out(event, context, concurrency - 1)
+        report["targets"] = targets
+        instances = {INSTANCE_ID} | {t["instance"] for t in targets if "instance" in t}
+        report["instances"] = len(instances)
+
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.debug("Warmer ping", extra={"warmer": report})
+    return report
+
+
+def with_warmer_fast_path(handler):
+    """Decorator answering warmer pings before the handler, and its logging, run"""
+    @wraps(handler)
+    def wrapper(event, context):
+        if is_warmer_event(event):
+            return handle_warmer(event, context)
+        return handler(event, context)
+
+    return wrapper
+
+
+def _fan_out(event: Dict[str, Any], context: Any, count: int) -> List[Dict[str, Any]]:
+    """Invoke this function count times concurrently, returning each target's report"""
+    function = getattr(context, "invoked_function_arn", None) or getattr(context, "function_name", None)
+    if not function:
+        return [{"error": "No function to invoke outside Lambda"}]
+
+    payload = json.dumps({
+        "warmer": True,
+        "target": True,
+        "delay_ms": event.get("delay_ms", DEFAULT_DELAY_MS),
+    }).encode("utf-8")
+
+    def invoke(_) -> Dict[str, Any]:
+        try:
+            response = _client().invoke(FunctionName=function, InvocationType="RequestResponse", Payload=payload)
+            return json.loads(response["Payload"].read())
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(invoke, range(count)))
+
+
+def _client():
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client("lambda")
+    return _lambda_client
+
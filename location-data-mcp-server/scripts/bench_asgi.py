@@ -0,0 +1,179 @@
+"""
+Compare the ASGI server with the Lambda handler path on the same tools/call load
+
+Both paths run in this process against stubbed TomTom and Parameter Store calls:
+the Lambda path calls main.lambda_handler from --concurrency threads, the way that
+many Lambda instances would each serve one request at a time; the ASGI path starts
+uvicorn with --workers processes in a subprocess and drives it over HTTP with
+--concurrency concurrent clients. Every call uses a new address, so the tool cache
+never answers.
+
+The Lambda path shares one interpreter across its threads, so its throughput is bounded
+by the GIL where real Lambda instances would not be; compare latencies at low
+concurrency and throughput per worker.
+
+Usage:
+    python scripts/bench_asgi.py [--requests 500] [--concurrency 16] [--workers N] [--latency 0.02]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTION_DIR = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, FUNCTION_DIR)
+
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+os.environ.setdefault("MCP_METRICS", "off")
+os.environ.setdefault("MCP_PRIMING", "off")
+# No authorization config in Parameter Store for the benchmark
+os.environ.setdefault("/mcp/location-data/auth-config", '{"enable_authorization": false}')
+
+import httpx  # noqa: E402
+
+import aws_util  # noqa: E402
+import main  # noqa: E402
+from mcp_asgi import create_app  # noqa: E402
+from mcp_json import codec  # noqa: E402
+from tomtom_fixtures import geocode_payload, nearby_search_payload  # noqa: E402
+
+_addresses = itertools.count()
+
+# Both paths negotiate the same response compression
+REQUEST_HEADERS = {"content-type": "application/json", "accept-encoding": "gzip"}
+
+
+def install_stubs(latency: float, results: int) -> None:
+    """Answer SSM and TomTom calls locally, each upstream call taking ``latency`` seconds"""
+    geocode = codec.dumps_bytes(geocode_payload("1600 Pennsylvania Ave NW"))
+    nearby = codec.dumps_bytes(nearby_search_payload(num_results=results))
+
+    def do_get_raw(url, params):
+        time.sleep(latency)
+        return geocode if "/geocode/" in url else nearby
+
+    aws_util.get_secret = lambda name: "stub-key"
+    main.do_get_raw = do_get_raw
+
+
+def tool_call_body() -> str:
+    return codec.dumps({
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": "getNearbyPois", "arguments": {"address": f"{next(_addresses)} Main St"}},
+    })
+
+
+def summarize(label: str, latencies: List[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)] * 1000  # noqa: E731
+    print(f"{label:<8} {len(latencies) / elapsed:>9.1f} req/s  p50 {pct(50):>7.1f} ms  "
+          f"p90 {pct(90):>7.1f} ms  p99 {pct(99):>7.1f} ms  mean {statistics.mean(latencies) * 1000:>7.1f} ms")
+
+
+def bench_lambda(requests: int, concurrency: int) -> None:
+    def invoke(_) -> float:
+        event = {
+            "httpMethod": "POST",
+            "path": "/",
+            "headers": dict(REQUEST_HEADERS),
+            "body": tool_call_body(),
+        }
+        started = time.perf_counter()
+        response = main.lambda_handler(event, None)
+        assert response["statusCode"] == 200, response
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(invoke, range(requests)))
+    summarize("lambda", latencies, time.perf_counter() - started)
+
+
+def stub_app():
+    """App factory for the benchmark server processes, stubs configured by environment"""
+    install_stubs(float(os.environ["BENCH_LATENCY"]), int(os.environ["BENCH_RESULTS"]))
+    return create_app(main.mcp)
+
+
+def start_server(workers: int, latency: float, results: int) -> Tuple[str, Callable[[], None]]:
+    """Run the benchmark server in a subprocess, returning its base URL and a stop function"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = dict(os.environ, BENCH_LATENCY=str(latency), BENCH_RESULTS=str(results))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [FUNCTION_DIR, SCRIPTS_DIR, env.get("PYTHONPATH")]))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_asgi:stub_app", "--factory", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=SCRIPTS_DIR, env=env,
+    )
+    url = f"http://127.0.0.1:{port}/"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(url, timeout=1.0)
+            break
+        except httpx.TransportError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                sys.exit("Benchmark server did not start")
+            time.sleep(0.1)
+
+    def stop() -> None:
+        server.terminate()
+        server.wait()
+
+    return url, stop
+
+
+async def bench_asgi(url: str, requests: int, concurrency: int) -> None:
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    # httpx writes headers and body separately; without TCP_NODELAY the body waits
+    # for the server's delayed ACK and every request gains ~40 ms
+    transport = httpx.AsyncHTTPTransport(
+        limits=limits, socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+    )
+
+    async with httpx.AsyncClient(transport=transport, timeout=60.0) as client:
+        async def worker() -> None:
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post(url, content=tool_call_body(), headers=REQUEST_HEADERS)
+                assert response.status_code == 200, response.text
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        summarize("asgi", latencies, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="uvicorn worker processes")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per stubbed upstream call")
+    parser.add_argument("--results", type=int, default=100, help="POIs in the nearbySearch fixture")
+    args = parser.parse_args()
+
+    install_stubs(args.latency, args.results)
+    print(f"{args.requests} tools/call requests, concurrency {args.concurrency}, "
+          f"{args.latency * 1000:.0f} ms per upstream call, {args.workers} ASGI workers")
+    bench_lambda(args.requests, args.concurrency)
+    base_url, stop_server = start_server(args.workers, args.latency, args.results)
+    try:
+        asyncio.run(bench_asgi(base_url, args.requests, args.concurrency))
+    finally:
+        stop_server()
@@ -0,0 +1,64 @@
+"""
+Size and CPU cost of each response compression setting on a nearbySearch tool result
+
+Usage:
+    python scripts/bench_compression.py [--results 100] [--payload captured.json ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_compression import CompressionConfig, brotli, compress  # noqa: E402
+from mcp_json import JSONFragment, codec  # noqa: E402
+from tomtom_fixtures import nearby_search_payload  # noqa: E402
+
+
+def _settings():
+    for level in (1, 4, 6, 9):
+        yield f"gzip -{level}", "gzip", CompressionConfig(gzip_level=level)
+    if brotli is not None:
+        for quality in (1, 4, 5, 8, 11):
+            yield f"br q{quality}", "br", CompressionConfig(brotli_quality=quality)
+
+
+def run(label: str, body: bytes, number: int) -> None:
+    print(f"{label}: {len(body) / 1024:.1f} KiB response body")
+    print(f"  {'setting':<10}{'bytes':>10}{'ratio':>8}{'cpu ms':>10}")
+    for name, encoding, config in _settings():
+        started = time.process_time()
+        for _ in range(number):
+            compressed = compress(body, encoding, config)
+        cpu_ms = (time.process_time() - started) * 1000 / number
+        print(f"  {name:<10}{len(compressed):>10}{len(compressed) / len(body):>8.2f}{cpu_ms:>10.2f}")
+    if brotli is None:
+        print("  (brotli is not installed, only gzip is measured)")
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payload", action="append", default=[], help="captured TomTom response file")
+    parser.add_argument("--results", type=int, default=100, help="POIs in the synthetic payload")
+    parser.add_argument("--number", type=int, default=20, help="compressions per setting")
+    args = parser.parse_args()
+
+    payloads = []
+    for path in args.payload:
+        with open(path, "rb") as f:
+            payloads.append((os.path.basename(path), f.read()))
+    if not payloads:
+        payloads.append((f"synthetic nearbySearch ({args.results} results)",
+                         codec.dumps_bytes(nearby_search_payload(args.results))))
+
+    for label, raw in payloads:
+        # Measure the JSON-RPC response the handler would actually send
+        body = codec.dumps_bytes({"jsonrpc": "2.0", "id": 1,
+                                  "result": {"content": [], "structuredContent": JSONFragment(raw)}})
+        run(label, body, args.number)
+
+
+if __name__ == "__main__":
+    main()
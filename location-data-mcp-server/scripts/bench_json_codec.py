@@ -0,0 +1,93 @@
+"""
+Compare the stdlib and orjson codecs on the JSON work done per get_nearby_pois call
+
+Usage:
+    python scripts/bench_json_codec.py [--results 100] [--payload captured.json ...]
+
+Without --payload a synthetic nearbySearch response is used; pass captured TomTom
+responses to benchmark real payloads.
+"""
+import argparse
+import os
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_json import JSONCodec, JSONFragment, StdlibJSONCodec, create_codec  # noqa: E402
+from tomtom_fixtures import nearby_search_payload  # noqa: E402
+
+
+def _operations(codec: JSONCodec, payload: Dict[str, Any], raw: bytes) -> List[Tuple[str, Callable[[], Any]]]:
+    request_body = codec.dumps({
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {"name": "getNearbyPois", "arguments": {"address": "1600 Pennsylvania Ave NW"}},
+    })
+
+    def text_path():
+        # A tool returning a JSON string: parse the upstream body, encode the tool
+        # result, then encode the JSON-RPC envelope around that string again
+        text = codec.dumps(codec.loads(raw))
+        return codec.dumps({"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": text}]}})
+
+    def structured_path():
+        # A tool returning the upstream body as a fragment of structured content
+        return codec.dumps({"jsonrpc": "2.0", "id": 1, "result": {"content": [], "structuredContent": JSONFragment(raw)}})
+
+    return [
+        ("parse request", lambda: codec.loads(request_body)),
+        ("parse upstream response", lambda: codec.loads(raw)),
+        ("encode tool result", lambda: codec.dumps(payload)),
+        ("text tools/call path", text_path),
+        ("structured tools/call path", structured_path),
+    ]
+
+
+def _best_per_call(func: Callable[[], Any], number: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def run(payloads: List[Tuple[str, Dict[str, Any]]], number: int, repeat: int) -> None:
+    codecs = [StdlibJSONCodec()]
+    try:
+        codecs.append(create_codec("orjson"))
+    except ImportError:
+        print("orjson is not installed, only the stdlib codec is measured\n")
+
+    stdlib = codecs[0]
+    for label, payload in payloads:
+        raw = stdlib.dumps_bytes(payload)
+        print(f"{label}: {len(raw) / 1024:.1f} KiB")
+        print(f"  {'operation':<28}" + "".join(f"{c.name:>12}" for c in codecs) + f"{'speedup':>10}")
+
+        timings = {c.name: dict((name, _best_per_call(op, number, repeat))
+                                for name, op in _operations(c, payload, raw)) for c in codecs}
+        for name in timings[stdlib.name]:
+            row = [timings[c.name][name] for c in codecs]
+            speedup = f"{row[0] / row[-1]:>9.1f}x" if len(row) > 1 else ""
+            print(f"  {name:<28}" + "".join(f"{t * 1e6:>10.1f}us" for t in row) + speedup)
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payload", action="append", default=[], help="captured TomTom response file")
+    parser.add_argument("--results", type=int, default=100, help="POIs in the synthetic payload")
+    parser.add_argument("--number", type=int, default=200, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the best is reported")
+    args = parser.parse_args()
+
+    stdlib = StdlibJSONCodec()
+    payloads = []
+    for path in args.payload:
+        with open(path, "rb") as f:
+            payloads.append((os.path.basename(path), stdlib.loads(f.read())))
+    if not payloads:
+        payloads.append((f"synthetic nearbySearch ({args.results} results)", nearby_search_payload(args.results)))
+
+    run(payloads, args.number, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
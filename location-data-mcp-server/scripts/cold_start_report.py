@@ -0,0 +1,114 @@
+"""
+Cold-start report for the MCP function: how long ``import main`` takes and which
+modules that time goes to, from ``python -X importtime``. Exits non-zero when the
+median init time is over budget, so it can gate CI.
+
+Usage:
+    python scripts/cold_start_report.py [--runs 5] [--top 20] [--budget-ms 500]
+        [--build-dir .aws-sam/build/LocationDataMCPFunction]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+FUNCTION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints the wall time of the import on the last line of stdout
+PROBE = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+
+
+@dataclass
+class ImportRecord:
+    """One line of -X importtime output"""
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parse ``import time: self | cumulative | name`` lines, skipping the header"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(ImportRecord(
+            name=stripped,
+            depth=(len(name) - len(stripped) - 1) // 2,
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+        ))
+    return records
+
+
+def measure(build_dir: str) -> Tuple[float, List[ImportRecord]]:
+    """Import main in a fresh interpreter, returning wall ms and the import records"""
+    env = dict(os.environ)
+    env.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+    env.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+    if build_dir:
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [build_dir, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=FUNCTION_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import main failed:\n{result.stderr[-2000:]}")
+    wall_ms = float(result.stdout.strip().splitlines()[-1])
+    return wall_ms, parse_importtime(result.stderr)
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, int]:
+    """Self time summed per top-level package, in microseconds"""
+    totals: Dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.name.split(".")[0]] += record.self_us
+    return totals
+
+
+def report(wall_times: List[float], records: List[ImportRecord], top: int) -> float:
+    median_ms = statistics.median(wall_times)
+    print(f"import main: median {median_ms:.1f} ms over {len(wall_times)} runs "
+          f"(min {min(wall_times):.1f}, max {max(wall_times):.1f}); -X importtime adds overhead")
+    print()
+
+    print(f"Top {top} packages by self time")
+    for package, self_us in sorted(by_package(records).items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1000:>8.1f} ms  {package}")
+    print()
+
+    print(f"Top {top} modules by cumulative time")
+    print(f"  {'cumul ms':>8}  {'self ms':>8}  module")
+    for record in sorted(records, key=lambda r: -r.cumulative_us)[:top]:
+        print(f"  {record.cumulative_us / 1000:>8.1f}  {record.self_us / 1000:>8.1f}  "
+              f"{'  ' * record.depth}{record.name}")
+    return median_ms
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("COLD_START_BUDGET_MS", "500")),
+                        help="Fail when the median import time exceeds this (COLD_START_BUDGET_MS)")
+    parser.add_argument("--build-dir", default="",
+                        help="Import dependencies from a sam build directory instead of the environment")
+    args = parser.parse_args()
+
+    runs = [measure(args.build_dir) for _ in range(args.runs)]
+    median_ms = report([wall for wall, _ in runs], runs[-1][1], args.top)
+    if median_ms > args.budget_ms:
+        print(f"\nFAIL: init {median_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print(f"\nOK: init {median_ms:.1f} ms is within the {args.budget_ms:.0f} ms budget")
@@ -0,0 +1,283 @@
+"""
+Load test the Lambda handler against local TomTom and Parameter Store stand-ins
+
+Each simulated client replays what an MCP client does: initialize, the initialized
+notification, tools/list, then --calls tools/call requests, carrying its session id.
+--concurrency clients run at once through main.lambda_handler, the way that many warm
+Lambda instances would serve them. TomTom is scripts/tomtom_stub.py running in a
+subprocess (or --stub-url); Parameter Store is scripts/ssm_stub.py, installed with
+aws_util.set_ssm_client. Sessions use the signed store unless the environment
+configures another.
+
+Reports throughput, latency percentiles per JSON-RPC method, the per-phase timings
+collected by mcp_metrics and, with --allocations, tracemalloc figures: the peak
+memory allocated while handling one request of each method, and the allocation sites
+whose retained memory grew most during the run.
+
+The clients share one interpreter, so at high concurrency throughput is bounded by the
+GIL where Lambda instances would not be; use it to compare changes, not to size fleets.
+
+Usage:
+    python scripts/load_test.py [--clients 200] [--concurrency 8] [--calls 3] [--latency 0.05]
+                                [--results 100] [--address-pool 0] [--allocations]
+"""
+import argparse
+import base64
+import gzip
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTION_DIR = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, FUNCTION_DIR)
+
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+os.environ.setdefault("MCP_METRICS", "memory")
+os.environ.setdefault("MCP_PRIMING", "off")
+os.environ.setdefault("MCP_PROFILE_SAMPLE", "0")
+if not os.environ.get("MCP_SESSION_TABLE"):
+    os.environ.setdefault("MCP_SESSION_SIGNING_KEYS", json.dumps({"active": "load", "keys": {"load": "0" * 64}}))
+
+import httpx  # noqa: E402
+
+from ssm_stub import SSMStub  # noqa: E402
+
+Result = Tuple[str, float, bool]  # method, seconds, succeeded
+
+REQUEST_HEADERS = {"content-type": "application/json", "accept-encoding": "gzip"}
+PARAMETERS = {
+    "/location/tomtom": "stub-key",
+    "/mcp/location-data/auth-config": json.dumps({"enable_authorization": False}),
+}
+
+
+def start_stub(latency: float, results: int) -> Tuple[str, Callable[[], None]]:
+    """Run tomtom_stub.py in a subprocess, returning its base URL and a stop function"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPTS_DIR, "tomtom_stub.py"), "--port", str(port),
+         "--latency", str(latency), "--results", str(results)],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.head(url, timeout=1.0)
+            break
+        except httpx.TransportError:
+            if stub.poll() is not None or time.monotonic() > deadline:
+                stub.kill()
+                sys.exit("TomTom stub did not start")
+            time.sleep(0.1)
+
+    def stop() -> None:
+        stub.terminate()
+        stub.wait()
+
+    return url, stop
+
+
+class Client:
+    """One MCP client session replayed through a Lambda handler"""
+
+    def __init__(self, handler: Callable[[Dict[str, Any], Any], Dict[str, Any]], addresses: Callable[[], str]):
+        self.handler = handler
+        self.addresses = addresses
+        self.session_id: Optional[str] = None
+        self.ids = itertools.count(1)
+
+    def send(self, method: str, params: Optional[Dict[str, Any]] = None, notification: bool = False) -> Result:
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notification:
+            message["id"] = next(self.ids)
+        headers = dict(REQUEST_HEADERS)
+        if self.session_id:
+            headers["mcp-session-id"] = self.session_id
+        event = {"httpMethod": "POST", "path": "/", "headers": headers, "body": json.dumps(message)}
+
+        started = time.perf_counter()
+        response = self.handler(event, None)
+        elapsed = time.perf_counter() - started
+
+        if method == "initialize":
+            response_headers = {k.lower(): v for k, v in (response.get("headers") or {}).items()}
+            self.session_id = response_headers.get("mcp-session-id")
+        return method, elapsed, _succeeded(response, notification)
+
+    def run(self, calls: int) -> List[Result]:
+        results = [
+            self.send("initialize", {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "load-test", "version": "1.0"},
+            }),
+            self.send("notifications/initialized", notification=True),
+            self.send("tools/list"),
+        ]
+        for _ in range(calls):
+            results.append(self.send("tools/call", {
+                "name": "getNearbyPois",
+                "arguments": {"address": self.addresses()},
+            }))
+        return results
+
+
+def _succeeded(response: Dict[str, Any], notification: bool) -> bool:
+    if notification:
+        return response.get("statusCode") == 202
+    if response.get("statusCode") != 200:
+        return False
+    body = response.get("body") or ""
+    if response.get("isBase64Encoded"):
+        body = gzip.decompress(base64.b64decode(body))
+    message = json.loads(body)
+    result = message.get("result") or {}
+    return "error" not in message and not result.get("isError")
+
+
+def address_source(pool: int) -> Callable[[], str]:
+    """Addresses for tools/call: all distinct when pool is 0, else cycling through pool of them"""
+    counter = itertools.count()
+    if pool:
+        return lambda: f"{next(counter) % pool} Main St, Washington, DC"
+    return lambda: f"{next(counter)} Main St, Washington, DC"
+
+
+def percentile(values: List[float], p: float) -> float:
+    return values[min(int(p / 100 * len(values)), len(values) - 1)]
+
+
+def report_latencies(results: List[Result], elapsed: float) -> None:
+    by_method: Dict[str, List[float]] = defaultdict(list)
+    for method, seconds, _ in results:
+        by_method[method].append(seconds * 1000)
+    failures = sum(1 for *_, ok in results if not ok)
+    calls = len(by_method.get("tools/call", []))
+
+    print(f"{len(results)} requests in {elapsed:.2f} s: {len(results) / elapsed:.1f} req/s, "
+          f"{calls / elapsed:.1f} tools/call/s, {failures} failed")
+    print(f"{'method':<28}{'count':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'mean':>10}")
+    for method, values in by_method.items():
+        values.sort()
+        print(f"{method:<28}{len(values):>7}{percentile(values, 50):>10.2f}{percentile(values, 90):>10.2f}"
+              f"{percentile(values, 99):>10.2f}{values[-1]:>10.2f}{statistics.mean(values):>10.2f}")
+
+
+def report_phases() -> None:
+    import mcp_metrics
+
+    if not hasattr(mcp_metrics.sink, "values"):
+        return
+    phases = sorted({name for request in mcp_metrics.sink.requests for name, _ in request.timings})
+    print(f"\n{'phase (ms)':<28}{'count':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'mean':>10}")
+    for phase in phases:
+        values = sorted(mcp_metrics.sink.values(phase))
+        print(f"{phase:<28}{len(values):>7}{percentile(values, 50):>10.2f}{percentile(values, 90):>10.2f}"
+              f"{percentile(values, 99):>10.2f}{statistics.mean(values):>10.2f}")
+
+
+def report_allocations(handler: Callable, addresses: Callable[[], str], samples: int,
+                       baseline: tracemalloc.Snapshot, top: int) -> None:
+    """Print retained growth since baseline, then per-request peaks from sequential sessions"""
+    growth = tracemalloc.take_snapshot().compare_to(baseline, "lineno")
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"\ntraced memory: {current / 1024:.0f} KiB now, {peak / 1024:.0f} KiB peak during the run")
+    print("largest retained growth by allocation site:")
+    for stat in growth[:top]:
+        print(f"  {stat.size_diff / 1024:>+9.1f} KiB {stat.count_diff:>+7} blocks  {stat.traceback[0]}")
+
+    # One request at a time, so the peak above the starting point belongs to that request
+    peaks: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(samples):
+        client = Client(handler, addresses)
+        original = client.send
+
+        def measured(method, params=None, notification=False):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = original(method, params, notification)
+            peaks[method].append(tracemalloc.get_traced_memory()[1] - before)
+            return result
+
+        client.send = measured
+        client.run(1)
+
+    print(f"peak allocation per request over {samples} sequential sessions:")
+    for method, values in peaks.items():
+        print(f"  {method:<28}{statistics.median(values) / 1024:>9.1f} KiB median{max(values) / 1024:>9.1f} KiB max")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200, help="Client sessions to replay")
+    parser.add_argument("--concurrency", type=int, default=8, help="Sessions running at once")
+    parser.add_argument("--calls", type=int, default=3, help="tools/call requests per session")
+    parser.add_argument("--warmup", type=int, default=5, help="Sessions run before measuring")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per TomTom response")
+    parser.add_argument("--results", type=int, default=100, help="POIs per nearbySearch response")
+    parser.add_argument("--ssm-latency", type=float, default=0.02, help="Seconds per Parameter Store call")
+    parser.add_argument("--address-pool", type=int, default=0,
+                        help="Distinct addresses to cycle through, 0 to never repeat one (no tool cache hits)")
+    parser.add_argument("--stub-url", help="Use a TomTom stub already running at this URL")
+    parser.add_argument("--allocations", action="store_true", help="Trace allocations with tracemalloc")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="Sequential sessions for per-request peaks")
+    parser.add_argument("--top", type=int, default=10, help="Allocation sites to list")
+    args = parser.parse_args()
+
+    stop_stub = None
+    if args.stub_url:
+        os.environ["TOMTOM_BASE_URL"] = args.stub_url
+    else:
+        os.environ["TOMTOM_BASE_URL"], stop_stub = start_stub(args.latency, args.results)
+
+    import aws_util  # noqa: E402
+
+    ssm = SSMStub(PARAMETERS, latency=args.ssm_latency)
+    aws_util.set_ssm_client(ssm)
+
+    import main  # noqa: E402
+    import mcp_metrics  # noqa: E402
+
+    addresses = address_source(args.address_pool)
+    try:
+        for _ in range(args.warmup):
+            Client(main.lambda_handler, addresses).run(args.calls)
+        if hasattr(mcp_metrics.sink, "clear"):
+            mcp_metrics.sink.clear()
+
+        baseline = None
+        if args.allocations:
+            tracemalloc.start()
+            baseline = tracemalloc.take_snapshot()
+
+        print(f"{args.clients} sessions of {args.calls} tools/call, concurrency {args.concurrency}, "
+              f"TomTom {os.environ['TOMTOM_BASE_URL']}")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            sessions = pool.map(lambda _: Client(main.lambda_handler, addresses).run(args.calls), range(args.clients))
+            results = [result for session in sessions for result in session]
+        elapsed = time.perf_counter() - started
+
+        report_latencies(results, elapsed)
+        report_phases()
+        print(f"\nParameter Store calls: {ssm.calls}")
+        if baseline is not None:
+            report_allocations(main.lambda_handler, addresses, args.alloc_samples, baseline, args.top)
+    finally:
+        if stop_stub is not None:
+            stop_stub()
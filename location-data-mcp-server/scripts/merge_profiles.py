@@ -0,0 +1,110 @@
+"""
+Merge sampled production profiles into one pstats file and collapsed stacks
+
+Takes .prof files written by mcp_profiling (or directories holding them, e.g. an
+``aws s3 sync`` of the profile bucket), optionally filtered by tool and cold/warm
+start. Writes ``<out>.prof`` for pstats/snakeviz and ``<out>.collapsed`` for
+flamegraph.pl or speedscope.
+
+cProfile records callers per function rather than full stacks, so the collapsed
+stacks are reconstructed by splitting each function's time across its call edges in
+proportion to the time spent under each caller.
+
+Usage:
+    python scripts/merge_profiles.py profiles/ [--tool getNearbyPois] [--start cold] [--out merged]
+"""
+import argparse
+import os
+import pstats
+import sys
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Func = Tuple[str, int, str]
+
+# Recursion guard for very deep or pathological call graphs
+MAX_DEPTH = 64
+
+
+def profile_files(paths: List[str], tool: Optional[str], start: Optional[str]) -> Iterator[str]:
+    """Yield .prof files under the given paths whose name tags match the filters"""
+    for path in paths:
+        names = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for name in names:
+            if not name.endswith(".prof"):
+                continue
+            # <epoch ms>-<cold|warm>-<tool>-<request id>.prof
+            parts = os.path.basename(name)[:-len(".prof")].split("-", 3)
+            if len(parts) == 4:
+                if start and parts[1] != start:
+                    continue
+                if tool and parts[2] != tool:
+                    continue
+            elif tool or start:
+                continue
+            yield name
+
+
+def frame_name(func: Func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.strip("<>").replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, float]:
+    """Approximate collapsed stacks (``a;b;c`` -> seconds of self time) from call edges"""
+    entries = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    callees: Dict[Func, Dict[Func, float]] = defaultdict(dict)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            # edge is (cc, nc, tt, ct); ct is the time spent in func under this caller
+            callees[caller][func] = edge[3]
+
+    stacks: Dict[str, float] = defaultdict(float)
+
+    def walk(func: Func, path: List[str], on_path: set, share: float) -> None:
+        _, _, tt, ct, _ = entries[func]
+        stack = path + [frame_name(func)]
+        if tt * share > 0:
+            stacks[";".join(stack)] += tt * share
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, {}).items():
+            callee_ct = entries[callee][3]
+            if callee in on_path or callee_ct <= 0 or edge_ct <= 0:
+                continue
+            walk(callee, stack, on_path | {callee}, share * edge_ct / callee_ct)
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    for root in roots:
+        walk(root, [], {root}, 1.0)
+    return stacks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Profile files or directories")
+    parser.add_argument("--tool", help="Only profiles of this tool (or JSON-RPC method)")
+    parser.add_argument("--start", choices=("cold", "warm"), help="Only cold or warm invocations")
+    parser.add_argument("--out", default="merged", help="Output path without extension")
+    parser.add_argument("--top", type=int, default=15, help="Functions to print by cumulative time")
+    args = parser.parse_args()
+
+    files = list(profile_files(args.paths, args.tool, args.start))
+    if not files:
+        sys.exit("No matching profiles")
+
+    stats = pstats.Stats(files[0])
+    for name in files[1:]:
+        stats.add(name)
+    stats.dump_stats(f"{args.out}.prof")
+
+    with open(f"{args.out}.collapsed", "w") as out:
+        for stack, seconds in sorted(collapsed_stacks(stats).items()):
+            # Integer microseconds, as flamegraph.pl expects integer sample counts
+            if int(seconds * 1_000_000):
+                out.write(f"{stack} {int(seconds * 1_000_000)}\n")
+
+    print(f"Merged {len(files)} profiles into {args.out}.prof and {args.out}.collapsed")
+    stats.sort_stats("cumulative").print_stats(args.top)
@@ -0,0 +1,50 @@
+"""
+In-process stand-in for the Parameter Store client used by aws_util
+
+    aws_util.set_ssm_client(SSMStub({"/location/tomtom": "stub-key"}, latency=0.02))
+
+Answers get_parameter from a dict after a configurable delay and raises the client's
+ParameterNotFound for anything else, so the real get_secret code path and its cache
+are exercised.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class ParameterNotFound(Exception):
+    pass
+
+
+class SSMStub:
+    """Parameter Store client answering from memory
+
+    Args:
+        parameters: Parameter values by name
+        latency: Seconds each get_parameter call takes
+    """
+
+    class exceptions:
+        ParameterNotFound = ParameterNotFound
+
+    def __init__(self, parameters: Optional[Dict[str, str]] = None, latency: float = 0.0):
+        self.parameters = dict(parameters or {})
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_parameter(self, Name: str, WithDecryption: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if Name not in self.parameters:
+            raise ParameterNotFound(f"Parameter {Name} not found.")
+        return {
+            "Parameter": {
+                "Name": Name,
+                "Type": "SecureString",
+                "Value": self.parameters[Name],
+                "Version": 1,
+            }
+        }
@@ -0,0 +1,69 @@
+"""
+Replays a streamed get_nearby_pois call against fixture TomTom payloads and prints
+each Server-Sent Event with the time it arrived, to check that progress and
+partial results reach the client before the final response.
+
+Usage:
+    python scripts/stream_harness.py [--latency 0.5] [--results 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+os.environ.setdefault("MCP_METRICS", "off")
+
+import aws_util  # noqa: E402
+import main  # noqa: E402
+from mcp_json import codec  # noqa: E402
+from tomtom_fixtures import geocode_payload, nearby_search_payload  # noqa: E402
+
+
+def install_stubs(latency: float, results: int) -> None:
+    """Answer SSM and TomTom calls locally, each upstream call taking ``latency`` seconds"""
+    geocode = codec.dumps_bytes(geocode_payload("1600 Pennsylvania Ave NW"))
+    nearby = codec.dumps_bytes(nearby_search_payload(num_results=results))
+
+    def do_get_raw(url, params):
+        time.sleep(latency)
+        return geocode if "/geocode/" in url else nearby
+
+    aws_util.get_secret = lambda name: "stub-key"
+    main.do_get_raw = do_get_raw
+
+
+def run(latency: float, results: int) -> None:
+    install_stubs(latency, results)
+    event = {
+        "httpMethod": "POST",
+        "headers": {"content-type": "application/json", "accept": "text/event-stream"},
+        "body": codec.dumps({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {
+                "name": "getNearbyPois",
+                "arguments": {"address": "1600 Pennsylvania Ave NW"},
+                "_meta": {"progressToken": "harness"},
+            },
+        }),
+    }
+
+    started = time.perf_counter()
+    response = main.mcp.handle_request_stream(event, None)
+    print(f"{response.status_code} {response.headers}")
+    for frame in response.body:
+        elapsed = (time.perf_counter() - started) * 1000
+        first_line = frame.split("\n")[1]
+        print(f"{elapsed:8.1f} ms  {len(frame):>8} bytes  {first_line[:100]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per upstream call")
+    parser.add_argument("--results", type=int, default=100, help="POIs in the nearbySearch fixture")
+    args = parser.parse_args()
+    run(args.latency, args.results)
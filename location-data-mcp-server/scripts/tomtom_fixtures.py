@@ -0,0 +1,126 @@
+"""
+Synthetic TomTom Search API payloads shaped like real geocode and nearbySearch responses
+
+Used by the local benchmarks so they run without an API key. Captured responses can be
+passed to the benchmarks instead when real-world numbers are needed.
+"""
+import random
+from typing import Any, Dict, List
+
+_CATEGORIES = [
+    (7315, "restaurant", "RESTAURANT"),
+    (9376, "café/pub", "CAFE_PUB"),
+    (7311, "petrol station", "PETROL_STATION"),
+    (7332, "market", "MARKET"),
+    (7321, "hospital/polyclinic", "HOSPITAL_POLYCLINIC"),
+    (9361, "shop", "SHOP"),
+    (7376, "important tourist attraction", "IMPORTANT_TOURIST_ATTRACTION"),
+    (7397, "cash dispenser", "CASH_DISPENSER"),
+]
+
+_STREETS = ["Pennsylvania Avenue Northwest", "17th Street Northwest", "H Street Northwest",
+            "New York Avenue Northwest", "15th Street Northwest", "F Street Northwest"]
+
+
+def _position(rng: random.Random, lat: float, lon: float) -> Dict[str, float]:
+    return {"lat": round(lat + rng.uniform(-0.01, 0.01), 6), "lon": round(lon + rng.uniform(-0.01, 0.01), 6)}
+
+
+def _address(rng: random.Random) -> Dict[str, str]:
+    number = str(rng.randint(1, 2500))
+    street = rng.choice(_STREETS)
+    postal = f"{rng.randint(20001, 20099)}"
+    return {
+        "streetNumber": number,
+        "streetName": street,
+        "municipalitySubdivision": "Northwest",
+        "municipality": "Washington",
+        "countrySecondarySubdivision": "District of Columbia",
+        "countrySubdivision": "DC",
+        "countrySubdivisionName": "District of Columbia",
+        "countrySubdivisionCode": "DC",
+        "postalCode": postal,
+        "extendedPostalCode": f"{postal}-{rng.randint(1000, 9999)}",
+        "countryCode": "US",
+        "country": "United States",
+        "countryCodeISO3": "USA",
+        "freeformAddress": f"{number} {street}, Washington, DC {postal}",
+        "localName": "Washington",
+    }
+
+
+def _viewport(position: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    return {
+        "topLeftPoint": {"lat": round(position["lat"] + 0.0009, 6), "lon": round(position["lon"] - 0.0012, 6)},
+        "btmRightPoint": {"lat": round(position["lat"] - 0.0009, 6), "lon": round(position["lon"] + 0.0012, 6)},
+    }
+
+
+def nearby_search_payload(num_results: int = 100, lat: float = 38.8977, lon: float = -77.0365,
+                          seed: int = 7) -> Dict[str, Any]:
+    """A nearbySearch response with num_results POIs around lat/lon"""
+    rng = random.Random(seed)
+    results: List[Dict[str, Any]] = []
+    for i in range(num_results):
+        category_id, category, code = rng.choice(_CATEGORIES)
+        position = _position(rng, lat, lon)
+        results.append({
+            "type": "POI",
+            "id": f"{rng.getrandbits(64):016X}",
+            "score": round(rng.uniform(0.5, 1.0), 6),
+            "dist": round(rng.uniform(10, 1500), 6),
+            "info": f"search:ta:840{rng.getrandbits(40):012d}-US",
+            "poi": {
+                "name": f"{category.title()} {i}",
+                "phone": f"+1 202-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+                "categorySet": [{"id": category_id}],
+                "url": f"www.example-{i}.com",
+                "categories": [category],
+                "classifications": [{"code": code, "names": [{"nameLocale": "en-US", "name": category}]}],
+            },
+            "address": _address(rng),
+            "position": position,
+            "viewport": _viewport(position),
+            "entryPoints": [{"type": "main", "position": _position(rng, position["lat"], position["lon"])}],
+        })
+
+    return {
+        "summary": {
+            "queryType": "NEARBY",
+            "queryTime": rng.randint(5, 60),
+            "numResults": num_results,
+            "offset": 0,
+            "totalResults": num_results * 10,
+            "fuzzyLevel": 1,
+            "geoBias": {"lat": lat, "lon": lon},
+        },
+        "results": results,
+    }
+
+
+def geocode_payload(address: str = "1600 Pennsylvania Ave NW, Washington, DC 20500",
+                    lat: float = 38.8977, lon: float = -77.0365) -> Dict[str, Any]:
+    """A geocode response resolving address to lat/lon"""
+    rng = random.Random(address)
+    position = {"lat": lat, "lon": lon}
+    return {
+        "summary": {
+            "query": address.lower(),
+            "queryType": "NON_NEAR",
+            "queryTime": rng.randint(5, 60),
+            "numResults": 1,
+            "offset": 0,
+            "totalResults": 1,
+            "fuzzyLevel": 1,
+        },
+        "results": [{
+            "type": "Point Address",
+            "id": f"{rng.getrandbits(64):016X}",
+            "score": 13.4,
+            "matchConfidence": {"score": 1},
+            "address": _address(rng),
+            "position": position,
+            "viewport": _viewport(position),
+            "entryPoints": [{"type": "main", "position": position}],
+        }],
+    }
@@ -0,0 +1,125 @@
+"""
+Local stand-in for the TomTom Search API geocode and nearbySearch endpoints
+
+Serves tomtom_fixtures payloads over HTTP after a configurable delay, so the tools
+can be driven end to end (httpx client, connection reuse, response passthrough)
+without an API key. Point the server at it with TOMTOM_BASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python scripts/tomtom_stub.py [--port 8081] [--latency 0.05] [--jitter 0.01] [--results 100]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_json import codec  # noqa: E402
+from tomtom_fixtures import geocode_payload, nearby_search_payload  # noqa: E402
+
+
+class TomTomStubServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering geocode and nearbySearch requests
+
+    Args:
+        address: (host, port) to listen on, port 0 for any free port
+        latency: Seconds each response is delayed by
+        jitter: Upper bound of a uniformly distributed extra delay in seconds
+        results: POIs in each nearbySearch response, which sets its size
+    """
+    daemon_threads = True
+    # Many concurrent clients connect at once during a load test
+    request_queue_size = 256
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.05, jitter: float = 0.0, results: int = 100):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        # One nearbySearch body is served for every position
+        self.nearby = codec.dumps_bytes(nearby_search_payload(num_results=results))
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self) -> None:
+        with self._lock:
+            self.requests += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: TomTomStubServer
+
+    def do_HEAD(self):
+        self._send(200, b"", head=True)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if not query.get("key"):
+            self._send(403, b'{"errorText": "Missing API key"}')
+            return
+
+        self.server.delay()
+        if url.path.startswith("/search/2/geocode/"):
+            address = query.get("query", ["1600 Pennsylvania Ave NW"])[0]
+            self._send(200, codec.dumps_bytes(geocode_payload(address)))
+        elif url.path.startswith("/search/2/nearbySearch/"):
+            self._send(200, self.server.nearby)
+        else:
+            self._send(404, b'{"errorText": "Not found"}')
+
+    def _send(self, status: int, body: bytes, head: bool = False) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int = 0, **options) -> Tuple[TomTomStubServer, Callable[[], None]]:
+    """Serve the stub from a background thread, returning the server and a stop function"""
+    server = TomTomStubServer(("127.0.0.1", port), **options)
+    thread = threading.Thread(target=server.serve_forever, name="tomtom-stub", daemon=True)
+    thread.start()
+
+    def stop() -> None:
+        server.shutdown()
+        server.server_close()
+
+    return server, stop
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay, up to this many seconds")
+    parser.add_argument("--results", type=int, default=100, help="POIs per nearbySearch response")
+    args = parser.parse_args()
+
+    stub = TomTomStubServer((args.host, args.port), latency=args.latency, jitter=args.jitter, results=args.results)
+    print(f"TomTom stub on {stub.base_url}: {args.latency * 1000:.0f} ms, "
+          f"{len(stub.nearby) / 1024:.0f} KiB nearbySearch responses", flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
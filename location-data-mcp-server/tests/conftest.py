@@ -0,0 +1,6 @@
+import os
+
+# boto3 clients and resources are created at import time and need a region; no test
+# talks to AWS
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_METRICS_NAMESPACE", "LocationDataMCPTests")
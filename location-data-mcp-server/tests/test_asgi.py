@@ -0,0 +1,94 @@
+import json
+from typing import Any, Dict
+
+import pytest
+from starlette.testclient import TestClient
+
+import mcp_asgi
+from mcp_asgi import create_app
+from mcp_authorization import MCPAuthorizationMiddleware
+from mcp_handler import MCPServerHandler
+from test_metrics import FakeAuthServer
+
+SSE = "application/json, text/event-stream"
+
+
+@pytest.fixture
+def handler():
+    handler = MCPServerHandler(name="test")
+
+    @handler.tool()
+    def count_to(n: int) -> dict:
+        """Count, reporting each step
+
+        Args:
+            n: Last number
+        """
+        for i in range(1, n + 1):
+            handler.report_progress(i, n)
+        return {"count": n}
+
+    return handler
+
+
+@pytest.fixture
+def client(handler, monkeypatch):
+    # Nothing to warm up for these tools
+    monkeypatch.setattr(mcp_asgi.registry, "prime", lambda budget: None)
+    with TestClient(create_app(handler, thread_limit=4)) as client:
+        yield client
+
+
+def rpc(method: str, params: Dict[str, Any]) -> str:
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+
+
+def count_call(n: int) -> str:
+    return rpc("tools/call", {"name": "countTo", "arguments": {"n": n}, "_meta": {"progressToken": "p1"}})
+
+
+def test_json_rpc_call(client):
+    response = client.post("/mcp", content=count_call(2), headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["id"] == 1
+    assert body["result"]["structuredContent"] == {"count": 2}
+
+
+def test_streamed_call(client):
+    headers = {"Content-Type": "application/json", "Accept": SSE}
+
+    with client.stream("POST", "/mcp", content=count_call(2), headers=headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+    assert [event.get("method") for event in events] == ["notifications/progress", "notifications/progress", None]
+    assert [event["params"]["progress"] for event in events[:2]] == [1, 2]
+    assert events[-1]["result"]["structuredContent"] == {"count": 2}
+
+
+def test_only_tool_calls_are_streamed(client):
+    headers = {"Content-Type": "application/json", "Accept": SSE}
+
+    response = client.post("/", content=rpc("tools/list", {}), headers=headers)
+
+    assert response.headers["content-type"] == "application/json"
+    assert [tool["name"] for tool in response.json()["result"]["tools"]] == ["countTo"]
+
+
+def test_authorization_middleware_guards_every_request(handler, monkeypatch):
+    monkeypatch.setattr(mcp_asgi.registry, "prime", lambda budget: None)
+    auth = MCPAuthorizationMiddleware(FakeAuthServer())
+
+    with TestClient(create_app(handler, auth=auth)) as client:
+        denied = client.post("/mcp", content=count_call(1), headers={"Content-Type": "application/json"})
+        allowed = client.post("/mcp", content=count_call(1), headers={
+            "Content-Type": "application/json", "Authorization": "Bearer token-1",
+        })
+
+    assert denied.status_code == 401
+    assert denied.json() == {"error": "invalid_request"}
+    assert allowed.json()["result"]["structuredContent"] == {"count": 1}
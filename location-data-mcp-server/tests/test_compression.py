@@ -0,0 +1,95 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from mcp_compression import (
+    CompressionConfig,
+    brotli,
+    compress_response,
+    negotiate_encoding,
+    parse_accept_encoding,
+)
+
+BODY = json.dumps({"results": [{"name": f"Place {i}", "category": "museum"} for i in range(200)]})
+
+
+def response(body: str = BODY):
+    return {"statusCode": 200, "headers": {"Content-Type": "application/json"}, "body": body}
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.8, identity;q=0, *;q=bogus") == {
+        "gzip": 1.0, "br": 0.8, "identity": 0.0, "*": 0.0
+    }
+    assert parse_accept_encoding(None) == {}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("br, gzip", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("gzip;q=0, *;q=0.1", "br"),
+    ("identity", None),
+    ("deflate", None),
+    (None, None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, ("br", "gzip")) == expected
+
+
+def test_gzip_only_server_ignores_brotli_preference():
+    assert negotiate_encoding("br, gzip;q=0.5", ("gzip",)) == "gzip"
+
+
+def test_large_response_is_compressed():
+    compressed, stats = compress_response(response(), "gzip", CompressionConfig())
+
+    assert compressed["isBase64Encoded"] is True
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    assert compressed["headers"]["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(base64.b64decode(compressed["body"])).decode() == BODY
+    assert stats.compressed_bytes < stats.original_bytes
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_is_preferred_when_available():
+    compressed, _ = compress_response(response(), "gzip, br", CompressionConfig())
+
+    assert compressed["headers"]["Content-Encoding"] == "br"
+    assert brotli.decompress(base64.b64decode(compressed["body"])).decode() == BODY
+
+
+def test_brotli_can_be_disabled():
+    compressed, _ = compress_response(response(), "br, gzip", CompressionConfig(allow_brotli=False))
+
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+
+
+@pytest.mark.parametrize("original, accept, config", [
+    (response('{"small":true}'), "gzip", CompressionConfig()),
+    (response(), None, CompressionConfig()),
+    (response(), "gzip", CompressionConfig(enabled=False)),
+    ({**response(), "isBase64Encoded": True}, "gzip", CompressionConfig()),
+    ({"statusCode": 202, "body": ""}, "gzip", CompressionConfig()),
+])
+def test_response_is_left_alone(original, accept, config):
+    expected = dict(original)
+
+    result, stats = compress_response(original, accept, config)
+
+    assert stats is None
+    assert result == expected
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("MCP_COMPRESSION", "gzip")
+    monkeypatch.setenv("MCP_COMPRESSION_MIN_BYTES", "4096")
+
+    config = CompressionConfig.from_env()
+
+    assert config.enabled and not config.allow_brotli
+    assert config.min_bytes == 4096
+    assert config.available_encodings() == ("gzip",)
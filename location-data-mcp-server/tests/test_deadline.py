@@ -0,0 +1,99 @@
+import json
+import math
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_deadline
+from mcp_deadline import Deadline, DeadlineExceeded
+from mcp_handler import MCPServerHandler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(mcp_deadline.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_never_is_unbounded():
+    deadline = Deadline.never()
+
+    assert not deadline.bounded
+    assert deadline.remaining() == math.inf
+    assert deadline.timeout(5) == 5
+
+
+def test_from_context_takes_the_earlier_limit(monkeypatch, clock):
+    monkeypatch.delenv("MCP_REQUEST_BUDGET_MS", raising=False)
+    monkeypatch.delenv("MCP_DEADLINE_RESERVE_MS", raising=False)
+
+    assert Deadline.from_context(SimpleNamespace(get_remaining_time_in_millis=lambda: 10_000)).budget_ms == 9_500
+    assert Deadline.from_context(SimpleNamespace(get_remaining_time_in_millis=lambda: 60_000)).budget_ms == 28_500
+    assert Deadline.from_context(None).budget_ms == 28_500
+
+
+def test_from_context_reads_the_environment(monkeypatch, clock):
+    monkeypatch.setenv("MCP_REQUEST_BUDGET_MS", "2000")
+    monkeypatch.setenv("MCP_DEADLINE_RESERVE_MS", "3000")
+
+    deadline = Deadline.from_context(None)
+
+    assert deadline.budget_ms == 0
+    assert deadline.expired
+
+
+def test_timeout_shrinks_to_the_time_left(clock):
+    deadline = Deadline.after(2)
+
+    assert deadline.timeout(5) == 2
+    clock[0] += 1.5
+    assert deadline.timeout(5) == pytest.approx(0.5)
+    assert deadline.timeout(0.1) == 0.1
+
+
+def test_timeout_refuses_calls_too_short_to_succeed(clock):
+    deadline = Deadline.after(1)
+    clock[0] += 0.99
+
+    with pytest.raises(DeadlineExceeded) as raised:
+        deadline.timeout(5)
+    assert raised.value.budget_ms == 1000
+
+
+def test_check(clock):
+    deadline = Deadline.after(1)
+    deadline.check()
+    clock[0] += 1
+
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_slow_tool_is_abandoned_at_the_deadline(monkeypatch):
+    monkeypatch.setenv("MCP_REQUEST_BUDGET_MS", "200")
+    monkeypatch.setenv("MCP_DEADLINE_RESERVE_MS", "0")
+    handler = MCPServerHandler(name="test")
+    release = threading.Event()
+
+    @handler.tool()
+    def slow_tool() -> dict:
+        """Tool that outlives the request"""
+        release.wait(5)
+        return {"done": True}
+
+    event = {
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                            "params": {"name": "slowTool", "arguments": {}}}),
+    }
+    try:
+        result = json.loads(handler.handle_request(event, None)["body"])["result"]
+    finally:
+        release.set()
+
+    assert result["isError"]
+    assert result["structuredContent"]["error"]["code"] == "DEADLINE_EXCEEDED"
+    assert result["structuredContent"]["error"]["budgetMs"] == 200
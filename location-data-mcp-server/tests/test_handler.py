@@ -0,0 +1,174 @@
+import copy
+import json
+from typing import Any, Dict, Optional
+
+import pytest
+from awslabs.mcp_lambda_handler.mcp_lambda_handler import current_session_id
+from awslabs.mcp_lambda_handler.session import SessionStore
+
+from mcp_handler import STRUCTURED_OUTPUT_VERSION, MCPServerHandler
+from mcp_json import JSONFragment
+
+
+class DictSessionStore(SessionStore):
+    """Sessions in a dict, storing copies like a remote store would"""
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+
+    def create_session(self, session_data: Optional[Dict[str, Any]] = None) -> str:
+        session_id = f"s{len(self.sessions)}"
+        self.sessions[session_id] = dict(session_data or {})
+        return session_id
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self.sessions.get(session_id))
+
+    def update_session(self, session_id: str, session_data: Dict[str, Any]) -> bool:
+        self.sessions[session_id] = copy.deepcopy(session_data)
+        return True
+
+    def delete_session(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+
+class KeyedSessionStore(DictSessionStore):
+    """Store that, like CachingDynamoDBSessionStore, accepts key-level updates"""
+
+    def update_session_keys(self, session_id, changes, removed=()):
+        data = self.sessions[session_id]
+        data.update(copy.deepcopy(changes))
+        for key in removed:
+            data.pop(key, None)
+        return True
+
+
+@pytest.fixture(params=[DictSessionStore, KeyedSessionStore])
+def handler_with_session(request):
+    store = request.param()
+    session_id = store.create_session({"items": [], "name": "a"})
+    handler = MCPServerHandler(name="test", session_store=store)
+    token = current_session_id.set(session_id)
+    yield handler, store, session_id
+    current_session_id.reset(token)
+
+
+def test_update_session_saves_nested_in_place_edits(handler_with_session):
+    handler, store, session_id = handler_with_session
+
+    for item in ("a", "b", "c"):
+        assert handler.update_session(lambda s: s.get("items").append(item))
+
+    assert store.sessions[session_id]["items"] == ["a", "b", "c"]
+
+
+def test_update_session_writes_set_and_deleted_keys(handler_with_session):
+    handler, store, session_id = handler_with_session
+
+    def updater(session):
+        session.set("count", 1)
+        session.delete("name")
+
+    assert handler.update_session(updater)
+    assert store.sessions[session_id] == {"items": [], "count": 1}
+
+
+def test_unchanged_session_is_not_written(handler_with_session):
+    handler, store, session_id = handler_with_session
+    writes = []
+    store.update_session = lambda *args: writes.append(args) or True
+    store.update_session_keys = lambda *args: writes.append(args) or True
+
+    assert handler.update_session(lambda s: s.set("name", "a"))
+    assert writes == []
+
+
+def request_event(method: str, params: Optional[Dict[str, Any]] = None, **headers: str) -> Dict[str, Any]:
+    return {
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json", **headers},
+        "body": json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}),
+    }
+
+
+@pytest.fixture
+def poi_handler():
+    handler = MCPServerHandler(name="test")
+
+    @handler.tool()
+    def get_nearby_pois(lat: float, lon: float) -> dict:
+        """Points of interest near a location
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+        """
+        return {"results": [{"name": "Museum", "position": {"lat": lat, "lon": lon}}]}
+
+    @handler.tool()
+    def raw_upstream() -> dict:
+        """Upstream response passed through"""
+        return JSONFragment('{"summary":{"numResults":0}}')
+
+    return handler
+
+
+def call_result(handler: MCPServerHandler, event: Dict[str, Any]) -> Dict[str, Any]:
+    response = handler.handle_request(event, None)
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])["result"]
+
+
+def test_structured_results_keep_text_content_for_older_clients(poi_handler):
+    event = request_event("tools/call", {"name": "getNearbyPois", "arguments": {"lat": 1.5, "lon": 2}})
+
+    result = call_result(poi_handler, event)
+
+    assert result["structuredContent"] == {"results": [{"name": "Museum", "position": {"lat": 1.5, "lon": 2}}]}
+    assert len(result["content"]) == 1
+    assert result["content"][0]["type"] == "text"
+    assert json.loads(result["content"][0]["text"]) == result["structuredContent"]
+
+
+def test_fragment_results_keep_text_content_for_older_clients(poi_handler):
+    result = call_result(poi_handler, request_event("tools/call", {"name": "rawUpstream"}))
+
+    assert result["structuredContent"] == {"summary": {"numResults": 0}}
+    assert result["content"][0]["text"] == '{"summary":{"numResults":0}}'
+
+
+def structured_call(name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return request_event(
+        "tools/call", {"name": name, "arguments": arguments or {}},
+        **{"MCP-Protocol-Version": STRUCTURED_OUTPUT_VERSION}
+    )
+
+
+def test_structured_output_clients_also_get_the_text_block(poi_handler):
+    result = call_result(poi_handler, structured_call("getNearbyPois", {"lat": 1, "lon": 2}))
+
+    assert json.loads(result["content"][0]["text"]) == result["structuredContent"]
+    assert call_result(poi_handler, structured_call("rawUpstream"))["content"][0]["text"] == (
+        '{"summary":{"numResults":0}}'
+    )
+
+
+def test_text_block_can_be_omitted_for_structured_output_clients(poi_handler):
+    poi_handler.omit_text_for_structured_clients = True
+
+    result = call_result(poi_handler, structured_call("getNearbyPois", {"lat": 1, "lon": 2}))
+
+    assert result["content"] == []
+    assert "structuredContent" in result
+    # Older clients still get it
+    event = request_event("tools/call", {"name": "getNearbyPois", "arguments": {"lat": 1, "lon": 2}})
+    assert len(call_result(poi_handler, event)["content"]) == 1
+
+
+def test_initialize_negotiates_protocol_version(poi_handler):
+    assert call_result(poi_handler, request_event("initialize", {"protocolVersion": STRUCTURED_OUTPUT_VERSION}))[
+        "protocolVersion"] == STRUCTURED_OUTPUT_VERSION
+    assert call_result(poi_handler, request_event("initialize", {"protocolVersion": "2024-11-05"}))[
+        "protocolVersion"] == "2024-11-05"
+    assert call_result(poi_handler, request_event("initialize", {"protocolVersion": "1999-01-01"}))[
+        "protocolVersion"] == "2024-11-05"
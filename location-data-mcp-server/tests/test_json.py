@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from mcp_json import JSONFragment, OrjsonCodec, StdlibJSONCodec, create_codec, orjson
+
+CODECS = [StdlibJSONCodec]
+if orjson is not None:
+    CODECS.append(OrjsonCodec)
+
+
+@pytest.fixture(params=CODECS, ids=lambda codec: codec.name)
+def codec(request):
+    return request.param()
+
+
+def test_round_trip_is_compact(codec):
+    obj = {"name": "Café", "values": [1, 2.5, None, True], "nested": {"a": "b"}}
+
+    text = codec.dumps(obj)
+
+    assert " " not in text.replace("Café", "")
+    assert codec.loads(text) == obj
+    assert codec.loads(codec.dumps_bytes(obj)) == obj
+
+
+def test_fragments_are_spliced_verbatim(codec):
+    upstream = '{"results":[{"poi":{"name":"Museum"}}],"summary":{"numResults":1}}'
+
+    text = codec.dumps({"jsonrpc": "2.0", "result": JSONFragment(upstream), "raw": JSONFragment(upstream.encode())})
+
+    assert json.loads(text) == {"jsonrpc": "2.0", "result": json.loads(upstream), "raw": json.loads(upstream)}
+    assert upstream in text
+
+
+def test_fragment_placeholder_cannot_be_forged(codec):
+    # A string that looks like a placeholder stays a string
+    text = codec.dumps({"a": "\x00deadbeef:0\x00", "b": JSONFragment("[1]")})
+
+    assert json.loads(text) == {"a": "\x00deadbeef:0\x00", "b": [1]}
+
+
+def test_invalid_json_raises_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
+
+
+def test_unserializable_values_raise_type_error(codec):
+    with pytest.raises(TypeError):
+        codec.dumps({"a": object()})
+
+
+def test_create_codec():
+    assert create_codec("stdlib").name == "stdlib"
+    assert create_codec("auto").name == ("orjson" if orjson is not None else "stdlib")
+    with pytest.raises(ValueError):
+        create_codec("simplejson")
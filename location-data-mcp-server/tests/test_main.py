@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setattr(main, "get_geocoding", lambda address: {"results": [{"position": {"lat": 1.5, "lon": 2.5}}]})
+    monkeypatch.setattr(main.aws_util, "get_secret", lambda name: "key")
+    bodies = {}
+    monkeypatch.setattr(main, "do_get_raw", lambda url, params: bodies.get("body"))
+    return bodies
+
+
+def test_poi_body_is_passed_through_as_structured_content(upstream):
+    upstream["body"] = b' {"summary": {"numResults": 1}, "results": []}\n'
+
+    result = main.get_nearby_pois("Main St")
+
+    assert isinstance(result, main.StructuredResult)
+    assert json.loads(result.data.as_str()) == {"summary": {"numResults": 1}, "results": []}
+
+
+@pytest.mark.parametrize("body", [
+    b"<html><body>Service Unavailable</body></html>",
+    b'{"summary": {"numResults": 1}, "resu',
+    b'[{"name": "Museum"}]',
+    b"42",
+])
+def test_poi_body_that_is_not_a_json_object_is_an_error(upstream, body):
+    upstream["body"] = body
+
+    result = main.get_nearby_pois("Main St")
+
+    assert json.loads(result) == {"error": "Unexpected response from the POI search"}
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_metrics
+from mcp_authorization import MCPAuthorizationMiddleware
+from mcp_handler import MCPServerHandler
+from mcp_metrics import InMemoryMetricsSink, timed, with_request_metrics
+from mcp_tool_cache import CachePolicy
+from test_handler import DictSessionStore
+
+
+class FakeAuthServer:
+    """Accepts any bearer token"""
+
+    def extract_token_from_request(self, event):
+        headers = {k.lower(): v for k, v in event["headers"].items()}
+        return headers.get("authorization", "").removeprefix("Bearer ") or None
+
+    async def validate_token(self, token):
+        return {"sub": "user-1", "token": token}
+
+    async def prime(self):
+        pass
+
+    def create_error_response(self, status_code, error, error_description=None):
+        return {"statusCode": status_code, "headers": {"Content-Type": "application/json"},
+                "body": json.dumps({"error": error})}
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    previous = mcp_metrics.set_sink(sink)
+    yield sink
+    mcp_metrics.set_sink(previous)
+
+
+@pytest.fixture
+def server():
+    store = DictSessionStore()
+    session_id = store.create_session({})
+    handler = MCPServerHandler(name="test", session_store=store)
+    calls = []
+
+    @handler.tool(cache=CachePolicy())
+    def get_weather(city: str) -> dict:
+        """Weather in a city
+
+        Args:
+            city: City name
+        """
+        calls.append(threading.current_thread().name)
+        with timed("upstream_http"):
+            return {"city": city, "temperature": 21}
+
+    middleware = MCPAuthorizationMiddleware(FakeAuthServer())
+
+    async def mcp_handler(event, context):
+        return handler.handle_request(event, context)
+
+    @with_request_metrics
+    def lambda_handler(event, context):
+        return asyncio.run(middleware(event, context, mcp_handler))
+
+    return lambda_handler, session_id, calls
+
+
+def call(lambda_handler, session_id, city="Paris"):
+    event = {
+        "httpMethod": "POST",
+        "headers": {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer token-1",
+            "Mcp-Session-Id": session_id,
+        },
+        "body": json.dumps({
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "getWeather", "arguments": {"city": city}},
+        }),
+    }
+    # A bounded deadline runs the tool on a worker thread
+    context = SimpleNamespace(aws_request_id="req-1", get_remaining_time_in_millis=lambda: 10_000)
+    response = lambda_handler(event, context)
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])["result"]
+
+
+def phases(request):
+    return [phase for phase, _ in request.timings]
+
+
+def test_request_publishes_each_phase_once(sink, server):
+    lambda_handler, session_id, _ = server
+
+    call(lambda_handler, session_id)
+
+    assert len(sink.requests) == 1
+    recorded = phases(sink.requests[0])
+    for phase in ("auth", "session_load", "parse", "bind", "tool", "upstream_http", "serialize", "request"):
+        assert recorded.count(phase) == 1, phase
+    assert recorded[-1] == "request"
+    assert all(duration_ms >= 0 for _, duration_ms in sink.requests[0].timings)
+
+
+def test_request_carries_tool_and_cache_dimensions(sink, server):
+    lambda_handler, session_id, calls = server
+
+    call(lambda_handler, session_id)
+    call(lambda_handler, session_id)
+
+    assert len(calls) == 1
+    assert [request.dimensions for request in sink.requests] == [
+        {"tool": "getWeather", "cache": "miss"},
+        {"tool": "getWeather", "cache": "hit"},
+    ]
+    assert len(sink.values("tool", tool="getWeather", cache="miss")) == 1
+    assert len(sink.values("tool", tool="getWeather", cache="hit")) == 1
+    # The cached call never goes upstream
+    assert len(sink.values("upstream_http", cache="hit")) == 0
+
+
+def test_worker_thread_timings_are_published_with_the_request(sink, server):
+    lambda_handler, session_id, calls = server
+
+    call(lambda_handler, session_id)
+
+    assert calls == ["tool-getWeather"]
+    request = sink.requests[0]
+    upstream_ms, = sink.values("upstream_http", tool="getWeather")
+    tool_ms, = sink.values("tool", tool="getWeather")
+    request_ms, = sink.values("request", tool="getWeather")
+    assert upstream_ms <= tool_ms <= request_ms
+    # Recorded on the worker before the request scope ended and published
+    assert phases(request).index("upstream_http") < phases(request).index("tool")
+
+
+def test_nothing_is_recorded_outside_a_request(sink):
+    with timed("tool"):
+        mcp_metrics.set_dimension("tool", "getWeather")
+
+    assert sink.requests == []
+
+
+def test_nested_scopes_publish_once(sink):
+    @with_request_metrics
+    def handler(event, context):
+        with mcp_metrics.request_metrics():
+            with timed("tool"):
+                pass
+        return {}
+
+    handler({}, None)
+
+    assert len(sink.requests) == 1
+    assert phases(sink.requests[0]) == ["tool", "request"]
@@ -0,0 +1,77 @@
+import sys
+import threading
+from types import ModuleType
+
+import pytest
+
+import lazy_import
+from lazy_import import load_lazy_modules
+from mcp_priming import PrimingRegistry
+
+
+@pytest.fixture
+def lazy_module(tmp_path, monkeypatch):
+    (tmp_path / "priming_lazy_dep.py").write_text("import time\ntime.sleep(0.05)\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(lazy_import, "_pending", {})
+    yield lazy_import.lazy_import("priming_lazy_dep")
+    sys.modules.pop("priming_lazy_dep", None)
+
+
+def test_lazy_module_loads_on_first_use(lazy_module):
+    assert type(lazy_module) is not ModuleType
+    assert lazy_module.VALUE == 42
+    assert type(lazy_module) is ModuleType
+
+
+def test_load_lazy_modules(lazy_module):
+    load_lazy_modules(["priming_lazy_dep", "not_lazily_imported"])
+
+    assert type(lazy_module) is ModuleType
+    assert lazy_import._pending == {}
+
+
+def test_prime_loads_lazy_modules_before_fanning_out(lazy_module):
+    registry = PrimingRegistry()
+    loaded = []
+    lock = threading.Lock()
+
+    def warm():
+        with lock:
+            loaded.append(type(lazy_module) is ModuleType)
+        assert lazy_module.VALUE == 42
+
+    for i in range(4):
+        registry.register(f"warm-{i}", warm, needs=["priming_lazy_dep"] if i == 0 else [])
+
+    results = registry.prime(budget=5)
+
+    assert [result.status for result in results] == ["ok"] * 4
+    assert loaded == [True] * 4
+
+
+def test_prime_leaves_modules_no_warm_up_needs_deferred(lazy_module):
+    registry = PrimingRegistry()
+    registry.register("unrelated", lambda: None, needs=["httpx"])
+
+    registry.prime(budget=5)
+
+    assert type(lazy_module) is not ModuleType
+    assert "priming_lazy_dep" in lazy_import._pending
+
+
+def test_prime_reports_failures_and_timeouts():
+    registry = PrimingRegistry()
+    release = threading.Event()
+    registry.register("ok", lambda: None)
+    registry.register("failed", lambda: 1 / 0)
+    registry.register("slow", release.wait)
+
+    results = {result.name: result for result in registry.prime(budget=0.2)}
+    release.set()
+
+    assert results["ok"].status == "ok"
+    assert results["failed"].status == "failed"
+    assert results["failed"].error.startswith("ZeroDivisionError")
+    assert results["slow"].status == "timeout"
+    assert [r.name for r in registry.ensure_primed(budget=1)] == ["failed", "slow"]
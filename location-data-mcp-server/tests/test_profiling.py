@@ -0,0 +1,67 @@
+import json
+import pstats
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_profiling
+from mcp_handler import MCPServerHandler
+from mcp_profiling import ProfilingConfig, parse_sample_rate, tool_name, with_sampled_profiling
+
+
+def lambda_context(remaining_ms: int = 10_000):
+    return SimpleNamespace(aws_request_id="req-1", get_remaining_time_in_millis=lambda: remaining_ms)
+
+
+def tool_call(name: str):
+    return {
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name, "arguments": {}}}),
+    }
+
+
+def profiled_functions(directory):
+    [profile] = directory.glob("*.prof")
+    return profile.name, {function for _, _, function in pstats.Stats(str(profile)).stats}
+
+
+@pytest.mark.parametrize("value, expected", [("1/100", 0.01), ("0.25", 0.25), ("0", 0.0), ("3/2", 1.0)])
+def test_parse_sample_rate(value, expected):
+    assert parse_sample_rate(value) == expected
+
+
+def test_tool_name():
+    assert tool_name(tool_call("getNearbyPois")) == "getNearbyPois"
+    assert tool_name({"body": json.dumps({"method": "tools/list"})}) == "tools/list"
+    assert tool_name({"body": "not json"}) == "unknown"
+
+
+def test_profile_covers_tools_run_on_the_worker_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcp_profiling, "_cold_start", True)
+    handler = MCPServerHandler(name="test")
+
+    def sum_squares_in_tool():
+        return sum(i * i for i in range(1000))
+
+    @handler.tool()
+    def profiled_tool() -> dict:
+        """Tool whose work should show up in the profile"""
+        return {"total": sum_squares_in_tool()}
+
+    lambda_handler = with_sampled_profiling(
+        handler.handle_request, ProfilingConfig(sample_rate=1.0, directory=str(tmp_path))
+    )
+    response = lambda_handler(tool_call("profiledTool"), lambda_context())
+
+    assert json.loads(response["body"])["result"]["structuredContent"] == {"total": 332833500}
+    name, functions = profiled_functions(tmp_path)
+    assert name.endswith("-cold-profiledTool-req-1.prof")
+    assert {"profiled_tool", "sum_squares_in_tool", "handle_request"} <= functions
+
+
+def test_unsampled_invocations_are_not_profiled(tmp_path):
+    lambda_handler = with_sampled_profiling(lambda event, context: "ok", ProfilingConfig(directory=str(tmp_path)))
+
+    assert lambda_handler(tool_call("any"), lambda_context()) == "ok"
+    assert not tmp_path.exists() or not list(tmp_path.iterdir())
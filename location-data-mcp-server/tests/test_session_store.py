@@ -0,0 +1,189 @@
+import base64
+import copy
+import time
+from typing import Any, Dict
+
+import pytest
+from botocore.exceptions import ClientError
+
+from mcp_session_store import (
+    CachingDynamoDBSessionStore,
+    SessionTokenError,
+    SignedSessionStore,
+    reissued_session_ids,
+)
+
+
+class FakeTable:
+    """Just enough of a DynamoDB Table for the session store's calls"""
+
+    def __init__(self):
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.calls = []
+
+    def put_item(self, Item):
+        self.calls.append("put_item")
+        self.items[Item["session_id"]] = copy.deepcopy(Item)
+
+    def get_item(self, Key):
+        self.calls.append("get_item")
+        item = self.items.get(Key["session_id"])
+        return {"Item": copy.deepcopy(item)} if item else {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression, ExpressionAttributeNames,
+                    ExpressionAttributeValues):
+        self.calls.append("update_item")
+        item = self.items.get(Key["session_id"])
+        expected = ExpressionAttributeValues.get(":expected")
+        if item is None or item.get("version") != expected:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+
+        names = ExpressionAttributeNames
+        set_part, _, remove_part = UpdateExpression[len("SET "):].partition(" REMOVE ")
+        for clause in set_part.split(", "):
+            target, value = clause.split(" = ")
+            value = copy.deepcopy(ExpressionAttributeValues[value])
+            if target.startswith("#data."):
+                item["data"][names[target.split(".")[1]]] = value
+            else:
+                item[names[target]] = value
+        for target in filter(None, remove_part.split(", ")):
+            item["data"].pop(names[target.split(".")[1]], None)
+
+    def delete_item(self, Key):
+        self.calls.append("delete_item")
+        self.items.pop(Key["session_id"], None)
+
+
+@pytest.fixture
+def store():
+    store = CachingDynamoDBSessionStore(table_name="sessions", cache_ttl=60)
+    store.table = FakeTable()
+    return store
+
+
+def test_reads_are_served_from_cache(store):
+    session_id = store.create_session({"a": 1})
+
+    assert store.get_session(session_id) == {"a": 1}
+    assert store.get_session(session_id) == {"a": 1}
+    assert store.table.calls == ["put_item"]
+
+
+def test_nested_edits_do_not_leak_into_cache(store):
+    session_id = store.create_session({"items": ["a"]})
+
+    store.get_session(session_id)["items"].append("b")
+
+    assert store.get_session(session_id) == {"items": ["a"]}
+
+
+def test_key_updates_bump_version_and_keep_other_keys(store):
+    session_id = store.create_session({"a": 1, "b": 2, "c": 3})
+
+    assert store.update_session_keys(session_id, {"a": 10}, removed=["c"])
+
+    item = store.table.items[session_id]
+    assert item["data"] == {"a": 10, "b": 2}
+    assert item["version"] == 2
+    assert store.get_session(session_id) == {"a": 10, "b": 2}
+
+
+def test_key_update_retries_after_concurrent_write(store):
+    session_id = store.create_session({"a": 1})
+    # Another instance wrote the session since this one cached it
+    store.table.items[session_id]["version"] = 5
+    store.table.items[session_id]["data"]["b"] = 2
+
+    assert store.update_session_keys(session_id, {"a": 10})
+    assert store.table.items[session_id]["data"] == {"a": 10, "b": 2}
+    assert store.table.items[session_id]["version"] == 6
+
+
+def test_full_update_is_rejected_on_version_conflict(store):
+    session_id = store.create_session({"a": 1})
+    store.table.items[session_id]["version"] = 5
+
+    assert not store.update_session(session_id, {"a": 2})
+    assert store.get_session(session_id) == {"a": 1}
+
+
+@pytest.fixture
+def signed():
+    return SignedSessionStore(signing_keys={"k1": "first-secret"}, ttl_seconds=60)
+
+
+def test_signed_session_round_trip(signed):
+    token = signed.create_session({"user": "u1"})
+
+    assert token.startswith("v1.k1.")
+    assert signed.get_session(token) == {"user": "u1"}
+
+
+def test_signed_session_rejects_tampering(signed):
+    token = signed.create_session({"role": "user"})
+    version, key_id, encoding, payload, signature = token.split(".")
+    forged_payload = base64.urlsafe_b64encode(b'{"sid":"x","exp":9999999999,"data":{"role":"admin"}}')
+    forged = ".".join([version, key_id, "j", forged_payload.decode().rstrip("="), signature])
+
+    assert signed.get_session(forged) is None
+    assert signed.get_session(token[:-2]) is None
+    assert signed.get_session("not-a-token") is None
+    with pytest.raises(SessionTokenError):
+        signed.decode(forged)
+
+
+def test_signed_session_expires(signed):
+    token = signed.encode({"sid": "s", "exp": int(time.time()) - 1, "data": {}})
+
+    assert signed.get_session(token) is None
+
+
+def test_signed_session_compresses_only_when_shorter(signed):
+    small = signed.create_session({"a": 1})
+    large = signed.create_session({"text": "repeat " * 200})
+
+    assert small.split(".")[2] == "j"
+    assert large.split(".")[2] == "z"
+    assert signed.get_session(large) == {"text": "repeat " * 200}
+
+
+def test_signed_session_key_rotation():
+    old = SignedSessionStore(signing_keys={"k1": "first-secret"})
+    token = old.create_session({"a": 1})
+
+    rotated = SignedSessionStore(signing_keys={"k1": "first-secret", "k2": "second-secret"}, active_key_id="k2")
+    assert rotated.get_session(token) == {"a": 1}
+    assert rotated.create_session().split(".")[1] == "k2"
+
+    retired = SignedSessionStore(signing_keys={"k2": "second-secret"})
+    assert retired.get_session(token) is None
+
+
+def test_signed_session_update_reissues_token_within_request(signed):
+    token = signed.create_session({"count": 1})
+    assert not signed.update_session(token, {"count": 2})
+
+    reissued = reissued_session_ids.set({})
+    try:
+        assert signed.update_session(token, {"count": 2})
+        new_token = reissued_session_ids.get()[token]
+        # Reads later in the same request see the update through the original ID
+        assert signed.get_session(token) == {"count": 2}
+    finally:
+        reissued_session_ids.reset(reissued)
+
+    assert signed.get_session(new_token) == {"count": 2}
+    assert signed.get_session(token) == {"count": 1}
+
+
+def test_signed_session_update_fails_when_token_too_large():
+    store = SignedSessionStore(signing_keys={"k1": "secret"}, compress=False, max_token_bytes=200)
+    token = store.create_session()
+
+    reissued = reissued_session_ids.set({})
+    try:
+        assert not store.update_session(token, {"blob": "x" * 500})
+        assert reissued_session_ids.get() == {}
+    finally:
+        reissued_session_ids.reset(reissued)
@@ -0,0 +1,143 @@
+import json
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from mcp_handler import MCPServerHandler
+from mcp_streaming import accepts_event_stream, sse_event
+
+
+@pytest.fixture
+def handler():
+    handler = MCPServerHandler(name="test")
+    release = threading.Event()
+
+    @handler.tool()
+    def count_to(n: int) -> dict:
+        """Count, reporting each step
+
+        Args:
+            n: Last number
+        """
+        for i in range(1, n + 1):
+            handler.report_progress(i, n, f"counted {i}")
+            handler.send_partial({"count": i})
+        return {"count": n}
+
+    @handler.tool()
+    def broken() -> dict:
+        """Fails after reporting progress"""
+        handler.report_progress(1, 2)
+        raise RuntimeError("upstream unavailable")
+
+    @handler.tool()
+    def stalled() -> dict:
+        """Reports progress, then waits past the deadline"""
+        handler.report_progress(1, 2)
+        release.wait(5)
+        return {}
+
+    yield handler
+    release.set()
+
+
+def call_event(name: str, arguments: Optional[Dict[str, Any]] = None, progress_token: Any = "p1") -> Dict[str, Any]:
+    params: Dict[str, Any] = {"name": name, "arguments": arguments or {}}
+    if progress_token is not None:
+        params["_meta"] = {"progressToken": progress_token}
+    return {
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"},
+        "body": json.dumps({"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": params}),
+    }
+
+
+def stream(handler: MCPServerHandler, event: Dict[str, Any], remaining_ms: int = 10_000) -> List[Dict[str, Any]]:
+    """Messages of a streamed response, in the order they were sent"""
+    context = SimpleNamespace(get_remaining_time_in_millis=lambda: remaining_ms)
+    response = handler.handle_request_stream(event, context)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/event-stream"
+    messages = []
+    for frame in response.body:
+        lines = frame.rstrip("\n").split("\n")
+        assert lines[0] == "event: message"
+        messages.append(json.loads("\n".join(line[len("data: "):] for line in lines[1:])))
+    return messages
+
+
+def test_progress_and_partial_results_precede_the_final_response(handler):
+    messages = stream(handler, call_event("countTo", {"n": 2}))
+
+    assert [message.get("method", "result") for message in messages] == [
+        "notifications/progress", "notifications/message",
+        "notifications/progress", "notifications/message",
+        "result",
+    ]
+    assert messages[0]["params"] == {"progressToken": "p1", "progress": 1, "total": 2, "message": "counted 1"}
+    assert messages[3]["params"]["logger"] == "countTo"
+    assert messages[3]["params"]["data"] == {"progressToken": "p1", "partialResult": {"count": 2}}
+    final = messages[-1]
+    assert final["id"] == 7
+    assert final["result"]["structuredContent"] == {"count": 2}
+
+
+def test_without_a_progress_token_only_the_final_response_is_sent(handler):
+    messages = stream(handler, call_event("countTo", {"n": 3}, progress_token=None))
+
+    assert len(messages) == 1
+    assert messages[0]["result"]["structuredContent"] == {"count": 3}
+
+
+def test_tool_error_is_the_final_event(handler):
+    messages = stream(handler, call_event("broken"))
+
+    assert [message.get("method") for message in messages] == ["notifications/progress", None]
+    error = messages[-1]["error"]
+    assert error["code"] == -32603
+    assert "upstream unavailable" in error["message"]
+
+
+def test_deadline_is_answered_in_the_stream(handler, monkeypatch):
+    monkeypatch.delenv("MCP_REQUEST_BUDGET_MS", raising=False)
+    monkeypatch.delenv("MCP_DEADLINE_RESERVE_MS", raising=False)
+
+    # 600 ms left, 500 of which are kept back for the response
+    messages = stream(handler, call_event("stalled"), remaining_ms=600)
+
+    assert [message.get("method") for message in messages] == ["notifications/progress", None]
+    result = messages[-1]["result"]
+    assert result["isError"] is True
+    assert result["structuredContent"]["error"]["code"] == "DEADLINE_EXCEEDED"
+    assert result["structuredContent"]["error"]["tool"] == "stalled"
+
+
+def test_request_failure_is_the_final_event(handler, monkeypatch):
+    def fail(event, context):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(handler, "_handle_scoped", fail)
+
+    [message] = stream(handler, call_event("countTo", {"n": 1}))
+
+    assert message["error"]["code"] == -32603
+    assert message["error"]["message"] == "Error processing request: boom"
+
+
+def test_notifications_end_the_stream_without_a_message(handler):
+    event = call_event("countTo")
+    event["body"] = json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    assert stream(handler, event) == []
+
+
+def test_sse_event_gives_every_line_a_data_field():
+    assert sse_event('{\n  "a": 1\n}') == 'event: message\ndata: {\ndata:   "a": 1\ndata: }\n\n'
+
+
+def test_accepts_event_stream():
+    assert accepts_event_stream({"accept": "application/json, text/event-stream"})
+    assert not accepts_event_stream({"accept": "application/json"})
+    assert not accepts_event_stream({})
@@ -0,0 +1,140 @@
+import json
+from enum import Enum
+from typing import Dict, Optional
+
+import pytest
+from awslabs.mcp_lambda_handler.mcp_lambda_handler import current_session_id
+
+import mcp_tool_cache
+from mcp_handler import MCPServerHandler, StructuredResult
+from mcp_json import StdlibJSONCodec
+from mcp_tool_cache import CachePolicy, ToolCacheBackend, ToolResultCache
+
+
+class Category(Enum):
+    MUSEUM = "museum"
+    PARK = "park"
+
+
+class DictBackend(ToolCacheBackend):
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.values[key] = value
+
+
+@pytest.fixture(autouse=True)
+def stdlib_codec(monkeypatch):
+    # The stdlib codec is the strict one: it serializes nothing it does not know
+    monkeypatch.setattr(mcp_tool_cache, "codec", StdlibJSONCodec())
+
+
+def counting(result="result"):
+    calls = []
+
+    def func(**kwargs):
+        calls.append(kwargs)
+        return result
+
+    return func, calls
+
+
+def test_enum_arguments_are_keyed_by_value():
+    cache = ToolResultCache("search", CachePolicy())
+    func, calls = counting()
+
+    assert cache.call(func, {"category": Category.MUSEUM, "near": [Category.PARK]}, None) == "result"
+    assert cache.call(func, {"category": Category.MUSEUM, "near": [Category.PARK]}, None) == "result"
+    assert len(calls) == 1
+    assert cache.key({"category": Category.MUSEUM}, None) == cache.key({"category": "museum"}, None)
+
+
+def test_key_ignores_argument_order_and_unlisted_arguments():
+    cache = ToolResultCache("search", CachePolicy(key_args=["lat", "lon"]))
+
+    assert cache.key({"lat": 1, "lon": 2, "trace": "a"}, None) == cache.key({"lon": 2, "lat": 1, "trace": "b"}, None)
+    assert cache.key({"lat": 1, "lon": 2}, None) != cache.key({"lat": 1, "lon": 3}, None)
+
+
+def test_session_scoped_results_are_not_shared_between_sessions():
+    cache = ToolResultCache("profile", CachePolicy(session_scoped=True))
+    func, calls = counting()
+
+    cache.call(func, {}, "s1")
+    cache.call(func, {}, "s1")
+    cache.call(func, {}, "s2")
+    cache.call(func, {}, None)
+    cache.call(func, {}, None)
+
+    assert len(calls) == 4
+    assert cache.stats.as_dict() == {"hits": 1, "shared_hits": 0, "misses": 2, "hit_rate": 0.3333}
+
+
+def test_cache_if_skips_unwanted_results():
+    cache = ToolResultCache("search", CachePolicy(cache_if=lambda result: "error" not in result))
+    func, calls = counting({"error": "upstream timeout"})
+
+    cache.call(func, {}, None)
+    cache.call(func, {}, None)
+
+    assert len(calls) == 2
+
+
+def test_shared_backend_serves_other_instances():
+    backend = DictBackend()
+    first = ToolResultCache("search", CachePolicy(shared=True), backend)
+    second = ToolResultCache("search", CachePolicy(shared=True), backend)
+    func, calls = counting({"results": [1, 2]})
+
+    first.call(func, {"q": "a"}, None)
+
+    assert second.call(func, {"q": "a"}, None) == {"results": [1, 2]}
+    assert len(calls) == 1
+    assert second.stats.shared_hits == 1
+
+
+def test_shared_value_size_limit_counts_encoded_bytes(monkeypatch):
+    monkeypatch.setattr(mcp_tool_cache, "MAX_SHARED_VALUE_BYTES", 100)
+    backend = DictBackend()
+    cache = ToolResultCache("search", CachePolicy(shared=True), backend, encode=lambda result: result)
+
+    # 60 characters, 120 bytes in UTF-8
+    cache.call(lambda: "é" * 60, {}, None)
+    assert backend.values == {}
+
+    cache.clear()
+    cache.call(lambda **kwargs: "e" * 60, {"q": 1}, None)
+    assert len(backend.values) == 1
+
+
+def test_handler_caches_tool_with_enum_argument():
+    handler = MCPServerHandler(name="test")
+    calls = []
+
+    @handler.tool(cache=CachePolicy(shared=True))
+    def search_places(category: Category) -> dict:
+        """Places of a category
+
+        Args:
+            category: Kind of place
+        """
+        calls.append(category)
+        return StructuredResult({"category": category.value})
+
+    handler.tool_caches["searchPlaces"].backend = DictBackend()
+    event = {
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                            "params": {"name": "searchPlaces", "arguments": {"category": "museum"}}}),
+    }
+
+    for _ in range(2):
+        response = handler.handle_request(event, None)
+        assert json.loads(response["body"])["result"]["structuredContent"] == {"category": "museum"}
+    assert calls == [Category.MUSEUM]
+    assert current_session_id.get() is None
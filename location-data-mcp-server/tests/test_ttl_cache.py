@@ -0,0 +1,64 @@
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_and_set():
+    cache = TTLCache()
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", 0) == 0
+    assert "a" in cache and "b" not in cache
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+
+    clock[0] += 10
+    assert cache.get("a") == 1
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+
+def test_cached_none_is_a_hit():
+    cache = TTLCache()
+    cache.set("a", None)
+
+    assert "a" in cache
+    assert cache.get("a", "default") is None
+
+
+def test_pop_and_clear(clock):
+    cache = TTLCache(ttl=1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock[0] += 5
+
+    # Expired entries can still be popped
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,171 @@
+import asyncio
+import io
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import mcp_metrics
+import mcp_warmer
+from mcp_authorization import MCPAuthorizationMiddleware
+from mcp_metrics import InMemoryMetricsSink, timed, with_request_metrics
+from mcp_priming import PrimingRegistry
+from mcp_warmer import with_warmer_fast_path
+from test_metrics import FakeAuthServer
+
+FUNCTION_ARN = "arn:aws:lambda:us-east-1:123456789012:function:location-data"
+
+
+class FakeLambda:
+    """Answers each invoke as a distinct warm instance"""
+
+    def __init__(self, fail=False):
+        self.invocations = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        with self.lock:
+            self.invocations.append((FunctionName, json.loads(Payload)))
+            instance = f"instance-{len(self.invocations)}"
+        if self.fail:
+            raise RuntimeError("throttled")
+        return {"Payload": io.BytesIO(json.dumps({"warmer": True, "instance": instance}).encode("utf-8"))}
+
+
+class CountingAuthServer(FakeAuthServer):
+    def __init__(self):
+        self.validated = 0
+
+    async def validate_token(self, token):
+        self.validated += 1
+        return await super().validate_token(token)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = PrimingRegistry()
+    warmed = []
+    registry.register("client", lambda: warmed.append(True))
+    monkeypatch.setattr(mcp_warmer, "registry", registry)
+    monkeypatch.setattr(mcp_warmer, "_warm", False)
+    return warmed
+
+
+@pytest.fixture
+def lambda_client(monkeypatch):
+    client = FakeLambda()
+    monkeypatch.setattr(mcp_warmer, "_lambda_client", client)
+    return client
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    previous = mcp_metrics.set_sink(sink)
+    yield sink
+    mcp_metrics.set_sink(previous)
+
+
+@pytest.fixture
+def lambda_handler():
+    """Handler stacked like main.lambda_handler: warmer, metrics, authorization"""
+    auth_server = CountingAuthServer()
+    middleware = MCPAuthorizationMiddleware(auth_server)
+    handled = []
+
+    async def mcp_handler(event, context):
+        with timed("tool"):
+            handled.append(event)
+        return {"statusCode": 200, "body": "{}"}
+
+    @with_warmer_fast_path
+    @with_request_metrics
+    def handler(event, context):
+        return asyncio.run(middleware(event, context, mcp_handler))
+
+    return handler, auth_server, handled
+
+
+def context(**attributes):
+    return SimpleNamespace(function_name="location-data", invoked_function_arn=FUNCTION_ARN, **attributes)
+
+
+def test_warmer_ping_skips_authorization_and_metrics(registry, sink, lambda_handler):
+    handler, auth_server, handled = lambda_handler
+
+    report = handler({"warmer": True}, context())
+
+    assert report["warmer"] is True
+    assert report["cold"] is True
+    assert report["primed"] == {"client": "ok"}
+    assert "targets" not in report
+    assert registry == [True]
+    assert auth_server.validated == 0
+    assert handled == []
+    assert sink.requests == []
+
+
+def test_other_events_reach_the_handler(registry, sink, lambda_handler):
+    handler, auth_server, handled = lambda_handler
+
+    response = handler({"headers": {"Authorization": "Bearer token-1"}, "warmer": False}, context())
+
+    assert response["statusCode"] == 200
+    assert auth_server.validated == 1
+    assert len(handled) == 1
+    assert [phase for phase, _ in sink.requests[0].timings] == ["auth", "tool", "request"]
+    assert registry == []
+
+
+def test_only_the_first_ping_of_an_instance_is_cold(registry):
+    assert mcp_warmer.handle_warmer({"warmer": True}, context())["cold"] is True
+    report = mcp_warmer.handle_warmer({"warmer": True}, context())
+
+    assert report["cold"] is False
+    # Succeeded warm-ups are not run again
+    assert registry == [True]
+
+
+def test_fan_out_invokes_the_function_concurrency_minus_one_times(registry, lambda_client):
+    report = mcp_warmer.handle_warmer({"warmer": True, "concurrency": 3, "delay_ms": 20}, context())
+
+    assert lambda_client.invocations == [
+        (FUNCTION_ARN, {"warmer": True, "target": True, "delay_ms": 20}),
+    ] * 2
+    assert sorted(target["instance"] for target in report["targets"]) == ["instance-1", "instance-2"]
+    assert report["instances"] == 3
+
+
+def test_fan_out_is_capped(registry, lambda_client, monkeypatch):
+    monkeypatch.setattr(mcp_warmer, "MAX_CONCURRENCY", 4)
+
+    report = mcp_warmer.handle_warmer({"warmer": True, "concurrency": 100}, context())
+
+    assert len(lambda_client.invocations) == 3
+    assert report["instances"] == 4
+
+
+def test_targets_hold_their_invocation_without_fanning_out(registry, lambda_client):
+    report = mcp_warmer.handle_warmer({"warmer": True, "target": True, "concurrency": 5, "delay_ms": 30}, context())
+
+    assert lambda_client.invocations == []
+    assert "targets" not in report
+    assert report["duration_ms"] >= 30
+
+
+def test_failed_invocations_are_reported(registry, lambda_client):
+    lambda_client.fail = True
+
+    report = mcp_warmer.handle_warmer({"warmer": True, "concurrency": 2}, context())
+
+    assert report["targets"] == [{"error": "RuntimeError: throttled"}]
+    assert report["instances"] == 1
+
+
+def test_fan_out_outside_lambda(registry, lambda_client):
+    report = mcp_warmer.handle_warmer({"warmer": True, "concurrency": 2}, None)
+
+    assert report["targets"] == [{"error": "No function to invoke outside Lambda"}]
+    assert lambda_client.invocations == []